@@ -4,7 +4,8 @@
 # aruco_threaded_tracking.py
 #
 # script testing basic tracking of Aruco markers, but splitting reading the
-# image from the camera into a separate thread
+# image from the camera into a separate thread, then running the detection
+# and pose estimation as stages of a threaded pipeline
 #
 #
 # NOTE: Any plotting is set up for output, not viewing on screen.
@@ -17,17 +18,29 @@
 #   - http://www.ucs.louisiana.edu/~jev9637
 #
 # Modified:
-#   * 
+#   * 10/18/26
+#       - Use FramePoolCapture from Basic Machine Vision, rather than a copy
+#         of the old threaded capture class
+#       - Run the detection and pose estimation on the pipeline in
+#         vision_pipeline.py
+#       - Size the capture's pool from the pipeline's stages
 #
 # TODO:
 #   * 
 ###############################################################################
 
+import os
+import sys
+
 import cv2
 import cv2.aruco as aruco
 import numpy as np
 import matplotlib.pyplot as plt
-import threading
+
+# The threaded capture and pipeline are in the Basic Machine Vision folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Basic Machine Vision'))
+from VideoCaptureThreaded import FramePoolCapture
+from vision_pipeline import Pipeline, Stage, capture_source, pipeline_capacity
 
 
 
@@ -56,94 +69,81 @@ DIST_COEFFS = np.array([[-2.34400379e-01,  3.00945461e+01, -2.53342956e-02,
 
 
 
-class VideoCaptureTreading:
-    def __init__(self, src=0, width=640, height=480):
-        self.src = src
-        self.capture = cv2.VideoCapture(self.src)
-        self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-        self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-        self.grabbed, self.frame = self.capture.read()
-        self.started = False
-        self.read_lock = threading.Lock()
-
-    def set(self, var1, var2):
-        self.capture.set(var1, var2)
-
-    def start(self):
-        if self.started:
-            print('[!] Threaded video capturing has already been started.')
-            return None
-        self.started = True
-        self.thread = threading.Thread(target=self.update, args=())
-        self.thread.start()
-        return self
-
-    def update(self):
-        while self.started:
-            grabbed, frame = self.capture.read()
-            with self.read_lock:
-                self.grabbed = grabbed
-                self.frame = frame
-
-    def read(self):
-        with self.read_lock:
-            frame = self.frame.copy()
-            grabbed = self.grabbed
-        return grabbed, frame
-
-    def stop(self):
-        self.started = False
-        self.thread.join()
+# The number of worker threads for marker detection
+NUM_WORKERS = 2
 
-    def __exit__(self, exec_type, exc_value, traceback):
-        self.capture.release()
+parameters =  aruco.DetectorParameters_create()
 
 
-# We'll do video capture on the webcam
-capture = VideoCaptureTreading(0)
+def detect(frame):
+    """ Pipeline stage - Finds the markers in the frame """
+    gray = cv2.cvtColor(frame.image, cv2.COLOR_BGR2GRAY)
+ 
+    # lists of ids and the corners beloning to each id
+    frame.corners, frame.ids, rejectedImgPoints = aruco.detectMarkers(gray, 
+                                                                      ARUCO_DICT, 
+                                                                      parameters=parameters)
+    return frame
+
+
+def estimate_and_draw(frame):
+    """ Pipeline stage - Estimates the pose of the markers and draws them """
+    # corners is [] if no markers are found
+    if len(frame.corners) > 0:
+        # The pool buffers are read-only, so draw on a copy
+        frame.image = frame.image.copy()
+
+        # Draw the corners and ids on the original, color image
+        aruco.drawDetectedMarkers(frame.image, 
+                                  frame.corners, 
+                                  frame.ids, 
+                                  borderColor=(0, 0, 255, 255))
+
+        # Estimate the pose of the markers in the frame
+        rvec, tvec, _ = aruco.estimatePoseSingleMarkers(frame.corners, 
+                                                        MARKERLENGTH, 
+                                                        CAMERA_MATRIX, 
+                                                        DIST_COEFFS)
+        # Loop through all the markers found and draw the axes on them
+        for index, ID in enumerate(frame.ids):
+            aruco.drawAxis(frame.image, CAMERA_MATRIX, DIST_COEFFS, 
+                           rvec[index], tvec[index], 0.5)
+
+    return frame
+
+
+# Detection can run on several frames at once. The frames are put back in
+# order for drawing and display.
+stages = [Stage('detect', detect, num_workers=NUM_WORKERS),
+          Stage('draw', estimate_and_draw, ordered=True)]
+
+# We'll do video capture on the webcam. The pool holds every frame the
+# pipeline can, the one being displayed, the latest frame, and the one the
+# capture thread is filling.
+capture = FramePoolCapture(0, num_buffers=pipeline_capacity(stages, output_size=2) + 3)
 capture.start()
 
-parameters =  aruco.DetectorParameters_create()
+pipeline = Pipeline(capture_source(capture), stages, output_size=2).start()
 
 try:
     while (True):
-        # Capture frame-by-frame
-        ret, frame = capture.read()
-    
-        # Our operations on the frame come here
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
- 
-        # lists of ids and the corners beloning to each id
-        corners, ids, rejectedImgPoints = aruco.detectMarkers(gray, 
-                                                              ARUCO_DICT, 
-                                                              parameters=parameters)
-    
-        # corners is [] if no markers are found
-        if corners != []:
-            # Draw the corners and ids on the original, color image
-            img = aruco.drawDetectedMarkers(frame, 
-                                            corners, 
-                                            ids, 
-                                            borderColor=(0, 0, 255, 255))
-
-
-
-            # Estimate the pose of the markers in the frame
-            rvec, tvec, _ = aruco.estimatePoseSingleMarkers(corners, 
-                                                            MARKERLENGTH, 
-                                                            CAMERA_MATRIX, 
-                                                            DIST_COEFFS)
-            # Loop through all the markers found and draw the axes on them
-            for index, ID in enumerate(ids):
-                aruco.drawAxis(frame, CAMERA_MATRIX, DIST_COEFFS, 
-                               rvec[index], tvec[index], 0.5)
+        # Get the next processed frame, waiting for one if needed
+        frame = pipeline.get(timeout=0.1)
+
+        if frame is None:
+            continue
     
-        # Display the resulting frame
-        cv2.imshow('frame', frame)
+        # Display the resulting frame. The window has to be updated from
+        # this thread.
+        cv2.imshow('frame', frame.image)
+        frame.release()
+
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
 
 finally:
-    # When everything done, release the capture
+    # When everything done, release the capture, then stop the pipeline
     capture.stop()
-    cv2.destroyAllWindows()
\ No newline at end of file
+    pipeline.stop()
+    print(pipeline.report())
+    cv2.destroyAllWindows()
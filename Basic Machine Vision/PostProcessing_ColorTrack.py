@@ -1,96 +1,253 @@
-#! /usr/bin/env python 
- 
-import cv2.cv as cv
-from time import localtime, strftime
-from Tkinter import Tk
-from tkFileDialog import askopenfilename
- 
-color_tracker_window = "Color Tracker"
-
-filename = strftime("%m_%d_%Y_%H%M") #names the output file as the date and time that the program is run
-filepath = filename + ".txt" #gives the path of the file to be opened
-    
-f = open(filepath, "a+") #opens the output file in append mode
-f.write('Time (s), X Position (pixels), Y Position (pixels)' + '\n') 
-
-
-class ColorTracker:
-    def __init__(self): 
-#         cv.NamedWindow( color_tracker_window, 1 ) 
+#! /usr/bin/env python
+
+###############################################################################
+# PostProcessing_ColorTrack.py
+#
+# Tracks a colored object in a recorded video, saving the time and centroid
+# location of the object in each frame it is found in.
+#
+# To run faster than real time on long recordings:
+#   * The video is split into ranges of frames, which are tracked in
+#     parallel by separate processes
+#   * Once the object is found, only a region of interest around where it
+#     should be in the next frame is blurred and thresholded. The prediction
+#     uses the object's last location and velocity. If the object isn't
+#     found there, or is cut off by the edge of the region, the full frame is
+#     searched.
+#   * The results are collected in arrays and saved once, at the end
+#
+# The output file has the same columns as before. It is named with the date
+# and time the program is run.
+#
+# Modified:
+#   * 10/18/26
+#       - Rewritten for the cv2 API, since the old cv2.cv API was removed
+#       - Track in parallel ranges of frames, within a region of interest
+#       - Save the results at the end, rather than a line at a time
+#
+# TODO:
+#   *
+###############################################################################
+
+import sys
+from multiprocessing import Pool, cpu_count
+from time import strftime
+
+import numpy as np
+import cv2
+
+from video_frame_extractor import frame_ranges
+
+# tracking red
+# OpenCV uses 0-180 as a hue range for the HSV color model
+COLOR_LOWER = (160, 150, 100)
+COLOR_UPPER = (180, 255, 255)
+
+# uncomment below for tracking blue
+# COLOR_LOWER = (112, 50, 50)
+# COLOR_UPPER = (118, 200, 200)
+
+# there can be noise in the video so ignore objects with small areas. This is
+# the zeroth moment of the thresholded image, so it's 255 x the pixel count.
+MIN_AREA = 2500
+
+# The region of interest is this many times the size of the object, plus a
+# margin (pixels) for changes in velocity
+ROI_SCALE = 1.5
+ROI_MARGIN = 20
+
+
+def find_object(image, lower=COLOR_LOWER, upper=COLOR_UPPER, min_area=MIN_AREA, roi=None):
+    """ Finds the centroid of the pixels of the desired color
+
+    Arguments:
+        image : the BGR frame
+        lower, upper : the HSV limits of the color
+        min_area : the smallest zeroth moment that counts as the object
+        roi : (x0, y0, x1, y1) region of the image to search, or None for
+              the full frame
+
+    Returns:
+        x, y, area, bounding box (x, y, width, height), touches_edge. x and y
+        are None if the object isn't found. touches_edge is True if the
+        object reaches the edge of the roi, so may be cut off.
+    """
+    height, width = image.shape[:2]
+    x0, y0, x1, y1 = roi if roi is not None else (0, 0, width, height)
+
+    # Blur the source image to reduce color noise. Include a pixel around
+    # the roi, so the blur matches blurring the full frame.
+    pad_x0, pad_y0 = max(x0 - 1, 0), max(y0 - 1, 0)
+    pad_x1, pad_y1 = min(x1 + 1, width), min(y1 + 1, height)
+    blurred = cv2.blur(image[pad_y0:pad_y1, pad_x0:pad_x1], (3, 3))
+    blurred = blurred[y0 - pad_y0:blurred.shape[0] - (pad_y1 - y1),
+                      x0 - pad_x0:blurred.shape[1] - (pad_x1 - x1)]
+
+    # Convert the image to hsv(Hue, Saturation, Value) so it's easier to
+    # determine the color to track(hue), then limit all pixels that don't
+    # match our criteria
+    hsv = cv2.cvtColor(blurred, cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(hsv, lower, upper)
+
+    # determine the objects moments and check that the area is large enough
+    # to be our object
+    moments = cv2.moments(mask)
+    area = moments['m00']
+
+    if area <= min_area:
+        return None, None, area, None, False
+
+    # determine the x and y coordinates of the center of the object we are
+    # tracking by dividing the 1, 0 and 0, 1 moments by the area
+    x = x0 + moments['m10'] / area
+    y = y0 + moments['m01'] / area
+
+    box_x, box_y, box_width, box_height = cv2.boundingRect(mask)
+    touches_edge = roi is not None and (box_x == 0 or box_y == 0
+                                        or box_x + box_width == x1 - x0
+                                        or box_y + box_height == y1 - y0)
+
+    return x, y, area, (x0 + box_x, y0 + box_y, box_width, box_height), touches_edge
+
+
+def track_range(video_filename, start_frame=0, end_frame=None, use_roi=True):
+    """ Tracks the object in a range of frames of the video
+
+    Returns:
+        a dict of arrays of the frame number, x and y (pixels), and area of
+        each frame the object was found in, and the number of frames
+        processed and searched in full
+    """
+    capture = cv2.VideoCapture(video_filename)
+
+    if start_frame > 0:
+        capture.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    frames, xs, ys, areas = [], [], [], []
+    num_full_searches = 0
+
+    frame_number = start_frame
+    last = None             # (frame number, x, y) of the last detection
+    velocity = (0.0, 0.0)   # pixels/frame
+    size = 0
+
+    while end_frame is None or frame_number < end_frame:
+        success, image = capture.read()
+
+        if not success:
+            break
+
+        x = None
+
+        if use_roi and last is not None:
+            # Search around where the object should be now
+            height, width = image.shape[:2]
+            frames_since = frame_number - last[0]
+            predicted_x = last[1] + velocity[0] * frames_since
+            predicted_y = last[2] + velocity[1] * frames_since
+            half_size = ROI_SCALE * size / 2 + ROI_MARGIN * frames_since
+
+            roi = (int(max(predicted_x - half_size, 0)), int(max(predicted_y - half_size, 0)),
+                   int(min(predicted_x + half_size + 1, width)), int(min(predicted_y + half_size + 1, height)))
+
+            if roi[2] > roi[0] and roi[3] > roi[1]:
+                x, y, area, box, touches_edge = find_object(image, roi=roi)
+                if touches_edge:
+                    x = None
+
+        if x is None:
+            # Lost, or not found yet, so search the full frame
+            num_full_searches += 1
+            x, y, area, box, touches_edge = find_object(image)
+
+        if x is not None:
+            if last is not None:
+                frames_since = frame_number - last[0]
+                velocity = ((x - last[1]) / frames_since, (y - last[2]) / frames_since)
+            last = (frame_number, x, y)
+            size = max(box[2], box[3])
+
+            frames.append(frame_number)
+            xs.append(x)
+            ys.append(y)
+            areas.append(area)
+        elif last is not None and frame_number - last[0] > 10:
+            # Lost for a while, so the prediction is no use anymore
+            last = None
+            velocity = (0.0, 0.0)
+
+        frame_number = frame_number + 1
+
+    capture.release()
+
+    return {'frame': np.array(frames, dtype=int), 'x': np.array(xs), 'y': np.array(ys),
+            'area': np.array(areas), 'processed': frame_number - start_frame,
+            'full_searches': num_full_searches}
+
+
+def _track_range(arguments):
+    return track_range(*arguments)
+
+
+def track_video(video_filename, num_processes=None, min_range_frames=1000, use_roi=True):
+    """ Tracks the object through the video, in parallel ranges of frames
+
+    Returns:
+        a dict of arrays of the time (s), frame number, x and y (pixels), and
+        area of each frame the object was found in, along with the number of
+        frames processed and searched in full
+    """
+    if num_processes is None:
+        num_processes = cpu_count()
+
+    capture = cv2.VideoCapture(video_filename)
+    num_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = capture.get(cv2.CAP_PROP_FPS)
+    capture.release()
+
+    num_ranges = max(min(num_frames // min_range_frames, num_processes), 1)
+    tasks = [(video_filename, start_frame, end_frame, use_roi)
+             for start_frame, end_frame in frame_ranges(num_frames, 1, num_ranges)]
+
+    with Pool(min(num_processes, len(tasks))) as pool:
+        pieces = pool.map(_track_range, tasks, chunksize=1)
+
+    results = {key: np.concatenate([piece[key] for piece in pieces])
+               for key in ('frame', 'x', 'y', 'area')}
+    results['time'] = results['frame'] / fps
+    results['processed'] = sum(piece['processed'] for piece in pieces)
+    results['full_searches'] = sum(piece['full_searches'] for piece in pieces)
+
+    return results
+
+
+def save_results(filepath, results):
+    """ Saves the time and location columns as a comma-separated text file """
+    np.savetxt(filepath, np.column_stack((results['time'], results['x'], results['y'])),
+               fmt=('%s', '%013.9f', '%013.9f'), delimiter=',',
+               header='Time (s), X Position (pixels), Y Position (pixels)', comments='')
+
+
+if __name__ == "__main__":
+    import time
+
+    if len(sys.argv) > 1:
+        video_filename = sys.argv[1]
+    else:
+        from tkinter import Tk
+        from tkinter.filedialog import askopenfilename
 
         Tk().withdraw() # we don't want a full GUI, so keep the root window from appearing
         video_filename = askopenfilename() # show an "Open" dialog box and return the path to the selected file
-        
-        self.capture = cv.CaptureFromFile(video_filename)
-        
-        
-    def run(self): 
-        initialTime = 0. #sets the initial time
-        num_Frames = int(  cv.GetCaptureProperty( self.capture, cv.CV_CAP_PROP_FRAME_COUNT ) )
-        fps = cv.GetCaptureProperty( self.capture, cv.CV_CAP_PROP_FPS )
-        
-        for ii in range(num_Frames-8):
-        
-            print('Frame: ' + str(ii) + ' of ' + str(num_Frames))
-            # read the ii-th frame
-            img = cv.QueryFrame( self.capture )           
-            
-            # Blur the source image to reduce color noise 
-            cv.Smooth(img, img, cv.CV_BLUR, 3); 
-            
-            # Convert the image to hsv(Hue, Saturation, Value) so its  
-            # It's easier to determine the color to track(hue) 
-            hsv_img = cv.CreateImage(cv.GetSize(img), 8, 3) 
-            cv.CvtColor(img, hsv_img, cv.CV_BGR2HSV) 
-            
-            # limit all pixels that don't match our criteria, in the	is case we are  
-            # looking for purple but if you want you can adjust the first value in  
-            # both turples which is the hue range(120,140).  OpenCV uses 0-180 as  
-            # a hue range for the HSV color model 
-            thresholded_img =  cv.CreateImage(cv.GetSize(hsv_img), 8, 1) 
-            
-            # uncomment below for tracking blue
-#             cv.InRangeS(hsv_img, (112, 50, 50), (118, 200, 200), thresholded_img) 
-
-            # tracking red
-            cv.InRangeS(hsv_img, (160, 150, 100), (180, 255, 255), thresholded_img) 
-            
-            #determine the objects moments and check that the area is large  
-            #enough to be our object 
-            thresholded_img2 = cv.GetMat(thresholded_img)
-            moments = cv.Moments(thresholded_img2,0) 
-            area = cv.GetCentralMoment(moments, 0, 0) 
-            
-            # there can be noise in the video so ignore objects with small areas 
-            if(area > 2500): 
-                #determine the x and y coordinates of the center of the object 
-                #we are tracking by dividing the 1, 0 and 0, 1 moments by the area 
-                x = cv.GetSpatialMoment(moments, 1, 0)/area 
-                y = cv.GetSpatialMoment(moments, 0, 1)/area
-
-                elapsedTime = ii/fps
-            
-                f.write(str(elapsedTime) + ',' + '%013.9f' % x + ',' + '%013.9f' % y + "\n") #prints output to the specified output file for later use
-#                 
-#                 x = int(x)
-#                 y = int(y)
-#                 
-#                 #create an overlay to mark the center of the tracked object 
-#                 overlay = cv.CreateImage(cv.GetSize(img), 8, 3) 
-#                 
-#                 cv.Circle(overlay, (x, y), 2, (255, 255, 255), 20) 
-#                 cv.Add(img, overlay, img) 
-#                 #add the thresholded image back to the img so we can see what was  
-#                 #left after it was applied 
-#                 cv.Merge(thresholded_img, None, None, None, img) 
-#              
-#             #display the image  
-#             cv.ShowImage(color_tracker_window, img) 
-            
-        # close the data file
-        f.close()
-
-                
-if __name__=="__main__": 
-    color_tracker = ColorTracker() 
-    color_tracker.run() 
+
+    filename = strftime("%m_%d_%Y_%H%M") #names the output file as the date and time that the program is run
+    filepath = filename + ".txt" #gives the path of the file to be opened
+
+    start_time = time.time()
+    results = track_video(video_filename)
+    save_results(filepath, results)
+
+    print('Tracked {} of {} frames in {:.1f} s, {} full-frame searches'.format(
+          len(results['frame']), results['processed'], time.time() - start_time,
+          results['full_searches']))
+    print('Saved to {}'.format(filepath))
@@ -3,8 +3,11 @@
 ###############################################################################
 # VideoCaptureThreaded.py
 #
-# Threaded video capture. Here, we're only using a single image, rather than a 
-# Queue from the Python queue module. So, we could still end up blocking, etc.
+# Threaded video capture. Here, we're only keeping the latest image, rather than
+# a Queue from the Python queue module. The capture thread reads each frame
+# into one of a small pool of preallocated buffers, so frames are neither
+# allocated nor copied. Readers get a sequence number with each frame, so they
+# can wait for a new one rather than processing the same frame twice.
 #
 # Modified from code at:
 #  https://github.com/gilbertfrancois/video-capture-async
@@ -19,7 +22,13 @@
 #   - http://www.ucs.louisiana.edu/~jev9637
 #
 # Modified:
-#   * 
+#   * 10/18/26
+#       - Capture into a pool of preallocated buffers, with no copy on read
+#       - Added sequence numbers, wait_for_frame(), and swap()
+#       - VideoCaptureTreading.read() still returns a writable copy
+#       - Failed grabs get a sequence number too, so waiting readers return
+#         grabbed=False at the end of a video or when a camera stops
+#       - The frame pinned by read() and wait_for_frame() is kept per thread
 #
 # TODO:
 #   * 
@@ -28,17 +37,50 @@
 import threading
 import time
 import cv2
+import numpy as np
+
+
+class FramePoolCapture:
+    """ Threaded video capture into a preallocated pool of frame buffers
+
+    The capture thread reads each frame directly into a free buffer of the
+    pool, using cap.read(image=buffer), so no frames are allocated or copied
+    after the first. Each grab gets a sequence number, so readers can tell
+    whether they've already seen it. A grab that fails, like at the end of a
+    video file, gets one too, and is returned as grabbed=False with no frame.
 
+    There are two ways to get a frame, neither of which copies it:
+      * read(), wait_for_frame(), or acquire() return a read-only view of a
+        pool buffer. The capture thread won't write into that buffer until it
+        is released. read() and wait_for_frame() release the last frame they
+        returned to a thread on that thread's next call, so keep any results
+        you need before then.
+      * swap(buffer) trades a buffer you own for the latest frame. You then
+        own the frame and can modify it. Your buffer joins the pool.
+    """
 
-class VideoCaptureTreading:
-    def __init__(self, src=0, width=640, height=480):
+    def __init__(self, src=0, width=640, height=480, num_buffers=4):
         self.src = src
         self.cap = cv2.VideoCapture(self.src)
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-        self.grabbed, self.frame = self.cap.read()
+
+        # The first frame sets the size of the buffers
+        grabbed, frame = self.cap.read()
+        if not grabbed:
+            raise IOError('Could not read a frame from {}'.format(src))
+
+        self._buffers = [frame] + [np.empty_like(frame) for _ in range(max(num_buffers, 3) - 1)]
+        self._pins = [0] * len(self._buffers)      # number of readers using each buffer
+        self._sequences = [0] + [-1] * (len(self._buffers) - 1)
+
+        self.grabbed = grabbed      # whether the latest grab got a frame
+        self.sequence = 0           # sequence number of the latest grab
+        self._latest = 0            # buffer holding the latest frame, None if swapped out
+        self._local = threading.local()     # buffer pinned by read() and wait_for_frame()
+
         self.started = False
-        self.read_lock = threading.Lock()
+        self.condition = threading.Condition()
 
     def set(self, var1, var2):
         self.cap.set(var1, var2)
@@ -49,29 +91,206 @@ class VideoCaptureTreading:
             return None
         self.started = True
         self.thread = threading.Thread(target=self.update, args=())
+        self.thread.daemon = True
         self.thread.start()
         return self
 
+    def _free_buffer(self):
+        """ Returns the oldest buffer that isn't the latest frame or in use """
+        free = [index for index, pins in enumerate(self._pins)
+                if pins == 0 and index != self._latest]
+        if not free:
+            return None
+        return min(free, key=lambda index: self._sequences[index])
+
     def update(self):
         while self.started:
-            grabbed, frame = self.cap.read()
-            with self.read_lock:
+            with self.condition:
+                index = self._free_buffer()
+                while index is None and self.started:
+                    # Every buffer is in use, so wait for a reader to release one
+                    self.condition.wait(0.1)
+                    index = self._free_buffer()
+
+            if index is None:
+                break
+
+            # Only this thread writes into a free buffer, so no lock is needed
+            # while the frame is read
+            buffer = self._buffers[index]
+            grabbed, frame = self.cap.read(image=buffer)
+
+            with self.condition:
+                # A failed grab gets a sequence number too, so readers waiting
+                # for a new frame find out
+                self.sequence += 1
+
+                if grabbed:
+                    # Some backends can't read into the buffer we gave them
+                    if frame is not buffer:
+                        self._buffers[index] = frame
+
+                    self._sequences[index] = self.sequence
+                    self._latest = index
+
                 self.grabbed = grabbed
-                self.frame = frame
+                self.condition.notify_all()
+
+            if not grabbed:
+                # Avoid spinning if the camera has stopped delivering frames
+                time.sleep(0.005)
+
+    def _wait(self, after_sequence, timeout):
+        """ Waits for a grab newer than after_sequence, or for any frame in
+        the pool if after_sequence is None. Call with the condition held.
+
+        Returns:
+            True if there is a frame to return, False if the latest grab
+            failed or the wait timed out
+        """
+        def ready():
+            if not self.started:
+                return True
+            if after_sequence is not None and self.sequence <= after_sequence:
+                return False
+
+            # A failed grab is returned right away, with no frame
+            return not self.grabbed or self._latest is not None
+
+        return self.condition.wait_for(ready, timeout) and self.grabbed and self._latest is not None
+
+    def _view(self, index):
+        view = self._buffers[index].view()
+        view.flags.writeable = False
+        return view
+
+    def acquire(self, after_sequence=None, timeout=None):
+        """ Returns a read-only view of the latest frame, pinning its buffer
+
+        Arguments:
+            after_sequence : if given, wait for a frame newer than this one
+            timeout : the maximum time to wait (s)
+
+        Returns:
+            grabbed, frame, sequence, index. Pass index to release_frame()
+            when done with the frame. If the latest grab failed or the wait
+            timed out, grabbed is False and frame and index are None.
+        """
+        with self.condition:
+            if not self._wait(after_sequence, timeout):
+                return False, None, self.sequence, None
+
+            index = self._latest
+            self._pins[index] += 1
+            return self.grabbed, self._view(index), self.sequence, index
+
+    def release_frame(self, index):
+        """ Lets the capture thread reuse the buffer of an acquired frame """
+        if index is None:
+            return
+
+        with self.condition:
+            self._pins[index] -= 1
+            self.condition.notify_all()
 
     def read(self):
-        with self.read_lock:
-            frame = self.frame.copy()
-            grabbed = self.grabbed
-        return grabbed, frame
+        """ Returns grabbed, frame, sequence for the latest frame
+
+        The frame is a read-only view. It stays valid until the next call to
+        read() or wait_for_frame() from the same thread. If the latest grab
+        failed, grabbed is False and the frame is None.
+        """
+        return self.wait_for_frame(None)
+
+    def wait_for_frame(self, last_sequence, timeout=None):
+        """ Like read(), but waits for a frame newer than last_sequence, so
+        the same frame is never processed twice
+
+        If the grab after last_sequence failed, like at the end of a video,
+        or the wait times out, grabbed is False and the frame is None.
+        """
+        grabbed, frame, sequence, index = self.acquire(last_sequence, timeout)
+
+        if index is not None:
+            self.release_frame(getattr(self._local, 'last_read', None))
+            self._local.last_read = index
+
+        return grabbed, frame, sequence
+
+    def swap(self, buffer, after_sequence=None, timeout=None):
+        """ Trades buffer for the latest frame, which the caller then owns
+
+        Arguments:
+            buffer : an array the same shape and type as the frames, like
+                     the frame returned by the last swap(). The caller must
+                     not use it after this call. If None, a new one is
+                     allocated.
+            after_sequence : if given, wait for a frame newer than this one
+            timeout : the maximum time to wait (s)
+
+        Returns:
+            grabbed, frame, sequence. If the latest grab failed or the wait
+            timed out, grabbed is False, frame is None, and the caller keeps
+            buffer.
+        """
+        with self.condition:
+            if not self._wait(after_sequence, timeout):
+                return False, None, self.sequence
+
+            index = self._latest
+
+            if buffer is None:
+                buffer = np.empty_like(self._buffers[index])
+
+            if self._pins[index] > 0:
+                # Readers are using the latest frame, so it can't leave the
+                # pool. This is the only case where a frame is copied.
+                np.copyto(buffer, self._buffers[index])
+                return self.grabbed, buffer, self.sequence
+
+            frame = self._buffers[index]
+            self._buffers[index] = buffer
+            self._sequences[index] = -1
+
+            # The pool no longer holds the latest frame, so other readers wait
+            # for the next one
+            self._latest = None
+            return self.grabbed, frame, self.sequence
 
     def stop(self):
         self.started = False
+        with self.condition:
+            self.condition.notify_all()
         self.thread.join()
 
-    def __exit__(self, exec_type, exc_value, traceback):
+    def release(self):
         self.cap.release()
 
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exec_type, exc_value, traceback):
+        if self.started:
+            self.stop()
+        self.release()
+
+
+class VideoCaptureTreading(FramePoolCapture):
+    """ The original interface, where read() returns only grabbed, frame
+
+    Like before, the frame is a copy, so callers can draw on it. Use the
+    FramePoolCapture methods to get frames without copying them.
+    """
+
+    def read(self):
+        grabbed, frame, _, index = self.acquire()
+
+        if frame is not None:
+            frame = frame.copy()
+        self.release_frame(index)
+
+        return grabbed, frame
+
 
 # Example usage
 if __name__=='__main__':
@@ -86,7 +305,7 @@ if __name__=='__main__':
     # Create the capture instance - this is comparable to cv2.VideoCapture()
     # Comment out and 
     if THREADED:
-        capture = VideoCaptureTreading(CAMERA)
+        capture = FramePoolCapture(CAMERA)
         
         # Now, start the capture
         capture.start()
@@ -98,12 +317,21 @@ if __name__=='__main__':
     capture.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
 
     current_frame = 0
+    sequence = -1
     time_start = time.time()    
     
     try:
         while (current_frame < NUM_FRAMES):
-            frame_grabbed, frame = capture.read()
+            if THREADED:
+                # Wait for a frame we haven't seen yet
+                frame_grabbed, frame, sequence = capture.wait_for_frame(sequence)
+            else:
+                frame_grabbed, frame = capture.read()
             
+            if not frame_grabbed:
+                print('No more frames.')
+                break
+
             frame = cv2.flip(frame, flipCode=0)
             cv2.imshow('Window', frame)
 
@@ -116,8 +344,8 @@ if __name__=='__main__':
             current_frame = current_frame + 1
         
         elapsed_time = time.time() - time_start
-        fps = NUM_FRAMES / elapsed_time
-        print(f'{NUM_FRAMES} frames in {elapsed_time:.4f}s = {fps:.4f}fps')
+        fps = current_frame / elapsed_time
+        print(f'{current_frame} frames in {elapsed_time:.4f}s = {fps:.4f}fps')
 
     finally:
         if THREADED:
@@ -30,7 +30,11 @@
 #   - http://www.ucs.louisiana.edu/~jev9637
 #
 # Modified:
-#   * 
+#   * 10/18/26
+#       - Run the threaded version on the multi-stage pipeline in
+#         vision_pipeline.py, with FramePoolCapture as its source
+#       - Store the data in lists, so capture length isn't limited
+#       - Size the capture's pool from the pipeline's stages
 #
 # TODO:
 #   * 
@@ -38,16 +42,17 @@
 
 # import the necessary packages
 from __future__ import print_function
-from imutils.video import WebcamVideoStream
 from imutils.video import FPS
 import argparse
-import imutils
 import cv2
 
 import numpy as np
 import time
 import matplotlib.pyplot as plt
 
+from VideoCaptureThreaded import FramePoolCapture
+from vision_pipeline import Pipeline, PipelineFrame, Stage, capture_source, pipeline_capacity
+
 # construct the argument parse and parse the arguments
 ap = argparse.ArgumentParser()
 ap.add_argument("-n", "--num-frames", type=int, default=150,
@@ -69,13 +74,54 @@ colorLower = (29, 86, 6)
 colorUpper = (64, 255, 255)
 
 
-# Set up arrays to store the time and centroid location of the blob
-data = np.zeros((args["num_frames"], 3))  # TODO: Make this more robust to indefinite capture
-
+# Set up lists to store the time and centroid location of the blob
+data = []
 
 # We'll process THREADED_MULT x the number of frames we processed unthreaded
 THREADED_MULT = 10
-data_threaded = np.zeros((args["num_frames"] * THREADED_MULT, 3))  # TODO: Make this more robust to indefinite capture
+data_threaded = []
+
+# The number of worker threads for the preprocessing and detection stages
+NUM_WORKERS = 2
+
+
+def preprocess(frame):
+    """ Pipeline stage - Masks the frame for the desired color """
+    # convert the frame to the HSV color space
+    hsv = cv2.cvtColor(frame.image, cv2.COLOR_BGR2HSV)
+
+    # construct a mask for the desired color, then perform
+    # a series of dilations and erosions to remove any small
+    # blobs left in the mask
+    mask = cv2.inRange(hsv, colorLower, colorUpper)
+    mask = cv2.erode(mask, None, iterations=2)
+    frame.mask = cv2.dilate(mask, None, iterations=2)
+
+    return frame
+
+
+def detect(frame):
+    """ Pipeline stage - Finds the largest blob in the mask, if any """
+    frame.ball = None
+
+    # find contours in the mask. The mask isn't used again, so it doesn't
+    # need to be copied first.
+    cnts = cv2.findContours(frame.mask,
+                            cv2.RETR_EXTERNAL,
+                            cv2.CHAIN_APPROX_SIMPLE)[-2]
+
+    # only proceed if at least one contour was found
+    if len(cnts) > 0:
+        c = max(cnts, key=cv2.contourArea)
+        ((x, y), radius) = cv2.minEnclosingCircle(c)
+        M = cv2.moments(c)
+
+        # only proceed if the radius meets a minimum size
+        if radius > 10 and M["m00"] > 0:
+            center = (int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"]))
+            frame.ball = ((int(x), int(y)), int(radius), center)
+
+    return frame
 
 
 
@@ -106,50 +152,20 @@ try:
         # width of 400 pixels
         (grabbed, frame) = stream.read()
 
-        # convert the frame to the HSV color space
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-
-        # construct a mask for the desired color, then perform
-        # a series of dilations and erosions to remove any small
-        # blobs left in the mask
-        mask = cv2.inRange(hsv, colorLower, colorUpper)
-        mask = cv2.erode(mask, None, iterations=2)
-        mask = cv2.dilate(mask, None, iterations=2)
-
-        # Uncomment below to show the masked image
-        # NOTE: This will *dramatically* slow down the processing
-        # cv2.imshow("Frame", mask)
-
-        # find contours in the mask and initialize the current
-        # (x, y) center of the object
-        cnts = cv2.findContours(mask.copy(),
-                                cv2.RETR_EXTERNAL,
-                                cv2.CHAIN_APPROX_SIMPLE)[-2]
-        center = None
-
-
-        # only proceed if at least one contour was found
-        if len(cnts) > 0:
-            # find the largest contour in the mask, then use
-            # it to compute the minimum enclosing circle and
-            # centroid
-            c = max(cnts, key=cv2.contourArea)
-            ((x, y), radius) = cv2.minEnclosingCircle(c)
-            M = cv2.moments(c)
-            center = (int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"]))
+        # mask and find the ball, using the same steps as the pipeline
+        tracked = detect(preprocess(PipelineFrame(count, frame)))
+
+        if tracked.ball is not None:
+            # draw the circle and centroid on the frame,
+            # then update the list of tracked points
+            (x, y), radius, center = tracked.ball
+            cv2.circle(frame, (x, y), radius, (0, 255, 255), 2)
+            cv2.circle(frame, center, 5, (0, 0, 255), -1)
+
+            data.append((total_elapsed_time, center[0], center[1]))
 
-            # only proceed if the radius meets a minimum size
-            if radius > 10:
-                # draw the circle and centroid on the frame,
-                # then update the list of tracked points
-                cv2.circle(frame, (int(x), int(y)), int(radius),
-                    (0, 255, 255), 2)
-                cv2.circle(frame, center, 5, (0, 0, 255), -1)
-            
-                data[count] = np.hstack((total_elapsed_time, np.asarray(center))).reshape(1,3)
-                
-                # Write to a file
-                out.write(frame)
+            # Write to a file
+            out.write(frame)
 
         # check to see if the frame should be displayed to our screen
         if args["display"] > 0:
@@ -181,12 +197,7 @@ except (KeyboardInterrupt):
     # raise
     
 finally:
-    # Now, we can create a mask matching any rows that are all zeros
-    mask = np.all(np.isnan(data), axis=1) | np.all(data == 0, axis=1)
-    
-    # Then, trim the data based on that mask. This way, the data array will 
-    # only have rows that have data in them.
-    data= data[~mask]
+    data = np.array(data).reshape(-1, 3)
     
     # do a bit of cleanup
     stream.release()
@@ -197,96 +208,56 @@ finally:
 
 
 try:
-    # created a *threaded *video stream, allow the camera senor to warmup,
-    # and start the FPS counter
-    print("[INFO] sampling THREADED frames from webcam...")
-    vs = WebcamVideoStream(src=CAMERA_SOURCE).start()
-    fps = FPS().start()
+    # Run the tracking as a pipeline of stages, each with its own threads
+    print("[INFO] sampling frames from webcam through the PIPELINE...")
 
-    out_threaded = cv2.VideoWriter('output_threaded.mp4', FOURCC, 90.0, (frame_width,frame_height))
+    def annotate_and_write(frame):
+        """ Pipeline stage - Draws the ball and writes the frame, in order """
+        if frame.ball is not None:
+            # The pool buffers are read-only, so draw on a copy
+            frame.image = frame.image.copy()
+            (x, y), radius, center = frame.ball
+            cv2.circle(frame.image, (x, y), radius, (0, 255, 255), 2)
+            cv2.circle(frame.image, center, 5, (0, 0, 255), -1)
 
-    # Start a counter variable and save the start times for use in time tracking
-    # of live processing
-    count = 0
-    last_time = time.time()
-    start_time = last_time
-    total_elapsed_time = 0.0
+            data_threaded.append((frame.timestamp - start_time, center[0], center[1]))
 
-    # loop over some frames...this time using the threaded stream
-    while fps._numFrames < args["num_frames"] * THREADED_MULT:
-        # grab the frame from the threaded video stream and resize it
-        # to have a maximum width of 400 pixels
-        frame = vs.read()
-
-        # convert the frame to the HSV color space
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-
-        # construct a mask for the desired color, then perform
-        # a series of dilations and erosions to remove any small
-        # blobs left in the mask
-        mask = cv2.inRange(hsv, colorLower, colorUpper)
-        mask = cv2.erode(mask, None, iterations=2)
-        mask = cv2.dilate(mask, None, iterations=2)
-
-        # Uncomment below to show the masked image
-        # NOTE: This will *dramatically* slow down the processing
-        # cv2.imshow("Frame", mask)
-
-        # find contours in the mask and initialize the current
-        # (x, y) center of the object
-        cnts = cv2.findContours(mask.copy(),
-                                cv2.RETR_EXTERNAL,
-                                cv2.CHAIN_APPROX_SIMPLE)[-2]
-        center = None
-
-
-        # only proceed if at least one contour was found
-        if len(cnts) > 0:
-            # find the largest contour in the mask, then use
-            # it to compute the minimum enclosing circle and
-            # centroid
-            c = max(cnts, key=cv2.contourArea)
-            ((x, y), radius) = cv2.minEnclosingCircle(c)
-            M = cv2.moments(c)
-            center = (int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"]))
+            # Write to a file
+            out_threaded.write(frame.image)
 
-            # only proceed if the radius meets a minimum size
-            if radius > 10:
-                # draw the circle and centroid on the frame,
-                # then update the list of tracked points
-                cv2.circle(frame, (int(x), int(y)), int(radius),
-                    (0, 255, 255), 2)
-                cv2.circle(frame, center, 5, (0, 0, 255), -1)
+        return frame
 
-                data_threaded[count] = np.hstack((total_elapsed_time, np.asarray(center))).reshape(1,3)
+    stages = [Stage('preprocess', preprocess, num_workers=NUM_WORKERS),
+              Stage('detect', detect, num_workers=NUM_WORKERS),
+              Stage('write', annotate_and_write, ordered=True)]
 
-                # Write to a file
-                out_threaded.write(frame)
+    # The pool has to hold every frame the pipeline can, the one being
+    # displayed, the latest frame, and the one the capture thread is filling
+    capture = FramePoolCapture(CAMERA_SOURCE, frame_width, frame_height,
+                               num_buffers=pipeline_capacity(stages, output_size=2) + 3)
+    capture.start()
+
+    out_threaded = cv2.VideoWriter('output_threaded.mp4', FOURCC, 90.0, (frame_width,frame_height))
+    start_time = time.time()
+
+    pipeline = Pipeline(capture_source(capture), stages, output_size=2).start()
+
+    while stages[-1].processed < args["num_frames"] * THREADED_MULT:
+        frame = pipeline.get(timeout=0.1)
+
+        if frame is None:
+            continue
 
         # check to see if the frame should be displayed to our screen
         if args["display"] > 0:
-            cv2.imshow("Frame", frame)
+            cv2.imshow("Frame", frame.image)
             key = cv2.waitKey(1) & 0xFF
-    
-        # Calculate the time elapsed and estimate current fps from it
-        count = count + 1
-        current_time = time.time()
-        elapsed_time = current_time - last_time
-    
-        total_elapsed_time = current_time - start_time
-    
-        last_time = current_time # save current time for next loop
-        fps_estimate = 1 / elapsed_time
-        
 
+        frame.release()
 
-        # update the FPS counter
-        fps.update()
-
-    # stop the timer and display FPS information
-    fps.stop()
-    print("[INFO] elasped time: {:.2f}".format(fps.elapsed()))
-    print("[INFO] approx. FPS: {:.2f}".format(fps.fps()))
+    # display the FPS and timing of each stage
+    print("[INFO] elasped time: {:.2f}".format(time.time() - start_time))
+    print(pipeline.report())
 
 except (KeyboardInterrupt):
     print("\n\nClosing...")
@@ -295,17 +266,14 @@ except (KeyboardInterrupt):
     # raise
     
 finally:
-    # Now, we can create a mask matching any rows that are all zeros
-    mask = np.all(np.isnan(data_threaded), axis=1) | np.all(data_threaded == 0, axis=1)
-    
-    # Then, trim the data based on that mask. This way, the data array will 
-    # only have rows that have data in them.
-    data_threaded = data_threaded[~mask]
-
-    # do a bit of cleanup
+    # do a bit of cleanup. Stop the capture first, so the pipeline's source
+    # stops waiting for frames.
+    capture.stop()
+    pipeline.stop()
     out_threaded.release()
     cv2.destroyAllWindows()
-    vs.stop()
+
+    data_threaded = np.array(data_threaded).reshape(-1, 3)
 
 
 
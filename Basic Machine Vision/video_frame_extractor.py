@@ -0,0 +1,197 @@
+#! /usr/bin/env python
+
+###############################################################################
+# video_frame_extractor.py
+#
+# Saves every Nth frame of videos as images, like for making training sets
+# from hours of footage, in parallel and without decoding more than needed.
+#
+#   * Skipped frames are grabbed, not read. grab() still has to decode them,
+#     but skips converting them to BGR images, which is most of the cost of
+#     read() for high-resolution video.
+#   * If the frames to keep are far apart, seeking to each one can be faster.
+#     The video is moved to the keyframe before the frame, then decoded from
+#     there. It's only faster when there are several keyframes between the
+#     kept frames, so it's optional.
+#   * Long videos are split into ranges of frames, so several processes can
+#     work on one video at once. The ranges start on kept frames, so the
+#     images are the same as processing the whole video at once.
+#   * Images are compressed and written by a pool of threads, while the
+#     video is decoded. cv2.imwrite releases the GIL, so this runs in
+#     parallel.
+#
+# Created: 10/18/26
+#
+# Modified:
+#   *
+#
+# TODO:
+#   *
+###############################################################################
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool, cpu_count
+
+import cv2
+
+
+def _image_filename(output_path, video_file, frame_number, extension):
+    basename = os.path.basename(video_file).split('.')[0]
+    return os.path.join(output_path, '{}_frame{:04d}{}'.format(basename, frame_number, extension))
+
+
+def extract_frames(video_file, output_path, every=30, start_frame=0, end_frame=None,
+                   seek=False, num_writers=2, max_pending=8, extension='.jpg'):
+    """ Saves every Nth frame of a video, or of a range of frames in it
+
+    Arguments:
+        video_file : the video to read
+        output_path : the folder to save the images in
+        every : save every frame that is a multiple of this
+        start_frame, end_frame : the range of frames to process. If end_frame
+                                 is None, the video is read to its end.
+        seek : if True, seek to each saved frame, rather than grabbing the
+               frames between them
+        num_writers : the number of threads writing images
+        max_pending : the most images waiting to be written, to limit memory
+        extension : the image file type
+
+    Returns:
+        the list of image files written
+    """
+    video_capture = cv2.VideoCapture(video_file)
+
+    # Start on the first frame to keep
+    frame_number = -(-start_frame // every) * every
+
+    if frame_number > 0:
+        video_capture.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+
+    filenames = []
+    pending = []
+
+    with ThreadPoolExecutor(max_workers=num_writers) as writers:
+        while end_frame is None or frame_number < end_frame:
+            success, image = video_capture.read()
+
+            if not success:
+                break
+
+            filename = _image_filename(output_path, video_file, frame_number, extension)
+            pending.append(writers.submit(cv2.imwrite, filename, image))
+            filenames.append(filename)
+
+            # Wait for the oldest images, if too many are waiting
+            while len(pending) > max_pending:
+                pending.pop(0).result()
+
+            # Move to the next frame to keep
+            if seek:
+                frame_number = frame_number + every
+                if end_frame is not None and frame_number >= end_frame:
+                    break
+                video_capture.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            else:
+                for skipped in range(every - 1):
+                    if end_frame is not None and frame_number + 1 >= end_frame:
+                        break
+                    if not video_capture.grab():
+                        break
+                    frame_number = frame_number + 1
+
+                frame_number = frame_number + 1
+
+        for future in pending:
+            future.result()
+
+    # When everything done, release the capture
+    video_capture.release()
+
+    return filenames
+
+
+def _extract_range(arguments):
+    video_file, output_path, start_frame, end_frame, options = arguments
+    return extract_frames(video_file, output_path, start_frame=start_frame,
+                          end_frame=end_frame, **options)
+
+
+def frame_ranges(num_frames, every, num_ranges):
+    """ Splits the frames of a video into num_ranges ranges, each starting on
+    a frame that is saved. The last range is open-ended, since the frame
+    count of a video is often approximate.
+
+    Returns:
+        a list of (start_frame, end_frame) tuples
+    """
+    num_kept = -(-num_frames // every)
+    num_ranges = max(min(num_ranges, num_kept), 1)
+
+    starts = [every * ((num_kept * index) // num_ranges) for index in range(num_ranges)]
+    ends = starts[1:] + [None]
+
+    return list(zip(starts, ends))
+
+
+def extract_videos(video_files, output_path, every=30, num_processes=None,
+                   min_range_frames=3000, **options):
+    """ Saves every Nth frame of several videos, in parallel
+
+    Each video is split into ranges of at least min_range_frames frames, and
+    the ranges of all the videos are shared among the processes.
+
+    Arguments:
+        video_files : the list of videos
+        output_path : the folder to save the images in
+        every : save every frame that is a multiple of this
+        num_processes : the number of processes. Defaults to the CPU count.
+        min_range_frames : the shortest range to give to a process
+        options : passed to extract_frames()
+
+    Returns:
+        the list of image files written
+    """
+    if not os.path.exists(output_path):
+        os.makedirs(output_path)
+
+    if num_processes is None:
+        num_processes = cpu_count()
+
+    options['every'] = every
+
+    tasks = []
+    for video_file in video_files:
+        video_capture = cv2.VideoCapture(video_file)
+        num_frames = int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        video_capture.release()
+
+        num_ranges = max(min(num_frames // min_range_frames, num_processes), 1)
+
+        for start_frame, end_frame in frame_ranges(num_frames, every, num_ranges):
+            tasks.append((video_file, output_path, start_frame, end_frame, options))
+
+    with Pool(num_processes) as pool:
+        results = pool.map(_extract_range, tasks, chunksize=1)
+
+    return [filename for filenames in results for filename in filenames]
+
+
+if __name__ == '__main__':
+    import argparse
+    import glob
+    import time
+
+    parser = argparse.ArgumentParser(description='Save every Nth frame of videos as images.')
+    parser.add_argument('video_glob', help='pattern matching the videos, like "videos/*.MOV"')
+    parser.add_argument('output_path', help='the folder to save the images in')
+    parser.add_argument('-n', '--every', type=int, default=30, help='save every Nth frame')
+    parser.add_argument('-p', '--processes', type=int, default=None, help='number of processes')
+    parser.add_argument('-s', '--seek', action='store_true', help='seek to each frame, rather than grabbing')
+    args = parser.parse_args()
+
+    start_time = time.time()
+    filenames = extract_videos(sorted(glob.glob(args.video_glob)), args.output_path,
+                               every=args.every, num_processes=args.processes, seek=args.seek)
+
+    print('Wrote {} images in {:.1f} s'.format(len(filenames), time.time() - start_time))
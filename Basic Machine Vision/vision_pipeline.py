@@ -0,0 +1,460 @@
+#! /usr/bin/env python
+
+###############################################################################
+# vision_pipeline.py
+#
+# A multi-stage, threaded pipeline for processing video frames, like
+#   capture -> preprocess -> detect -> annotate/write
+#
+# Each stage has its own pool of worker threads and a bounded input queue.
+# Most OpenCV functions release the GIL, so the workers of a stage, and the
+# stages themselves, run in parallel on multi-core boards.
+#
+# If a stage can't keep up, its queue fills and the oldest frame waiting in
+# it is dropped. So, the pipeline always works on recent frames, rather than
+# falling further and further behind the camera.
+#
+# A stage with more than one worker can finish frames out of order. A stage
+# marked ordered gets its frames in order, for things like a VideoWriter. It
+# only waits for frames that are still being processed upstream, never for
+# ones that were dropped.
+#
+# Each stage keeps track of its frame rate, processing time, and drops.
+#
+# Created: 10/18/26
+#
+# Modified:
+#   * 10/18/26
+#       - Limit the frames waiting to be put in order at an ordered stage to
+#         its queue_size, dropping the oldest, so it can't grow without bound
+#       - An ordered stage also waits for earlier frames that are on their way
+#         into its queue, which it could otherwise get after later ones
+#       - Running this file checks that an ordered stage gets frames in order
+#       - Added pipeline_capacity(), to size a FramePoolCapture's pool
+#
+# TODO:
+#   *
+###############################################################################
+
+import collections
+import heapq
+import threading
+import time
+
+
+class PipelineFrame:
+    """ A frame moving through the pipeline
+
+    Stages can add any attributes they need, for later stages to use.
+    """
+
+    def __init__(self, sequence, image, timestamp=None, release=None):
+        self.sequence = sequence
+        self.image = image
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self._release = release
+
+    def release(self):
+        """ Releases the frame's image, if its source needs that, like a
+        pinned FramePoolCapture buffer
+        """
+        if self._release is not None:
+            self._release()
+            self._release = None
+
+
+class DropOldestQueue:
+    """ A bounded queue that drops its oldest item, rather than blocking, when
+    a new one is added while it's full
+    """
+
+    def __init__(self, maxsize, on_drop=None):
+        self._items = collections.deque()
+        self.maxsize = maxsize
+        self.on_drop = on_drop
+        self.dropped = 0
+        self.condition = threading.Condition()
+
+    def put(self, item):
+        with self.condition:
+            dropped = None
+            if len(self._items) >= self.maxsize:
+                dropped = self._items.popleft()
+                self.dropped += 1
+
+            self._items.append(item)
+            self.condition.notify()
+
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+
+    def get(self, timeout=None):
+        """ Returns the oldest item, or None if there was none before timeout """
+        with self.condition:
+            if not self.condition.wait_for(lambda: self._items, timeout):
+                return None
+            return self._items.popleft()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class Stage:
+    """ One step of the pipeline """
+
+    def __init__(self, name, function, num_workers=1, queue_size=4, ordered=False):
+        """ Initializing
+
+        Arguments:
+            name : used in the statistics
+            function : called with each PipelineFrame. Returns the frame to
+                       pass it on, or None to drop it.
+            num_workers : the number of threads running function
+            queue_size : the number of frames that can wait for this stage
+            ordered : if True, frames are processed in sequence order. Ordered
+                      stages can only have one worker.
+        """
+        if ordered and num_workers != 1:
+            raise ValueError('An ordered stage can only have one worker.')
+
+        self.name = name
+        self.function = function
+        self.num_workers = num_workers
+        self.queue_size = queue_size
+        self.ordered = ordered
+
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.busy_time = 0.0
+        self.max_time = 0.0
+        self.first_time = None
+        self.last_time = None
+
+    def record(self, start_time, end_time):
+        with self.lock:
+            self.processed += 1
+            self.busy_time += end_time - start_time
+            self.max_time = max(self.max_time, end_time - start_time)
+
+            if self.first_time is None:
+                self.first_time = end_time
+            self.last_time = end_time
+
+
+def pipeline_capacity(stages, output_size=8):
+    """ Returns the most frames a Pipeline of these Stages can hold at once
+
+    That's the frame the source is passing in, the frames waiting in each
+    stage's queue and being processed by its workers, the frames an ordered
+    stage is waiting to put in order, and the output queue. It doesn't
+    include the frames the caller has from get() and hasn't released yet.
+    """
+    capacity = 1 + (output_size if output_size > 0 else 0)
+
+    for stage in stages:
+        capacity += stage.queue_size + stage.num_workers
+
+        if stage.ordered:
+            capacity += stage.queue_size
+
+    return capacity
+
+
+class Pipeline:
+    """ Runs frames from a source through a list of Stages """
+
+    def __init__(self, source, stages, output_size=8):
+        """ Initializing
+
+        Arguments:
+            source : a function returning the next PipelineFrame, or None
+                     when there are no more
+            stages : the list of Stages, in order
+            output_size : the number of processed frames that can wait for
+                          get(). If 0, they are released and discarded.
+        """
+        self.source = source
+        self.stages = stages
+
+        self._queues = [DropOldestQueue(stage.queue_size, self._discard) for stage in stages]
+        self.output = DropOldestQueue(max(output_size, 1), self._discard)
+        self.keep_output = output_size > 0
+        self.output_size = output_size
+
+        # The index of the stage each frame is at, for the ordered stages
+        self._positions = {}
+        self._positions_lock = threading.Condition()
+
+        # The frames that have arrived at each ordered stage, as a heap
+        self._waiting = {index: [] for index, stage in enumerate(stages) if stage.ordered}
+
+        self.running = False
+        self.source_done = False
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self._threads = []
+
+    def start(self):
+        self.running = True
+
+        self._threads.append(threading.Thread(target=self._run_source, name='source'))
+
+        for index, stage in enumerate(self.stages):
+            for worker in range(stage.num_workers):
+                self._threads.append(threading.Thread(target=self._run_stage, args=(index,),
+                                                      name='{}-{}'.format(stage.name, worker)))
+
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+        return self
+
+    def stop(self):
+        self.running = False
+        for thread in self._threads:
+            thread.join()
+
+        # Release anything still waiting
+        for queue in self._queues + [self.output]:
+            while len(queue):
+                self._discard(queue.get(0))
+        for heap in self._waiting.values():
+            while heap:
+                self._discard(heapq.heappop(heap)[1])
+
+    def capacity(self):
+        """ Returns the most frames the pipeline can hold at once """
+        return pipeline_capacity(self.stages, self.output_size)
+
+    def wait_until_done(self, timeout=None):
+        """ Waits for the source to finish and every frame to be processed
+
+        Returns:
+            True if done, False if timed out
+        """
+        with self._positions_lock:
+            return self._positions_lock.wait_for(lambda: self.source_done and not self._positions, timeout)
+
+    def get(self, timeout=None):
+        """ Returns the next processed frame, or None if there was none before
+        timeout. The caller should call its release() when done with it.
+        """
+        return self.output.get(timeout)
+
+    def _set_position(self, frame, index):
+        """ Records the stage a frame is at, or removes it if index is None """
+        with self._positions_lock:
+            if index is None:
+                self._positions.pop(frame.sequence, None)
+            else:
+                self._positions[frame.sequence] = index
+            self._positions_lock.notify_all()
+
+    def _discard(self, frame):
+        self._set_position(frame, None)
+        frame.release()
+
+    def _run_source(self):
+        while self.running:
+            frame = self.source()
+
+            if frame is None:
+                break
+
+            self._set_position(frame, 0)
+            self._queues[0].put(frame)
+
+        self.source_done = True
+        with self._positions_lock:
+            self._positions_lock.notify_all()
+
+    def _next_in_order(self, index):
+        """ Returns the next frame for the ordered stage index, in order, or
+        None if it isn't available yet
+        """
+        heap = self._waiting[index]
+
+        queue = self._queues[index]
+
+        # Move any frames that have arrived into the heap, waiting for one if
+        # there are none. The heap holds at most queue_size frames, dropping
+        # the oldest, like the queue itself.
+        frame = queue.get(0 if heap else 0.05)
+        while frame is not None:
+            heapq.heappush(heap, (frame.sequence, frame))
+
+            if len(heap) > self.stages[index].queue_size:
+                self._discard(heapq.heappop(heap)[1])
+                with queue.condition:
+                    queue.dropped += 1
+
+            frame = queue.get(0)
+
+        if not heap:
+            return None
+
+        lowest = heap[0][0]
+
+        # Wait while an earlier frame is still before this stage, or is at it
+        # but not in the heap yet. Nothing in the heap is earlier than lowest.
+        # A frame's position is set before it is put in the queue, and it can
+        # be put there after the queue was emptied above.
+        with self._positions_lock:
+            earlier = any(sequence < lowest and position <= index
+                          for sequence, position in self._positions.items())
+            if earlier:
+                self._positions_lock.wait(0.05)
+                return None
+
+        return heapq.heappop(heap)[1]
+
+    def _run_stage(self, index):
+        stage = self.stages[index]
+        queue = self._queues[index]
+
+        while self.running:
+            if stage.ordered:
+                frame = self._next_in_order(index)
+            else:
+                frame = queue.get(0.05)
+
+            if frame is None:
+                continue
+
+            start_time = time.time()
+            result = stage.function(frame)
+            end_time = time.time()
+            stage.record(start_time, end_time)
+
+            if result is None:
+                self._discard(frame)
+            elif index + 1 < len(self.stages):
+                self._set_position(result, index + 1)
+                self._queues[index + 1].put(result)
+            else:
+                with stage.lock:
+                    self.latency_sum += end_time - result.timestamp
+                    self.latency_count += 1
+
+                if self.keep_output:
+                    self.output.put(result)
+                    self._set_position(result, None)
+                else:
+                    self._discard(result)
+
+    def statistics(self):
+        """ Returns a dict of statistics for each stage, and for the pipeline """
+        stats = {}
+
+        for stage, queue in zip(self.stages, self._queues):
+            with stage.lock:
+                elapsed = (stage.last_time - stage.first_time) if stage.processed > 1 else 0.0
+                stats[stage.name] = {
+                    'processed': stage.processed,
+                    'dropped': queue.dropped,
+                    'fps': (stage.processed - 1) / elapsed if elapsed > 0 else 0.0,
+                    'mean_time': stage.busy_time / stage.processed if stage.processed else 0.0,
+                    'max_time': stage.max_time}
+
+        stats['pipeline'] = {
+            'mean_latency': self.latency_sum / self.latency_count if self.latency_count else 0.0,
+            'output_dropped': self.output.dropped}
+
+        return stats
+
+    def report(self):
+        """ Returns the statistics as a printable string """
+        lines = []
+        stats = self.statistics()
+
+        for stage in self.stages:
+            values = stats[stage.name]
+            lines.append('{:>12}: {:7.2f} fps, {:7.2f} ms mean, {:7.2f} ms max, '
+                         '{} processed, {} dropped'.format(stage.name, values['fps'],
+                                                           1e3 * values['mean_time'],
+                                                           1e3 * values['max_time'],
+                                                           values['processed'], values['dropped']))
+
+        lines.append('{:>12}: {:7.2f} ms mean latency'.format(
+            'pipeline', 1e3 * stats['pipeline']['mean_latency']))
+
+        return '\n'.join(lines)
+
+
+def capture_source(capture, timeout=1.0):
+    """ Returns a Pipeline source function that reads from a FramePoolCapture
+
+    Each new frame is a read-only view of a pool buffer, which stays pinned
+    until the pipeline is done with the frame. Make the capture's pool larger
+    than the number of frames the pipeline can hold, from pipeline_capacity(),
+    or the capture thread will wait for buffers to be released. It needs two
+    more, for the latest frame and the one being captured.
+
+    The source waits for frames until the capture is stopped, so stop the
+    capture before the pipeline.
+    """
+    last_sequence = [-1]
+
+    def source():
+        while capture.started:
+            grabbed, image, sequence, index = capture.acquire(last_sequence[0], timeout)
+
+            # A failed grab has a sequence number too, so wait for the one
+            # after it
+            last_sequence[0] = sequence
+
+            if index is None:
+                continue
+
+            return PipelineFrame(sequence, image, release=lambda: capture.release_frame(index))
+
+        return None
+
+    return source
+
+
+if __name__ == '__main__':
+    # Checks that an ordered stage gets its frames in order, even from a stage
+    # with several workers that finish them out of order
+    import random
+
+    class DelayedPipeline(Pipeline):
+        """ Widens the gap between a frame being moved to the next stage and
+        it being put in that stage's queue, where frames could get reordered
+        """
+        def _set_position(self, frame, index):
+            Pipeline._set_position(self, frame, index)
+            if index:
+                time.sleep(0.0005)
+
+    num_frames = 2000
+    frames = iter(range(num_frames))
+
+    def source():
+        sequence = next(frames, None)
+        return None if sequence is None else PipelineFrame(sequence, None)
+
+    def work(frame):
+        time.sleep(random.uniform(0, 0.002))
+        return frame
+
+    received = []
+
+    def write(frame):
+        received.append(frame.sequence)
+        return frame
+
+    # Large queues, so no frames are dropped and every one should arrive
+    pipeline = DelayedPipeline(source, [Stage('work', work, num_workers=4, queue_size=num_frames),
+                                        Stage('write', write, ordered=True, queue_size=num_frames)],
+                               output_size=0).start()
+    pipeline.wait_until_done()
+    pipeline.stop()
+
+    out_of_order = sum(later < earlier for earlier, later in zip(received, received[1:]))
+    print('{} of {} frames received, {} out of order'.format(len(received), num_frames, out_of_order))
+    print(pipeline.report())
+
+    if out_of_order:
+        raise SystemExit('The ordered stage received frames out of order.')
@@ -32,6 +32,12 @@
 #   * 09/13/18 - JEV - joshua.vaughan@louisiana.edu
 #       - Added parsing for ARLISS 2018 data log order
 #       - Updates for Folium 0.6
+#   * 10/18/26
+#       - Read only the needed columns of each log, in chunks of rows
+#       - Draw the path as level-of-detail lines, simplified for each zoom range,
+#         from track_rendering.py, rather than a marker for every point
+#       - Limit the number of popup markers, keeping the most significant points
+#       - Process batches of logs in parallel
 #
 ##########################################################################################
 
@@ -41,213 +47,171 @@ import numpy as np
 
 import folium
 import glob
+from multiprocessing import Pool, cpu_count
 import tkinter as tk
 from tkinter.filedialog import askopenfilename, askdirectory
 
-import geographic_calculations as geoCalc
-
-import datetime
+import geodesy
+import track_rendering
 
 
 PRODUCE_FOLIUMMAP = True         # Produce a Folium-based map?
 DRAW_WAYPOINTS = False           # Draw the waypoints?
 BATCH = False                    # Batch processing?
+MAX_MARKERS = 250                # Most points on the path to draw popup markers for
+
+
+# The columns of each type of log, identified by its number of columns, and the popup
+# shown for each marker on its path
+LOG_FORMATS = {
+    14: {'name': '_controlHistory',
+         'columns': {'time': 0, 'imu_heading': 1, 'latitude': 2, 'longitude': 3,
+                     'gps_heading': 4, 'gps_speed': 5, 'waypoint_number': 6,
+                     'waypoint_latitude': 7, 'waypoint_longitude': 8,
+                     'distance_to_waypoint': 9, 'bearing_to_waypoint': 10,
+                     'course_correction': 11},
+         'popup': 'Time: {time:.1f} s -- Lat, Lon: {latitude:4.4f}, {longitude:4.4f} -- Speed: {gps_speed:3.2f} m/s -- Actual Heading: {imu_heading:3.0f} deg -- Desired Heading: {bearing_to_waypoint:3.0f} deg -- Distance to Waypoint: {distance_to_waypoint:.0f} m'},
+
+    19: {'name': '_rawIMUGPS',
+         'columns': {'time': 0, 'imu_heading': 14, 'latitude': 15, 'longitude': 16,
+                     'gps_heading': 17, 'gps_speed': 18},
+         'popup': 'Time: {time:.1f} s -- Lat, Lon: {latitude:4.4f}, {longitude:4.4f} -- Speed: {gps_speed:3.2f} m/s -- IMU Heading: {imu_heading:3.0f} deg -- GPS Heading: {gps_heading:3.0f} deg'},
+
+    # (timestamp, past point, current point, current bearing, desired bearing, angle, target distance)
+    11: {'name': 'pyBoard',
+         'columns': {'hours': 0, 'minutes': 1, 'seconds': 2,
+                     'past_latitude': 3, 'past_longitude': 4,
+                     'latitude': 5, 'longitude': 6,
+                     'current_bearing': 7, 'desired_bearing': 8,
+                     'angle_to_turn': 9, 'target_distance': 10},
+         'popup': 'Time: {hours:02.0f}:{minutes:02.0f}:{seconds:02.0f} -- Lat, Lon: {latitude:4.4f}, {longitude:4.4f} -- Distance to Target: {target_distance:.0f} m -- Actual Bearing: {current_bearing:3.0f} deg -- Desired Heading: {desired_bearing:3.0f} deg -- Course Correction: {angle_to_turn:3.0f}'},
+
+    # Time,Latitude,Longitude,DistanceToTarget,CurrentBearing,DesiredBearing,CourseCorrection
+    7: {'name': 'ARLISS 2018',
+        'columns': {'time': 0, 'latitude': 1, 'longitude': 2, 'target_distance': 3,
+                    'current_bearing': 4, 'desired_bearing': 5, 'angle_to_turn': 6},
+        'popup': 'Time: {time:.1f} s -- Lat, Lon: {latitude:4.4f}, {longitude:4.4f} -- Distance to Target: {target_distance:.0f} m -- Actual Bearing: {current_bearing:3.0f} deg -- Desired Heading: {desired_bearing:3.0f} deg -- Course Correction: {angle_to_turn:3.0f}',
+        'target': np.array([40.8680667, -119.1216167])},
+}
+
+
+def read_log(data_filename):
+    ''' Reads the columns of a log that are needed for its map
+
+    Returns:
+        log_format = the entry of LOG_FORMATS for the log, or None if it isn't known
+        data = dict of an array for each column, for the rows with a position
+    '''
+    log_format = LOG_FORMATS.get(track_rendering.count_columns(data_filename))
+
+    if log_format is None:
+        return None, None
 
+    data = track_rendering.read_columns(data_filename, log_format['columns'])
+
+    if log_format['name'] == 'ARLISS 2018':
+        # Time in the log is in ms
+        data['time'] = (data['time'] - data['time'][0]) / 1000
+
+    # Rows without a fix can't be drawn
+    has_position = ~(np.isnan(data['latitude']) | np.isnan(data['longitude'])
+                     | ((data['latitude'] == 0) & (data['longitude'] == 0)))
+
+    return log_format, {name: values[has_position] for name, values in data.items()}
 
 
 def create_map(data_filename):
     ''' Actually creates the map '''
+    log_format, data = read_log(data_filename)
+
+    if log_format is None or len(data['latitude']) == 0:
+        print('\nImproper data length in file {}.'.format(data_filename))
+        print('Skippping it... \n\n')
+        return None
+
+    latitude = data['latitude']
+    longitude = data['longitude']
+
     waypoints = None
-    target = None
-    
-    # TODO: be more efficient
-    with open(data_filename, 'rb') as data_file:  
-         data = np.genfromtxt(data_file, delimiter=',', skip_header = 1)#, dtype = 'float')
-
-    if np.shape(data)[1] == 14: # _controlHistory... file
-        data_ok = True
-        time = data[:,0]
-        imu_heading = data[:,1]
-        latitude = data[:,2]
-        longitude = data[:,3]
-        gps_heading = data[:,4]
-        gps_speed = data[:,5]
-        waypoint_number = data[:,6]             
-        waypoint_latitude = data[:,7]           
-        waypoint_longitude = data[:,8]          
-        distance_to_waypoint = data[:,9]        
-        bearing_to_waypoint = data[:,10] 
-        course_correction = data[:,11]
-        turn_direction = data[:,12]
-        control_from_PID = data[:,13]
-    
-        _, waypoint_indices = np.unique(waypoint_number, return_index = True)
-    
-        waypoints = np.vstack((waypoint_latitude[waypoint_indices], 
-                               waypoint_longitude[waypoint_indices]))
-                           
+    if 'waypoint_number' in data:
+        _, waypoint_indices = np.unique(data['waypoint_number'], return_index = True)
+
+        waypoints = np.vstack((data['waypoint_latitude'][waypoint_indices],
+                               data['waypoint_longitude'][waypoint_indices]))
+
         waypoints = waypoints.T
 
-    elif np.shape(data)[1] == 19:  # _rawIMUGPS... file
-        data_ok = True
-        time = data[:,0]
-        quart0 = data[:,1]
-        quart1 = data[:,2]
-        quart2 = data[:,3]
-        quart3 = data[:,4]
-        x_accel = data[:,5]
-        y_accel = data[:,6]
-        z_accel = data[:,7]
-        x_mag = data[:,8]
-        y_mag = data[:,9]
-        z_mag = data[:,10]
-        roll = data[:,11]
-        pitch = data[:,12]
-        yad = data[:,13]
-        imu_heading = data[:,14]
-        latitude = data[:,15]
-        longitude = data[:,16]
-        gps_heading = data[:,17]
-        gps_speed = data[:,18]
-    
-        waypoints = None
-    
-    elif np.shape(data)[1] == 11: # pyBoard... file
-        # (timestamp, past point, current point, current bearing, desired bearing, angle, target distance)
-        data_ok = True
-        
-        hours = data[:,0]
-        minutes = data[:,1]
-        seconds = data[:,2]
-        
-        time = []
-        
-        for index, hour in enumerate(hours):
-            time_stamp = datetime.datetime(2015, 9, 16, int(hours[index]), int(minutes[index]), int(seconds[index]))
-            time = np.append(time, time_stamp.strftime('%H:%M:%S'))
-        
-        past_latitude = data[:,3]
-        past_longitude = data[:,4]
-        
-        # current
-        latitude = data[:,5]
-        longitude = data[:,6]
-        
-        current_bearing = data[:,7]
-        desired_bearing = data[:,8]
-        
-        angle_to_turn = data[:,9]
-        
-        target_distance = data[:,10]
-
-    elif np.shape(data)[1] == 7: # ARLISS 2018 Log file
-        # Time,Latitude,Longitude,DistanceToTarget,CurrentBearing,DesiredBearing,CourseCorrection
-        data_ok = True
-        
-        time = (data[:,0] - data[0,0])/1000
-        latitude = data[0:,1]
-        longitude = data[0:,2]
-        target_distance = data[0:,3]
-        current_bearing = data[0:,4]
-        desired_bearing = data[0:,5]
-        angle_to_turn = data[0:,6]
-        
-        target = np.array([40.8680667, -119.1216167])
-        
-        past_latitude = False # Used in a later check for this data
-        
-        waypoints = None
-        
+    # Define the start, target, and midpoint locations
+    if 'past_latitude' in data:
+        start = np.array([data['past_latitude'][0], data['past_longitude'][0]])
     else:
-        data_ok = False
-        print('\nImproper data length in file {}.'.format(data_filename))
-        print('Skippping it... \n\n')
+        start = np.array([latitude[0], longitude[0]])
 
-    if data_ok: # If we have meaningful data, make the map
-        # Define the start, target, and midpoint locations
-        if past_latitude:
-            start = np.array([past_latitude[0], past_longitude[0]])
+    target = log_format.get('target')
+    if target is None:
+        if waypoints is not None:
+            target = waypoints[-1,:]    # last waypoint is the target location
         else:
-            start = np.array([latitude[0], longitude[0]])
+            target = np.array([latitude[-1], longitude[-1]])
 
-        if target is None:
-            if waypoints is not None:
-                target = waypoints[-1,:]    # last waypoint is the target location
-            else:
-                target = np.array([latitude[-1], longitude[-1]])
+    midpoint = geodesy.midpoint(start, target)
 
+    if PRODUCE_FOLIUMMAP:
+        ''' Create a folium map'''
+        # Set up base map, centered on the midpoint between start and finish. The
+        # markers are drawn on a canvas, which is much faster than as separate elements.
+        mymap = folium.Map(location = [midpoint[0], midpoint[1]], zoom_start=14, prefer_canvas=True)
 
-        midpoint = geoCalc.calculate_midpoint(start, target)
+        folium.Marker(location = [start[0], start[1]], 
+                      popup = 'Landing: {:4.4f}, {:4.4f}'.format(start[0], start[1]),
+                      icon=folium.Icon(color = 'green',icon='download')).add_to(mymap)
 
+        folium.Marker(location = [target[0], target[1]], 
+                      popup = 'Target: {:4.4f}, {:4.4f}'.format(target[0], target[1]),
+                      icon=folium.Icon(color = 'red',icon='flag')).add_to(mymap)
 
-        if PRODUCE_FOLIUMMAP:
-            ''' Create a folium map'''
-            # Set up base map, centered on the midpoint between start and finish
-            mymap = folium.Map(location = [midpoint[0], midpoint[1]], zoom_start=14)
-    
-            lat_shaped = latitude.reshape(len(latitude),1)
-            long_shaped = longitude.reshape(len(latitude),1)
-
-            # Draw a green circle with popup information at the start location
-#             folium.CircleMarker(location = [start[0], start[1]], radius = 10, 
-#                                             popup = 'Start -- Lat, Lon: {:4.4f}, {:4.4f}'.format(start[0], start[1]), 
-#                                             color = '#00FF00', 
-#                                             fill_color = '#00FF00').add_to(mymap)
-                                            
-            folium.Marker(location = [start[0], start[1]], 
-                          popup = 'Landing: {:4.4f}, {:4.4f}'.format(start[0], start[1]),
-                          icon=folium.Icon(color = 'green',icon='download')).add_to(mymap)
-            
-            # Draw a red circle with popup information at the target location
-#             folium.CircleMarker(location = [target[0], target[1]], radius = 10, 
-#                                             popup = 'Target -- Lat, Lon: {:4.4f}, {:4.4f}'.format(target[0], target[1]), 
-#                                             color = '#FF0000', 
-#                                             fill_color = '#FF0000').add_to(mymap)
-            
-            folium.Marker(location = [target[0], target[1]], 
-                          popup = 'Target: {:4.4f}, {:4.4f}'.format(target[0], target[1]),
-                          icon=folium.Icon(color = 'red',icon='flag')).add_to(mymap)
-
-            if DRAW_WAYPOINTS:
-                for index, waypoint in enumerate(waypoints):
-                    if index < len(waypoints)-1:
-                        # Draw white circles with popup information at each waypoint
-                        folium.CirleMarker(location = [waypoint[0],waypoint[1]], 
-                                            radius = 8, 
-                                            popup='Waypoint Num: {:.0f} -- Lat, Lon: {:4.4f}, {:4.4f}'.format(index+1, waypoint[0], waypoint[1]), 
-                                            color = '#FFFFFF', 
-                                            fill_color = '#FFFFFF').add_to(mymap)
-
-                #----- Draw the trial on a  map ---------------------------------------------------
-            path = np.hstack((lat_shaped,long_shaped))
-
-            # if path is large, downsample for plotting, plot only ~1000 points
-            if np.shape(path)[0] > 1000:
-                path = path[0::np.shape(path)[0]//1000]
-    
-            # Uncomment below to draw the path line in addition to the data point bubbles above
-            # mymap.line(path, line_color='#FF0000', line_weight=5)
-    
-            # for each point on the path, draw a circle that contains system information
-            #  in a popup when clicked on
-            for index, current_pos in enumerate(path):
-                if index < 51:
-                    folium.CircleMarker(location = [current_pos[0], current_pos[1]], radius = 1, 
-    #                                     popup = 'Time: {} -- Lat, Lon: {:4.4f}, {:4.4f} -- Speed: {:3.2f} m/s -- Actual Heading: {:3.0f} deg -- Desired Heading: {:3.0f} deg -- Distance to Waypoint: {:.0f} m'.format(time[index], latitude[index], longitude[index], gps_speed[index], imu_heading[index], bearing_to_waypoint[index], distance_to_waypoint[index]), 
-                                        popup = 'Time: {} s -- Lat, Lon: {:4.4f}, {:4.4f} -- Distance to Target: {:.0f} m -- Actual Bearing: {:3.0f} deg -- Desired Heading: {:3.0f} deg -- Course Correction: {:3.0f}'.format(time[index], latitude[index], longitude[index], target_distance[index], current_bearing[index], desired_bearing[index], angle_to_turn[index]), 
-                                        color = '#0000FF', fill_color = '#0000FF').add_to(mymap)
-                else:
-                    folium.CircleMarker(location = [current_pos[0], current_pos[1]], radius = 1, 
-    #                                     popup = 'Time: {} -- Lat, Lon: {:4.4f}, {:4.4f} -- Speed: {:3.2f} m/s -- Actual Heading: {:3.0f} deg -- Desired Heading: {:3.0f} deg -- Distance to Waypoint: {:.0f} m'.format(time[index], latitude[index], longitude[index], gps_speed[index], imu_heading[index], bearing_to_waypoint[index], distance_to_waypoint[index]), 
-                                        popup = 'Time: {} s -- Lat, Lon: {:4.4f}, {:4.4f} -- Distance to Target: {:.0f} m -- Actual Bearing: {:3.0f} deg -- Desired Heading: {:3.0f} deg -- Course Correction: {:3.0f}'.format(time[index], latitude[index], longitude[index], target_distance[index], current_bearing[index], desired_bearing[index], angle_to_turn[index]), 
-                                        color = '#FF0000', fill_color = '#FF0000').add_to(mymap)
-
-
-            # define filename - assumes that original datafile was .csv
-            #   TODO: make this more robust
-            map_filename = data_filename.replace('csv', 'html')
-            mymap.save(map_filename)
-        
+        if DRAW_WAYPOINTS and waypoints is not None:
+            for index, waypoint in enumerate(waypoints):
+                if index < len(waypoints)-1:
+                    # Draw white circles with popup information at each waypoint
+                    folium.CircleMarker(location = [waypoint[0],waypoint[1]], 
+                                        radius = 8, 
+                                        popup='Waypoint Num: {:.0f} -- Lat, Lon: {:4.4f}, {:4.4f}'.format(index+1, waypoint[0], waypoint[1]), 
+                                        color = '#FFFFFF', 
+                                        fill_color = '#FFFFFF').add_to(mymap)
+
+        #----- Draw the trial on a  map ---------------------------------------------------
+        # The path is simplified for each range of zoom levels, so its size depends on
+        # the shape of the path, not the length of the log
+        levels, significance = track_rendering.level_of_detail(latitude, longitude)
+        track_rendering.add_track_layers(mymap, latitude, longitude, levels, color='#FF0000')
+
+        # Draw circles that contain system information in a popup when clicked on, at
+        # the most significant points of the path
+        num_markers = min(MAX_MARKERS, len(latitude))
+        marker_indices = np.sort(np.argpartition(-significance, num_markers - 1)[:num_markers])
+
+        for index in marker_indices:
+            values = {name: column[index] for name, column in data.items()}
+            folium.CircleMarker(location = [latitude[index], longitude[index]], radius = 2, 
+                                popup = log_format['popup'].format(**values), 
+                                color = '#0000FF', fill_color = '#0000FF').add_to(mymap)
+
+        # define filename - assumes that original datafile was .csv
+        #   TODO: make this more robust
+        map_filename = data_filename.replace('csv', 'html')
+        mymap.save(map_filename)
+
+        return map_filename
+
+
+def create_maps(data_filenames, num_processes=None):
+    ''' Creates the maps of several logs in parallel '''
+    if num_processes is None:
+        num_processes = cpu_count()
+
+    with Pool(max(min(num_processes, len(data_filenames)), 1)) as pool:
+        return pool.map(create_map, data_filenames, chunksize=1)
 
 
 if __name__ == "__main__":
@@ -258,9 +222,9 @@ if __name__ == "__main__":
     
         filename_pattern = file_path + "/*_controlHistory.csv"
 
-        for data_filename in glob.glob(filename_pattern):
-            print(data_filename)
-            create_map(data_filename)
+        data_filenames = glob.glob(filename_pattern)
+        print('\n'.join(data_filenames))
+        create_maps(data_filenames)
 
     else:
         root = tk.Tk()
@@ -0,0 +1,516 @@
+#! /usr/bin/env python
+
+##########################################################################################
+# geodesy.py
+#
+# Geographic calculations on arrays of positions, for whole logs at once, rather than
+# one pair of positions per call like geographic_calculations.py.
+#
+# Positions are arrays of lat/long pairs in decimal degrees, with shape (N, 2), or (2,)
+# for a single position. The functions broadcast like NumPy, so one position can be
+# compared to many. There are also:
+#   * consecutive_distances() and track_length(), between the points of a track
+#   * distance_matrix(), from every position of one set to every position of another,
+#     computed in blocks of rows so the memory used is bounded
+#   * nearest(), the closest of a set of targets, like waypoints, to each position
+#   * LocalENU, a projection to east/north/up meters around one origin, which is set
+#     up once and reused, like for simplifying or gridding tracks near one site
+#
+# Distances can use one of these methods:
+#   'haversine' - great circle on a sphere. Good to about 0.5%.
+#   'equirectangular' - flat earth approximation. Fastest, and good for points close
+#                       together, like consecutive GPS fixes.
+#   'vincenty' - on the WGS84 ellipsoid. Good to less than a mm, but iterative, so
+#                slower. Nearly antipodal points, where it doesn't converge, use the
+#                haversine distance instead.
+#
+# Created: 10/18/26
+#
+# Modified:
+#   *
+#
+##########################################################################################
+
+from functools import lru_cache
+
+import numpy as np
+
+EARTH_RADIUS = 6371008.8             # Mean radius of the earth (m)
+
+WGS84_A = 6378137.0                  # Semi-major axis (m)
+WGS84_F = 1 / 298.257223563          # Flattening
+WGS84_B = WGS84_A * (1 - WGS84_F)    # Semi-minor axis (m)
+WGS84_E2 = WGS84_F * (2 - WGS84_F)   # First eccentricity squared
+
+
+def _radians(positions):
+    ''' Returns the latitudes and longitudes of an array of positions, in radians '''
+    positions = np.radians(np.asarray(positions, dtype=float))
+    return positions[..., 0], positions[..., 1]
+
+
+def haversine(position1, position2, radius=EARTH_RADIUS):
+    ''' Great circle distance between positions, on a sphere
+
+    Input arguments:
+        position1, position2 = arrays of lat/long pairs in decimal degrees DD.dddddd
+        radius = radius of the sphere in meters
+
+    Returns:
+        distance = distance from each position 1 to position 2 in meters
+    '''
+    lat1, long1 = _radians(position1)
+    lat2, long2 = _radians(position2)
+
+    a = (np.sin((lat2 - lat1) / 2)**2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((long2 - long1) / 2)**2)
+
+    return 2 * radius * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def equirectangular(position1, position2, radius=EARTH_RADIUS):
+    ''' Distance between positions using the flat-earth approximation
+
+    Input arguments:
+        position1, position2 = arrays of lat/long pairs in decimal degrees DD.dddddd
+        radius = radius of the earth in meters
+
+    Returns:
+        distance = distance from each position 1 to position 2 in meters
+    '''
+    lat1, long1 = _radians(position1)
+    lat2, long2 = _radians(position2)
+
+    # Wrap the longitude difference, for positions on each side of 180 deg
+    dLon = (long2 - long1 + np.pi) % (2 * np.pi) - np.pi
+
+    x = dLon * np.cos((lat1 + lat2) / 2)
+    return radius * np.hypot(x, lat2 - lat1)
+
+
+def vincenty(position1, position2, max_iterations=200, tolerance=1e-12):
+    ''' Distance between positions on the WGS84 ellipsoid, by Vincenty's inverse method
+
+    Equations from: http://www.movable-type.co.uk/scripts/latlong-vincenty.html
+
+    Input arguments:
+        position1, position2 = arrays of lat/long pairs in decimal degrees DD.dddddd
+        max_iterations = most iterations for the longitude on the auxiliary sphere
+        tolerance = change in that longitude (rad) that counts as converged
+
+    Returns:
+        distance = distance from each position 1 to position 2 in meters
+    '''
+    lat1, long1 = _radians(position1)
+    lat2, long2 = _radians(position2)
+    lat1, lat2, long1, long2 = np.broadcast_arrays(lat1, lat2, long1, long2)
+
+    L = long2 - long1
+
+    # Reduced latitudes
+    U1 = np.arctan((1 - WGS84_F) * np.tan(lat1))
+    U2 = np.arctan((1 - WGS84_F) * np.tan(lat2))
+    sinU1, cosU1 = np.sin(U1), np.cos(U1)
+    sinU2, cosU2 = np.sin(U2), np.cos(U2)
+
+    lam = L
+    converged = np.zeros(L.shape, dtype=bool)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for iteration in range(max_iterations):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+
+            sin_sigma = np.hypot(cosU2 * sin_lam, cosU1 * sinU2 - sinU1 * cosU2 * cos_lam)
+            cos_sigma = sinU1 * sinU2 + cosU1 * cosU2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+
+            # Coincident points have sin_sigma = 0, and equatorial lines cos2_alpha = 0
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cosU1 * cosU2 * sin_lam / sin_sigma)
+            cos2_alpha = 1 - sin_alpha**2
+            cos_2sigma_m = np.where(cos2_alpha == 0, 0.0,
+                                    cos_sigma - 2 * sinU1 * sinU2 / cos2_alpha)
+
+            C = WGS84_F / 16 * cos2_alpha * (4 + WGS84_F * (4 - 3 * cos2_alpha))
+
+            previous_lam = lam
+            lam = L + (1 - C) * WGS84_F * sin_alpha * (
+                  sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m**2)))
+
+            # Positions that are NaN won't converge, but needn't hold up the rest
+            converged = (np.abs(lam - previous_lam) <= tolerance) | np.isnan(lam)
+            if np.all(converged):
+                break
+
+        u2 = cos2_alpha * (WGS84_A**2 - WGS84_B**2) / WGS84_B**2
+        A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+        B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+
+        delta_sigma = B * sin_sigma * (cos_2sigma_m + B / 4 * (
+                      cos_sigma * (-1 + 2 * cos_2sigma_m**2)
+                      - B / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma**2) * (-3 + 4 * cos_2sigma_m**2)))
+
+        distance = WGS84_B * A * (sigma - delta_sigma)
+
+    if not np.all(converged):
+        # Nearly antipodal points
+        lat1, long1, lat2, long2 = np.degrees((lat1, long1, lat2, long2))
+        spherical = haversine(np.stack((lat1, long1), axis=-1), np.stack((lat2, long2), axis=-1))
+        distance = np.where(converged, distance, spherical)
+
+    return distance
+
+
+METHODS = {'haversine': haversine,
+           'equirectangular': equirectangular,
+           'vincenty': vincenty}
+
+
+def distance(position1, position2, method='haversine'):
+    ''' Distance between positions
+
+    Input arguments:
+        position1, position2 = arrays of lat/long pairs in decimal degrees DD.dddddd.
+                               They broadcast, so one position can be compared to many.
+        method = 'haversine', 'equirectangular', or 'vincenty'
+
+    Returns:
+        distance = distance from each position 1 to position 2 in meters
+    '''
+    try:
+        function = METHODS[method]
+    except KeyError:
+        raise ValueError('method must be one of {}.'.format(', '.join(sorted(METHODS))))
+
+    return function(position1, position2)
+
+
+def bearing(position1, position2):
+    ''' Initial bearing from positions to others
+
+    Equations from: http://www.movable-type.co.uk/scripts/latlong.html
+
+    Input arguments:
+        position1, position2 = arrays of lat/long pairs in decimal degrees DD.dddddd
+
+    Returns:
+        bearing = initial bearing from each position 1 to position 2 in degrees (0-360)
+    '''
+    lat1, long1 = _radians(position1)
+    lat2, long2 = _radians(position2)
+
+    dLon = long2 - long1
+
+    y = np.sin(dLon) * np.cos(lat2)
+    x = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dLon)
+
+    return (np.degrees(np.arctan2(y, x)) + 360) % 360
+
+
+def midpoint(position1, position2):
+    ''' Great circle midpoint between positions
+
+    Input arguments:
+        position1, position2 = arrays of lat/long pairs in decimal degrees DD.dddddd
+
+    Returns:
+        midpoint = array of lat/long pairs in decimal degrees DD.dddddd
+    '''
+    lat1, long1 = _radians(position1)
+    lat2, long2 = _radians(position2)
+
+    dLon = long2 - long1
+
+    Bx = np.cos(lat2) * np.cos(dLon)
+    By = np.cos(lat2) * np.sin(dLon)
+
+    midpoint_lat = np.arctan2(np.sin(lat1) + np.sin(lat2),
+                              np.hypot(np.cos(lat1) + Bx, By))
+    midpoint_long = long1 + np.arctan2(By, np.cos(lat1) + Bx)
+
+    return np.degrees(np.stack((midpoint_lat, midpoint_long), axis=-1))
+
+
+def destination(start_position, bearing, distance, radius=EARTH_RADIUS):
+    ''' Positions reached by traveling along great circles
+
+    Input arguments:
+        start_position = array of lat/long pairs in decimal degrees DD.dddddd
+        bearing = start bearings (deg)
+        distance = how far to go (m)
+        radius = radius of the earth in meters
+
+    Returns:
+        end_position = array of lat/long pairs in decimal degrees DD.dddddd
+    '''
+    start_lat, start_long = _radians(start_position)
+    bearing = np.radians(bearing)
+    angle = np.asarray(distance, dtype=float) / radius
+
+    end_lat = np.arcsin(np.sin(start_lat) * np.cos(angle)
+                        + np.cos(start_lat) * np.sin(angle) * np.cos(bearing))
+
+    end_long = start_long + np.arctan2(np.sin(bearing) * np.sin(angle) * np.cos(start_lat),
+                                       np.cos(angle) - np.sin(start_lat) * np.sin(end_lat))
+
+    # Keep the longitude in -180 to 180 deg
+    end_long = (end_long + np.pi) % (2 * np.pi) - np.pi
+
+    return np.degrees(np.stack((end_lat, end_long), axis=-1))
+
+
+def consecutive_distances(track, method='equirectangular'):
+    ''' Distances between consecutive positions of a track
+
+    Input arguments:
+        track = (N, 2) array of lat/long pairs in decimal degrees DD.dddddd
+        method = the distance method. See distance().
+
+    Returns:
+        distances = the N-1 distances between the positions in meters
+    '''
+    track = np.asarray(track, dtype=float)
+    return distance(track[:-1], track[1:], method)
+
+
+def track_length(track, method='equirectangular'):
+    ''' Length of a track, skipping positions that are NaN
+
+    Input arguments:
+        track = (N, 2) array of lat/long pairs in decimal degrees DD.dddddd
+        method = the distance method. See distance().
+
+    Returns:
+        length = the total distance along the track in meters
+    '''
+    track = np.asarray(track, dtype=float)
+    track = track[~np.any(np.isnan(track), axis=1)]
+
+    return np.sum(consecutive_distances(track, method))
+
+
+def distances_from(origin, positions, method='haversine'):
+    ''' Distances from one position to many
+
+    Input arguments:
+        origin = a lat/long pair in decimal degrees DD.dddddd
+        positions = (N, 2) array of lat/long pairs in decimal degrees DD.dddddd
+        method = the distance method. See distance().
+
+    Returns:
+        distances = the N distances in meters
+    '''
+    return distance(np.asarray(origin, dtype=float)[np.newaxis], positions, method)
+
+
+def distance_matrix(positions1, positions2, method='haversine', block_size=1024):
+    ''' Distances from every position of one set to every position of another
+
+    The rows are computed in blocks of block_size, so the temporary arrays are at most
+    block_size by M, however many positions there are.
+
+    Input arguments:
+        positions1 = (N, 2) array of lat/long pairs in decimal degrees DD.dddddd
+        positions2 = (M, 2) array of lat/long pairs in decimal degrees DD.dddddd
+        method = the distance method. See distance().
+        block_size = the number of rows computed at once
+
+    Returns:
+        distances = (N, M) array of the distances in meters
+    '''
+    positions1 = np.asarray(positions1, dtype=float).reshape(-1, 2)
+    positions2 = np.asarray(positions2, dtype=float).reshape(-1, 2)
+
+    distances = np.empty((len(positions1), len(positions2)))
+
+    for start in range(0, len(positions1), block_size):
+        block = positions1[start:start + block_size, np.newaxis, :]
+        distances[start:start + block_size] = distance(block, positions2[np.newaxis], method)
+
+    return distances
+
+
+def nearest(positions, targets, method='haversine', block_size=1024):
+    ''' The nearest target, like a waypoint, to each position
+
+    Like distance_matrix(), but only the nearest of each row is kept, so the full
+    matrix is never stored.
+
+    Input arguments:
+        positions = (N, 2) array of lat/long pairs in decimal degrees DD.dddddd
+        targets = (M, 2) array of lat/long pairs in decimal degrees DD.dddddd
+        method = the distance method. See distance().
+        block_size = the number of positions compared at once
+
+    Returns:
+        indices = the index of the nearest target to each position
+        distances = the distance to it in meters
+    '''
+    positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+    targets = np.asarray(targets, dtype=float).reshape(-1, 2)
+
+    indices = np.empty(len(positions), dtype=int)
+    distances = np.empty(len(positions))
+
+    for start in range(0, len(positions), block_size):
+        block = distance(positions[start:start + block_size, np.newaxis, :],
+                         targets[np.newaxis], method)
+
+        block_indices = np.argmin(block, axis=1)
+        indices[start:start + block_size] = block_indices
+        distances[start:start + block_size] = block[np.arange(len(block)), block_indices]
+
+    return indices, distances
+
+
+def geodetic_to_ecef(latitude, longitude, altitude=0.0):
+    ''' Converts WGS84 lat/long/altitude to earth-centered, earth-fixed x, y, z (m) '''
+    lat, lon = np.radians(latitude), np.radians(longitude)
+
+    N = WGS84_A / np.sqrt(1 - WGS84_E2 * np.sin(lat)**2)
+
+    x = (N + altitude) * np.cos(lat) * np.cos(lon)
+    y = (N + altitude) * np.cos(lat) * np.sin(lon)
+    z = (N * (1 - WGS84_E2) + altitude) * np.sin(lat)
+
+    return np.stack(np.broadcast_arrays(x, y, z), axis=-1)
+
+
+def ecef_to_geodetic(ecef):
+    ''' Converts earth-centered, earth-fixed x, y, z (m) to WGS84 lat/long/altitude
+
+    Uses Bowring's method, which is good to a mm for positions near the surface.
+
+    Returns:
+        latitude, longitude (deg), and altitude (m)
+    '''
+    x, y, z = ecef[..., 0], ecef[..., 1], ecef[..., 2]
+
+    ep2 = (WGS84_A**2 - WGS84_B**2) / WGS84_B**2
+    p = np.hypot(x, y)
+    theta = np.arctan2(z * WGS84_A, p * WGS84_B)
+
+    lat = np.arctan2(z + ep2 * WGS84_B * np.sin(theta)**3,
+                     p - WGS84_E2 * WGS84_A * np.cos(theta)**3)
+    lon = np.arctan2(y, x)
+
+    N = WGS84_A / np.sqrt(1 - WGS84_E2 * np.sin(lat)**2)
+
+    # Near the poles, the altitude is better found from z
+    with np.errstate(divide='ignore', invalid='ignore'):
+        altitude = np.where(np.abs(np.cos(lat)) > 1e-6,
+                            p / np.cos(lat) - N,
+                            np.abs(z) - WGS84_B)
+
+    return np.degrees(lat), np.degrees(lon), altitude
+
+
+class LocalENU(object):
+    ''' East/north/up coordinates around an origin, on the WGS84 ellipsoid
+
+    The rotation to the local tangent plane is computed once, so converting many
+    positions near the same origin only costs a few array operations.
+    '''
+
+    def __init__(self, origin, origin_altitude=0.0):
+        ''' Initializing
+
+        Input arguments:
+            origin = lat/long pair of the origin in decimal degrees DD.dddddd
+            origin_altitude = altitude of the origin in meters
+        '''
+        self.origin = (float(origin[0]), float(origin[1]))
+        self.origin_altitude = float(origin_altitude)
+
+        self._origin_ecef = geodetic_to_ecef(self.origin[0], self.origin[1], self.origin_altitude)
+
+        lat, lon = np.radians(self.origin)
+
+        # Rows are the east, north, and up directions in ECEF
+        self._rotation = np.array([[-np.sin(lon), np.cos(lon), 0.0],
+                                   [-np.sin(lat) * np.cos(lon), -np.sin(lat) * np.sin(lon), np.cos(lat)],
+                                   [np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)]])
+
+    def to_enu(self, positions, altitudes=0.0):
+        ''' Converts positions to local coordinates
+
+        Input arguments:
+            positions = (N, 2) array of lat/long pairs in decimal degrees DD.dddddd
+            altitudes = altitude of each position in meters
+
+        Returns:
+            enu = (N, 3) array of east, north, and up coordinates in meters
+        '''
+        positions = np.asarray(positions, dtype=float)
+        ecef = geodetic_to_ecef(positions[..., 0], positions[..., 1], altitudes)
+
+        return (ecef - self._origin_ecef) @ self._rotation.T
+
+    def from_enu(self, enu):
+        ''' Converts local coordinates to positions
+
+        Input arguments:
+            enu = (N, 3) array of east, north, and up coordinates in meters, or (N, 2)
+                  east and north coordinates, which are taken to be at the altitude
+                  of the origin
+
+        Returns:
+            positions = (N, 2) array of lat/long pairs in decimal degrees DD.dddddd
+            altitudes = altitude of each position in meters
+        '''
+        enu = np.asarray(enu, dtype=float)
+
+        if enu.shape[-1] == 2:
+            # Drop the points from the tangent plane down to the origin's altitude. The
+            # up coordinate that does this is found in a few iterations.
+            up = np.zeros(enu.shape[:-1])
+            for iteration in range(3):
+                ecef = self._origin_ecef + np.stack((enu[..., 0], enu[..., 1], up), axis=-1) @ self._rotation
+                up = up - (ecef_to_geodetic(ecef)[2] - self.origin_altitude)
+
+            enu = np.stack((enu[..., 0], enu[..., 1], up), axis=-1)
+
+        ecef = self._origin_ecef + enu @ self._rotation
+
+        latitude, longitude, altitude = ecef_to_geodetic(ecef)
+        return np.stack((latitude, longitude), axis=-1), altitude
+
+
+@lru_cache(maxsize=16)
+def _cached_projection(latitude, longitude, altitude):
+    return LocalENU((latitude, longitude), altitude)
+
+
+def local_projection(origin, origin_altitude=0.0):
+    ''' Returns a LocalENU projection for the origin, reusing one made earlier for it
+
+    Input arguments:
+        origin = lat/long pair of the origin in decimal degrees DD.dddddd
+        origin_altitude = altitude of the origin in meters
+    '''
+    return _cached_projection(float(origin[0]), float(origin[1]), float(origin_altitude))
+
+
+if __name__ == '__main__':
+    import time
+
+    # A day of 10 Hz fixes wandering around Lafayette, LA
+    num_points = 864000
+    steps = np.random.randn(num_points, 2) * 1e-5
+    track = np.array([30.2097, -92.0223]) + np.cumsum(steps, axis=0)
+    waypoints = track[::num_points // 50]
+
+    for method in sorted(METHODS):
+        start_time = time.perf_counter()
+        length = track_length(track, method)
+        print('{:16s} track length {:12.1f} m in {:.3f} s'.format(
+              method, length, time.perf_counter() - start_time))
+
+    start_time = time.perf_counter()
+    indices, distances = nearest(track, waypoints)
+    print('Nearest of {} waypoints to {} points in {:.3f} s'.format(
+          len(waypoints), num_points, time.perf_counter() - start_time))
+
+    projection = local_projection(track[0])
+    enu = projection.to_enu(track)
+    positions, altitudes = projection.from_enu(enu[:, :2])
+    print('ENU round trip max. error: {:.2e} deg'.format(np.max(np.abs(positions - track))))
@@ -15,7 +15,9 @@
 #   - http://www.ucs.louisiana.edu/~jev9637
 #
 # Modified:
-#   *
+#   * 10/18/26
+#       - These work on one pair of positions at a time. For arrays of positions, like
+#         whole logs, use geodesy.py.
 #
 #######################################################################################'''
 
@@ -0,0 +1,273 @@
+#! /usr/bin/env python
+
+##########################################################################################
+# track_rendering.py
+#
+# Tools for drawing long GPS logs on Folium maps, so the maps stay small and open
+# quickly in a browser, however many hours the log is.
+#
+#   * Logs are read in chunks of rows, keeping only the columns that are needed, rather
+#     than parsing the whole file into one table of every column
+#   * Tracks are simplified by the Ramer-Douglas-Peucker (RDP) algorithm. Rather than
+#     recursing a segment at a time, every segment at each level of the recursion is
+#     split at once, with array operations. The result is the "significance" of each
+#     point, the largest tolerance that RDP would keep it at, so simplifying to any
+#     tolerance afterward is just a comparison.
+#   * The track is drawn as level-of-detail layers, one for each range of zoom levels,
+#     each simplified to about a pixel at its most zoomed-in level. A short script
+#     shows only the layer for the current zoom. The number of points in each layer is
+#     limited, too.
+#
+# Distances are measured in meters, in a local east/north projection of the track from
+# geodesy.py.
+#
+# Created: 10/18/26
+#
+# Modified:
+#   *
+#
+##########################################################################################
+
+import itertools
+
+import numpy as np
+
+import geodesy
+
+# Meters per pixel at zoom level 0 on the equator, for 256 pixel Web Mercator tiles
+METERS_PER_PIXEL_ZOOM0 = 156543.03392
+
+# The ranges of zoom levels that get their own layer
+ZOOM_LEVELS = ((0, 11), (12, 13), (14, 15), (16, 17), (18, 20))
+
+
+def read_columns(filename, columns, chunk_rows=100000, skip_header=1):
+    ''' Reads some of the columns of a comma-separated log, a chunk of rows at a time
+
+    Input arguments:
+        filename = the log file
+        columns = dict of the names of the columns to keep and their indices
+        chunk_rows = the number of rows parsed at once
+        skip_header = the number of header lines
+
+    Returns:
+        data = dict of an array for each column
+    '''
+    names = list(columns)
+    usecols = [columns[name] for name in names]
+    pieces = []
+
+    with open(filename, 'r') as data_file:
+        for line in itertools.islice(data_file, skip_header):
+            pass
+
+        while True:
+            lines = list(itertools.islice(data_file, chunk_rows))
+            if not lines:
+                break
+
+            try:
+                piece = np.loadtxt(lines, delimiter=',', usecols=usecols, ndmin=2)
+            except ValueError:
+                # Missing values, which genfromtxt makes NaN, but is much slower for
+                piece = np.genfromtxt(lines, delimiter=',', usecols=usecols)
+                piece = piece.reshape(-1, len(usecols))
+
+            pieces.append(piece)
+
+    data = np.concatenate(pieces) if pieces else np.empty((0, len(usecols)))
+    return {name: data[:, index] for index, name in enumerate(names)}
+
+
+def count_columns(filename, skip_header=1):
+    ''' Returns the number of columns in the first row of data of a log '''
+    with open(filename, 'r') as data_file:
+        for line in itertools.islice(data_file, skip_header, None):
+            if line.strip():
+                return len(line.split(','))
+    return 0
+
+
+def _segment_distances(x, y, index, segment, starts, ends):
+    ''' Distance from each point to the segment from its start to end point '''
+    # The segments, then the points relative to their segment's start
+    ax, ay = x[starts], y[starts]
+    abx, aby = x[ends] - ax, y[ends] - ay
+    length2 = abx**2 + aby**2
+
+    abx, aby, length2 = abx[segment], aby[segment], length2[segment]
+    px, py = x[index] - ax[segment], y[index] - ay[segment]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = np.clip((px * abx + py * aby) / length2, 0.0, 1.0)
+
+    # For segments that start and end at the same point, the distance to that point
+    t[length2 == 0] = 0.0
+
+    return np.hypot(px - t * abx, py - t * aby)
+
+
+def rdp_significance(points, min_tolerance=0.0):
+    ''' The largest tolerance that the Ramer-Douglas-Peucker algorithm keeps each point at
+
+    The points kept by RDP with a tolerance are those whose significance is greater
+    than it, so a track can be simplified to many tolerances from one call.
+
+    Input arguments:
+        points = (N, 2) array of points, like east/north positions in meters
+        min_tolerance = the smallest tolerance that will be used. Segments that are
+                        within it of all of their points aren't split any further,
+                        which saves time for densely sampled tracks.
+
+    Returns:
+        significance = the significance of each point. The end points are inf.
+    '''
+    x, y = np.asarray(points, dtype=float).T.copy()
+    num_points = len(x)
+
+    significance = np.zeros(num_points)
+    significance[[0, -1]] = np.inf
+
+    starts = np.array([0])
+    ends = np.array([num_points - 1])
+    limits = np.array([np.inf])
+
+    while True:
+        # Only segments with points between their ends can be split
+        inner = ends - starts > 1
+        starts, ends, limits = starts[inner], ends[inner], limits[inner]
+
+        if len(starts) == 0:
+            break
+
+        # The index of every point between the ends of each segment, and its segment
+        counts = ends - starts - 1
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        segment = np.repeat(np.arange(len(starts)), counts)
+        index = starts[segment] + 1 + np.arange(len(segment)) - offsets[segment]
+
+        distances = _segment_distances(x, y, index, segment, starts, ends)
+
+        # Split each segment at its farthest point, the first one if there's a tie
+        farthest = np.maximum.reduceat(distances, offsets)
+
+        if min_tolerance > 0:
+            # The points of these segments will never be kept, so leave them at 0
+            split = farthest > min_tolerance
+            keep_points = split[segment]
+
+            starts, ends, limits, farthest = starts[split], ends[split], limits[split], farthest[split]
+            segment = np.cumsum(split)[segment[keep_points]] - 1
+            index, distances = index[keep_points], distances[keep_points]
+
+        is_farthest = np.flatnonzero(distances == farthest[segment])
+        first = is_farthest[np.unique(segment[is_farthest], return_index=True)[1]]
+        splits = index[first]
+
+        # A point can't be more significant than the split that made its segment
+        limits = np.minimum(farthest, limits)
+        significance[splits] = limits
+
+        starts, ends = np.concatenate((starts, splits)), np.concatenate((splits, ends))
+        limits = np.concatenate((limits, limits))
+
+    return significance
+
+
+def zoom_tolerance(zoom, latitude, pixels=1.0):
+    ''' The size of some pixels at a zoom level and latitude, in meters '''
+    return pixels * METERS_PER_PIXEL_ZOOM0 * np.cos(np.radians(latitude)) / 2**zoom
+
+
+def level_of_detail(latitude, longitude, zoom_levels=ZOOM_LEVELS, pixels=1.0, max_points=5000):
+    ''' Simplifies a track for each range of zoom levels
+
+    Input arguments:
+        latitude, longitude = arrays of the track positions in decimal degrees DD.dddddd
+        zoom_levels = the (min zoom, max zoom) ranges to simplify for
+        pixels = the tolerance, in pixels at the max zoom of each range
+        max_points = the most points to keep in any range. The tolerance is raised if
+                     needed to keep fewer.
+
+    Returns:
+        levels = list of (min zoom, max zoom, indices of the points to keep)
+        significance = the RDP significance of each point in meters
+    '''
+    track = np.column_stack((latitude, longitude))
+
+    projection = geodesy.local_projection(track[0])
+    mean_latitude = np.mean(latitude)
+
+    min_tolerance = min(zoom_tolerance(max_zoom, mean_latitude, pixels) for _, max_zoom in zoom_levels)
+    significance = rdp_significance(projection.to_enu(track)[:, :2], min_tolerance)
+
+    # The max_points largest significances, largest first
+    num_kept = min(max_points, len(significance))
+    largest = -np.sort(-np.partition(significance, -num_kept)[-num_kept:])
+
+    levels = []
+    for min_zoom, max_zoom in zoom_levels:
+        tolerance = zoom_tolerance(max_zoom, mean_latitude, pixels)
+
+        if np.count_nonzero(significance > tolerance) > max_points:
+            tolerance = largest[-1]
+
+        levels.append((min_zoom, max_zoom, np.flatnonzero(significance > tolerance)))
+
+    return levels, significance
+
+
+def add_track_layers(folium_map, latitude, longitude, levels, color='#FF0000', weight=3):
+    ''' Adds the levels of detail of a track to a Folium map, as polylines that are
+    shown only at their zoom levels
+
+    Input arguments:
+        folium_map = the folium.Map
+        latitude, longitude = arrays of the track positions in decimal degrees DD.dddddd
+        levels = the levels from level_of_detail()
+        color, weight = the color and width of the line
+    '''
+    import folium
+    from branca.element import MacroElement, Template
+
+    layers = []
+    for min_zoom, max_zoom, indices in levels:
+        layer = folium.FeatureGroup(name='Track, zoom {}-{}'.format(min_zoom, max_zoom),
+                                    control=False, show=False)
+
+        path = np.column_stack((latitude[indices], longitude[indices])).round(7).tolist()
+        folium.PolyLine(path, color=color, weight=weight).add_to(layer)
+
+        layer.add_to(folium_map)
+        layers.append((min_zoom, max_zoom, layer))
+
+    switcher = MacroElement()
+    switcher._name = 'LevelOfDetail'
+    switcher.levels = layers
+    switcher._template = Template('''
+        {% macro script(this, kwargs) %}
+        (function() {
+            var map = {{ this._parent.get_name() }};
+            var levels = [{% for min_zoom, max_zoom, layer in this.levels %}
+                [{{ min_zoom }}, {{ max_zoom }}, {{ layer.get_name() }}],{% endfor %}
+            ];
+
+            function showLevel() {
+                var zoom = map.getZoom();
+                levels.forEach(function(level) {
+                    var visible = (zoom >= level[0] && zoom <= level[1]);
+                    if (visible && !map.hasLayer(level[2])) {
+                        map.addLayer(level[2]);
+                    } else if (!visible && map.hasLayer(level[2])) {
+                        map.removeLayer(level[2]);
+                    }
+                });
+            }
+
+            map.on('zoomend', showLevel);
+            showLevel();
+        })();
+        {% endmacro %}
+        ''')
+
+    folium_map.add_child(switcher)
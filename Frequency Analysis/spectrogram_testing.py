@@ -16,7 +16,9 @@
 #   - http://www.ucs.louisiana.edu/~jev9637
 #
 # Modified:
-#   * 
+#   * 10/18/26
+#       - Replace the hand-rolled spectrogram with StreamingSTFT, fed the
+#         signal in chunks like it would arrive from a sensor
 #
 # TODO:
 #   * 
@@ -27,6 +29,8 @@ import matplotlib.pyplot as plt
 from numpy.fft import rfft, rfftfreq
 from scipy import signal
 
+from streaming_stft import StreamingSTFT
+
 # Set up the test data
 dt = 0.01                       # Sample time (s)
 t = np.arange(0, 10 + dt, dt)
@@ -186,25 +190,26 @@ plt.tight_layout(pad=0.5)
 # plt.show()
 
 
-# Finally, let's see if we can roll our own, which could be used for streaming
+# Finally, let's use our own, which can be used for streaming. The signal is
+# passed in chunks, like it would arrive from a sensor. It uses the same
+# window and overlap as the SciPy spectrogram.
 OVERLAP = SEG_LENGTH // 8 
-window_start_indices = np.arange(0, num_samples, SEG_LENGTH-OVERLAP)
-
-# Don't allow the final window to be smaller than the SEG_LENGTH
-window_start_indices = window_start_indices[window_start_indices + SEG_LENGTH < len(t)]
+CHUNK_LENGTH = 10               # Number of samples that arrive at once
 
-spect_freq = rfftfreq(SEG_LENGTH, dt)
+stft = StreamingSTFT(SEG_LENGTH, dt, overlap=OVERLAP, window=('tukey', 0.25), scaling='dB')
 
-spect_times = t[np.arange(SEG_LENGTH // 2, num_samples, SEG_LENGTH-OVERLAP)]
+spect_freq = stft.frequencies
+spect_times = []
+spect_mags = []
 
-# Don't allow the final window to be smaller than the SEG_LENGTH
-spect_times = spect_times[:len(window_start_indices)]
+for start_index in range(0, num_samples, CHUNK_LENGTH):
+    new_times, new_mags = stft.update(data[start_index:start_index + CHUNK_LENGTH])
 
-spect_mags = np.zeros((len(spec_freq), len(spect_times)))
+    spect_times.append(new_times)
+    spect_mags.append(new_mags)
 
-for index, start_index in enumerate(window_start_indices):
-    spect_mags[:, index] =  10 * np.log10(np.abs(rfft(data[start_index:start_index + SEG_LENGTH]))**2)
-    
+spect_times = t[0] + np.concatenate(spect_times)
+spect_mags = np.concatenate(spect_mags, axis=1)
 
 # Set the plot size - 3x2 aspect ratio is best
 fig = plt.figure(figsize=(6,4))
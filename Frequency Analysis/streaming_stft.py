@@ -0,0 +1,175 @@
+#! /usr/bin/env python
+
+###############################################################################
+# streaming_stft.py
+#
+# A short-time Fourier transform (STFT) that accepts samples as they arrive,
+# like from an IMU, rather than needing the whole signal at once. Each call to
+# update() returns the spectrogram columns for the segments completed by the
+# new samples.
+#
+# The samples that will be part of later segments, because of the overlap,
+# are kept in a buffer between updates. All of the new segments are
+# transformed with one rfft call, on a strided view of the samples, so there
+# is no Python loop over the segments and the segments aren't copied before
+# windowing. The window is computed once.
+#
+# Several channels, like the 3 axes of an accelerometer, can be processed
+# together by passing samples with shape (num_samples, num_channels).
+#
+# Created: 10/18/26
+#
+# Modified:
+#   *
+#
+# TODO:
+#   *
+###############################################################################
+
+import numpy as np
+from numpy.fft import rfft, rfftfreq
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import signal
+
+
+class StreamingSTFT(object):
+    """ Short-time Fourier transform of a signal that arrives in chunks """
+
+    def __init__(self, segment_length, sample_time, overlap=None, window='hann',
+                 scaling='magnitude', history_length=None):
+        """ Initializing
+
+        Arguments:
+            segment_length : number of samples per segment
+            sample_time : time between samples (s)
+            overlap : number of samples shared by neighboring segments.
+                      Defaults to 1/8 of segment_length, like scipy.
+            window : the window, as a name or tuple for scipy.signal.get_window,
+                     or None for no window
+            scaling : 'magnitude' for the amplitude of each frequency, like
+                      CRAWLAB_fft, or 'dB' for 10 log10 of the power
+            history_length : if given, keep this many of the latest columns,
+                             for plotting a live spectrogram
+        """
+        if overlap is None:
+            overlap = segment_length // 8
+
+        if not 0 <= overlap < segment_length:
+            raise ValueError('overlap must be at least 0 and less than segment_length.')
+
+        if scaling not in ('magnitude', 'dB'):
+            raise ValueError("scaling must be 'magnitude' or 'dB'.")
+
+        self.segment_length = segment_length
+        self.sample_time = sample_time
+        self.overlap = overlap
+        self.step = segment_length - overlap
+        self.scaling = scaling
+
+        if window is None:
+            self.window = np.ones(segment_length)
+        else:
+            self.window = signal.get_window(window, segment_length)
+
+        # Scales the rfft to the amplitude of each frequency
+        self._amplitude_scale = 2.0 / np.sum(self.window)
+
+        self.frequencies = rfftfreq(segment_length, sample_time)
+
+        self._buffer = None
+        self._buffer_start = 0   # sample number of the first sample in the buffer
+        self.num_columns = 0
+
+        self.history_length = history_length
+        self._history = None
+        self._history_times = None
+
+    def update(self, samples):
+        """ Adds new samples, returning the spectrogram of any segments they
+        complete
+
+        Arguments:
+            samples : array of new samples, with shape (num_samples,) or
+                      (num_samples, num_channels)
+
+        Returns:
+            times : the time at the center of each new segment (s)
+            columns : the spectrogram of the new segments. Its shape is
+                      (num_frequencies, num_segments), or (num_channels,
+                      num_frequencies, num_segments) for several channels.
+        """
+        samples = np.asarray(samples, dtype=float)
+
+        if self._buffer is None:
+            data = samples
+        else:
+            data = np.concatenate((self._buffer, samples), axis=0)
+
+        num_segments = 0
+        if len(data) >= self.segment_length:
+            num_segments = (len(data) - self.segment_length) // self.step + 1
+
+        if num_segments == 0:
+            self._buffer = data
+            return np.empty(0), np.empty(samples.shape[1:] + (len(self.frequencies), 0))
+
+        # A view of every segment, one per row, without copying
+        segments = sliding_window_view(data, self.segment_length, axis=0)[::self.step][:num_segments]
+
+        # For several channels, the view is (segments, channels, samples)
+        spectrum = rfft(segments * self.window, axis=-1)
+
+        if self.scaling == 'magnitude':
+            columns = self._amplitude_scale * np.abs(spectrum)
+        else:
+            with np.errstate(divide='ignore'):
+                columns = 10 * np.log10(np.abs(spectrum)**2)
+
+        # Put the segments in the last axis, so each is a column
+        columns = np.moveaxis(columns, 0, -1)
+
+        starts = self._buffer_start + self.step * np.arange(num_segments)
+        times = (starts + self.segment_length / 2) * self.sample_time
+
+        # Keep the samples that later segments will need
+        consumed = num_segments * self.step
+        self._buffer = data[consumed:].copy()
+        self._buffer_start += consumed
+        self.num_columns += num_segments
+
+        if self.history_length is not None:
+            self._add_to_history(times, columns)
+
+        return times, columns
+
+    def _add_to_history(self, times, columns):
+        if self._history is None:
+            self._history = np.full(columns.shape[:-1] + (self.history_length,), np.nan)
+            self._history_times = np.full(self.history_length, np.nan)
+
+        # Only the latest history_length columns can fit
+        times = times[-self.history_length:]
+        columns = columns[..., -self.history_length:]
+
+        # The history is a ring buffer, so the new columns may wrap around
+        indices = (self.num_columns - len(times) + np.arange(len(times))) % self.history_length
+        self._history[..., indices] = columns
+        self._history_times[indices] = times
+
+    def history(self):
+        """ Returns the times and columns of the latest history_length
+        segments, oldest first. Columns not filled yet are NaN.
+        """
+        if self._history is None:
+            return None, None
+
+        order = np.roll(np.arange(self.history_length), -(self.num_columns % self.history_length))
+        return self._history_times[order], self._history[..., order]
+
+    def reset(self):
+        """ Clears the buffer and history, to start a new signal """
+        self._buffer = None
+        self._buffer_start = 0
+        self.num_columns = 0
+        self._history = None
+        self._history_times = None
@@ -0,0 +1,312 @@
+#! /usr/bin/env python
+
+###############################################################################
+# gps_reader.py
+#
+# An event-driven reader for a GPS on a serial port. Rather than polling the
+# port for sentences, the reader sleeps until the operating system says
+# there are bytes to read, reads all of them, and feeds them to the
+# MicropyGPS sentence parsers. So, it uses almost no CPU between sentences.
+#
+# The sentences of each epoch of the receiver are fused into one fix, like
+# nmea_replay.py does for logs. A fix is published as soon as the RMC and
+# GGA sentences of its epoch are in:
+#   * to an optional callback
+#   * to an asyncio.Queue, when run on an asyncio event loop
+#   * as latest_fix, an immutable named tuple that is replaced, not changed,
+#     for each fix. Control loops can read it at any time, from any thread,
+#     without a lock.
+#
+# The reader can run in its own thread, waiting with a selector, or on an
+# asyncio event loop. The CPU time it uses is kept in cpu_time, so it can be
+# compared to polling. Run this file with an NMEA log to compare them.
+#
+# It works with anything that has a file descriptor on a POSIX system, like
+# a pyserial Serial, a pseudo-terminal, or a socket from gpsd's NMEA output.
+#
+# Created: 10/18/26
+#
+# Modified:
+#   *
+#
+# TODO:
+#   *
+###############################################################################
+
+import collections
+import os
+import selectors
+import sys
+import threading
+import time
+
+from nmea_replay import COLUMNS, EpochCollector
+
+# The parser is in the micropyGPS folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'micropyGPS'))
+from micropyGPS import MicropyGPS
+
+# mode is the GGA fix quality (0 = none, 1 = GPS, 2 = DGPS), and received
+# is the time.monotonic() time the fix was completed
+Fix = collections.namedtuple('Fix', COLUMNS + ('mode', 'received'))
+
+
+class GPSReader(object):
+    """ Reads and parses a GPS's sentences as they arrive """
+
+    def __init__(self, port, baud=9600, on_fix=None, complete_after=('GPRMC', 'GPGGA'),
+                 read_size=4096):
+        """ Initializing
+
+        Arguments:
+            port : the serial port name, like '/dev/ttyUSB0', or an open
+                   object with a fileno(), like a serial.Serial
+            baud : the baud rate, if port is a name
+            on_fix : if given, called with each Fix, from the thread or event
+                     loop the reader runs on. It should return quickly.
+            complete_after : the sentences that complete a fix
+            read_size : the most bytes to read at once
+        """
+        if isinstance(port, str):
+            import serial
+            port = serial.Serial(port, baud, timeout=0)
+
+        self.port = port
+        self.on_fix = on_fix
+        self.read_size = read_size
+
+        self._fd = port if isinstance(port, int) else port.fileno()
+        os.set_blocking(self._fd, False)
+
+        self.gps = MicropyGPS()
+        self._collector = EpochCollector(on_fix=self._publish, complete_after=complete_after)
+        self._partial = b''
+
+        self.latest_fix = None
+        self.num_fixes = 0
+        self.bytes_read = 0
+        self.wakeups = 0
+        self.parse_errors = 0
+        self.cpu_time = 0.0
+
+        self.queue = None
+        self._loop = None
+
+        self._thread = None
+        self._wake_read, self._wake_write = None, None
+        self.running = False
+
+    def fileno(self):
+        return self._fd
+
+    def _publish(self, values):
+        fix = Fix(*values, mode=self.gps.fix_stat, received=time.monotonic())
+
+        # Replacing the reference is atomic, so readers see the old fix or
+        # the new one, never a mix
+        self.latest_fix = fix
+        self.num_fixes += 1
+
+        if self.on_fix is not None:
+            self.on_fix(fix)
+
+        if self.queue is not None:
+            # Keep the newest fixes, if the consumer falls behind
+            if self.queue.full():
+                self.queue.get_nowait()
+            self.queue.put_nowait(fix)
+
+    def feed(self, data):
+        """ Parses bytes from the GPS, publishing the fixes they complete """
+        lines = (self._partial + data).split(b'\n')
+        self._partial = lines.pop()
+
+        # A line at a time, so each sentence's values can be collected
+        for line in lines:
+            try:
+                parsed = self.gps.update_bytes(line + b'\n')
+            except (IndexError, ValueError):
+                # A sentence with a valid CRC, but missing fields
+                self.parse_errors += 1
+                continue
+
+            for sentence in parsed:
+                self._collector.add(self.gps, sentence)
+
+    def read_available(self):
+        """ Reads and parses all of the bytes waiting on the port
+
+        Returns:
+            False if the port was closed, otherwise True
+        """
+        start_time = time.thread_time()
+        self.wakeups += 1
+        is_open = True
+
+        while True:
+            try:
+                data = os.read(self._fd, self.read_size)
+            except BlockingIOError:
+                break
+            except OSError:
+                # Like a pseudo-terminal whose other end was closed
+                is_open = False
+                break
+
+            if not data:
+                is_open = False
+                break
+
+            self.bytes_read += len(data)
+            self.feed(data)
+
+            if len(data) < self.read_size:
+                break
+
+        self.cpu_time += time.thread_time() - start_time
+        return is_open
+
+    def run(self):
+        """ Reads the port until stop() is called or the port is closed """
+        with selectors.DefaultSelector() as selector:
+            selector.register(self._fd, selectors.EVENT_READ)
+            selector.register(self._wake_read, selectors.EVENT_READ)
+
+            while self.running:
+                for key, events in selector.select():
+                    if key.fd == self._wake_read:
+                        self.running = False
+                    elif not self.read_available():
+                        self.running = False
+
+    def start(self):
+        """ Starts reading in a thread """
+        self._wake_read, self._wake_write = os.pipe()
+        self.running = True
+
+        self._thread = threading.Thread(target=self.run, name='GPS Reader', daemon=True)
+        self._thread.start()
+        return self
+
+    def attach(self, loop=None, queue_size=16):
+        """ Starts reading on an asyncio event loop
+
+        Returns:
+            an asyncio.Queue that each Fix is put in
+        """
+        import asyncio
+
+        self._loop = loop if loop is not None else asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.running = True
+
+        def on_readable():
+            if not self.read_available():
+                self.detach()
+
+        self._loop.add_reader(self._fd, on_readable)
+        return self.queue
+
+    def detach(self):
+        """ Stops reading on the asyncio event loop """
+        if self._loop is not None:
+            self._loop.remove_reader(self._fd)
+            self._loop = None
+        self.running = False
+
+    def stop(self):
+        """ Stops reading, and waits for the thread to finish """
+        self.detach()
+
+        if self._thread is not None:
+            os.write(self._wake_write, b'x')
+            self._thread.join()
+            self._thread = None
+
+            os.close(self._wake_read)
+            os.close(self._wake_write)
+
+    def close(self):
+        """ Stops reading and closes the port """
+        self.stop()
+
+        if isinstance(self.port, int):
+            os.close(self.port)
+        else:
+            self.port.close()
+
+
+def _poll(fd, duration, read_size=4096):
+    """ Reads the port by polling for bytes, like the old GPS_reader did, to
+    compare CPU time
+    """
+    gps = MicropyGPS()
+    end_time = time.monotonic() + duration
+    start_time = time.thread_time()
+
+    while time.monotonic() < end_time:
+        try:
+            data = os.read(fd, read_size)
+        except BlockingIOError:
+            continue
+        except OSError:
+            break
+        if not data:
+            break
+        try:
+            gps.update_bytes(data)
+        except (IndexError, ValueError):
+            pass
+
+    return time.thread_time() - start_time
+
+
+if __name__ == '__main__':
+    import argparse
+    import pty
+    import tty
+
+    parser = argparse.ArgumentParser(
+        description='Compare the CPU time of reading a GPS by events and by polling, '
+                    'by replaying an NMEA log through a pseudo-terminal.')
+    parser.add_argument('log', help='the NMEA log to replay')
+    parser.add_argument('-r', '--rate', type=float, default=10.0, help='epochs per second')
+    parser.add_argument('-d', '--duration', type=float, default=5.0, help='seconds to run each')
+    args = parser.parse_args()
+
+    with open(args.log, 'rb') as log_file:
+        epochs = log_file.read().replace(b'\r\n', b'\n').split(b'$GPRMC')
+    epochs = [b'$GPRMC' + epoch.replace(b'\n', b'\r\n') for epoch in epochs[1:]]
+
+    def replay(fd, stop):
+        """ Writes an epoch of the log at a time, like a receiver would """
+        index = 0
+        while not stop.is_set():
+            os.write(fd, epochs[index % len(epochs)])
+            index = index + 1
+            time.sleep(1.0 / args.rate)
+
+    for method in ('events', 'polling'):
+        controller, device = pty.openpty()
+        tty.setraw(device)
+        tty_stop = threading.Event()
+        writer = threading.Thread(target=replay, args=(controller, tty_stop), daemon=True)
+        writer.start()
+
+        if method == 'events':
+            reader = GPSReader(device).start()
+            time.sleep(args.duration)
+            reader.stop()
+            cpu_time = reader.cpu_time
+            print('Events:  {} fixes, latest {}'.format(reader.num_fixes, reader.latest_fix))
+        else:
+            os.set_blocking(device, False)
+            cpu_time = _poll(device, args.duration)
+
+        print('{:8s} {:.3f} s of CPU time in {:.1f} s ({:.1f}%)'.format(
+              method, cpu_time, args.duration, 100 * cpu_time / args.duration))
+
+        tty_stop.set()
+        writer.join()
+        os.close(device)
+        os.close(controller)
@@ -41,7 +41,8 @@ except ImportError:
 
 class MicropyGPS(object):
     """GPS NMEA Sentence Parser. Creates object that stores all relevant GPS data and statistics.
-    Parses sentences one character at a time using update(). """
+    Parses sentences one character at a time using update(), or a chunk of received bytes at a time using
+    update_bytes(). """
 
     # Max Number of Characters a valid sentence can be (based on GGA sentence)
     SENTENCE_LIMIT = 76
@@ -50,6 +51,8 @@ class MicropyGPS(object):
     __FIX_2D = 2
     __FIX_3D = 3
     __DIRECTIONS = ['N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE', 'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW']
+    # Characters that update() ignores
+    __UNPRINTABLE = bytes(range(10)) + bytes(range(127, 256))
     __MONTHS = ('January', 'February', 'March', 'April', 'May',
                 'June', 'July', 'August', 'September', 'October',
                 'November', 'December')
@@ -530,80 +533,221 @@ class MicropyGPS(object):
         Function builds a list of received string that are validate by CRC prior to parsing by the  appropriate
         sentence function. Returns sentence type on successful parse, None otherwise"""
 
-        valid_sentence = False
-
         # Validate new_char is a printable char
         ascii_char = ord(new_char)
 
         if 10 <= ascii_char <= 126:
-            self.char_count += 1
 
             # Write Character to log file if enabled
             if self.log_en:
                 self.write_log(new_char)
 
-            # Check if a new string is starting ($)
-            if new_char == '$':
-                self.new_sentence()
-                return None
+            return self.update_char(new_char, ascii_char)
+
+        # Tell Host no new sentence was parsed
+        return None
+
+    def update_char(self, new_char, ascii_char):
+        """Processes a printable char, which has already been logged. Returns sentence type on successful parse,
+        None otherwise"""
+
+        valid_sentence = False
+        self.char_count += 1
+
+        # Check if a new string is starting ($)
+        if new_char == '$':
+            self.new_sentence()
+            return None
 
-            elif self.sentence_active:
+        elif self.sentence_active:
 
-                # Check if sentence is ending (*)
-                if new_char == '*':
-                    self.process_crc = False
-                    self.active_segment += 1
-                    self.gps_segments.append('')
-                    return None
+            # Check if sentence is ending (*)
+            if new_char == '*':
+                self.process_crc = False
+                self.active_segment += 1
+                self.gps_segments.append('')
+                return None
 
-                # Check if a section is ended (,), Create a new substring to feed
-                # characters to
-                elif new_char == ',':
-                    self.active_segment += 1
-                    self.gps_segments.append('')
+            # Check if a section is ended (,), Create a new substring to feed
+            # characters to
+            elif new_char == ',':
+                self.active_segment += 1
+                self.gps_segments.append('')
 
-                # Store All Other printable character and check CRC when ready
-                else:
-                    self.gps_segments[self.active_segment] += new_char
+            # Store All Other printable character and check CRC when ready
+            else:
+                self.gps_segments[self.active_segment] += new_char
 
-                    # When CRC input is disabled, sentence is nearly complete
-                    if not self.process_crc:
+                # When CRC input is disabled, sentence is nearly complete
+                if not self.process_crc:
 
-                        if len(self.gps_segments[self.active_segment]) == 2:
-                            try:
-                                final_crc = int(self.gps_segments[self.active_segment], 16)
-                                if self.crc_xor == final_crc:
-                                    valid_sentence = True
-                                else:
-                                    self.crc_fails += 1
-                            except ValueError:
-                                pass  # CRC Value was deformed and could not have been correct
+                    if len(self.gps_segments[self.active_segment]) == 2:
+                        try:
+                            final_crc = int(self.gps_segments[self.active_segment], 16)
+                            if self.crc_xor == final_crc:
+                                valid_sentence = True
+                            else:
+                                self.crc_fails += 1
+                        except ValueError:
+                            pass  # CRC Value was deformed and could not have been correct
 
-                # Update CRC
-                if self.process_crc:
-                    self.crc_xor ^= ascii_char
+            # Update CRC
+            if self.process_crc:
+                self.crc_xor ^= ascii_char
 
-                # If a Valid Sentence Was received and it's a supported sentence, then parse it!!
-                if valid_sentence:
-                    self.clean_sentences += 1  # Increment clean sentences received
-                    self.sentence_active = False  # Clear Active Processing Flag
+            # If a Valid Sentence Was received and it's a supported sentence, then parse it!!
+            if valid_sentence:
+                self.clean_sentences += 1  # Increment clean sentences received
+                self.sentence_active = False  # Clear Active Processing Flag
 
-                    if self.gps_segments[0] in self.supported_sentences:
+                if self.gps_segments[0] in self.supported_sentences:
 
-                        # parse the Sentence Based on the message type, return True if parse is clean
-                        if self.supported_sentences[self.gps_segments[0]](self):
+                    # parse the Sentence Based on the message type, return True if parse is clean
+                    if self.supported_sentences[self.gps_segments[0]](self):
 
-                            # Let host know that the GPS object was updated by returning parsed sentence type
-                            self.parsed_sentences += 1
-                            return self.gps_segments[0]
+                        # Let host know that the GPS object was updated by returning parsed sentence type
+                        self.parsed_sentences += 1
+                        return self.gps_segments[0]
 
-                # Check that the sentence buffer isn't filling up with Garage waiting for the sentence to complete
-                if self.char_count > self.SENTENCE_LIMIT:
-                    self.sentence_active = False
+            # Check that the sentence buffer isn't filling up with Garage waiting for the sentence to complete
+            if self.char_count > self.SENTENCE_LIMIT:
+                self.sentence_active = False
 
         # Tell Host no new sentence was parsed
         return None
 
+    def update_bytes(self, buf):
+        """Processes a chunk of received data, like from a UART or serial port read, and updates the GPS object the
+        same way as passing each char to update(). Complete sentences are checked and split all at once, rather than
+        a char at a time. Sentences split between chunks, or that are malformed, are processed a char at a time.
+        Returns a list of the sentence types successfully parsed"""
+
+        if isinstance(buf, str):
+            buf = buf.encode()
+
+        # Drop the chars that update() would ignore
+        try:
+            data = bytes(buf).translate(None, self.__UNPRINTABLE)
+        except (AttributeError, TypeError):
+            # MicroPython bytes have no translate()
+            data = bytes([char for char in bytes(buf) if 10 <= char <= 126])
+
+        # Write the chunk to log file if enabled
+        if self.log_en:
+            self.write_log(data.decode())
+
+        parsed = []
+        position = 0
+        length = len(data)
+
+        # A sentence is fresh if it has just started, so nothing of it has been processed yet
+        fresh = False
+
+        while position < length:
+            if self.sentence_active and fresh:
+                fresh = False
+                end = self.complete_sentence(data, position, parsed)
+
+                if end is not None:
+                    # If a new sentence started, it's fresh too
+                    position = end
+                    fresh = self.sentence_active and self.process_crc
+                    continue
+
+            if self.sentence_active:
+                # Part of a sentence, so process a char at a time
+                ascii_char = data[position]
+                position += 1
+
+                sentence_type = self.update_char(chr(ascii_char), ascii_char)
+                if sentence_type is not None:
+                    parsed.append(sentence_type)
+
+                fresh = ascii_char == 36  # '$'
+                continue
+
+            # Between sentences, so skip to the next '$'
+            start = data.find(b'$', position)
+
+            if start < 0:
+                self.char_count += length - position
+                break
+
+            self.new_sentence()
+            position = start + 1
+            fresh = True
+
+        return parsed
+
+    def complete_sentence(self, data, position, parsed):
+        """Processes a sentence that started just before data[position], if all of it is in data and it is well
+        formed. Adds its type to parsed if it is parsed. Returns the index after the sentence, or None to process
+        it a char at a time instead"""
+
+        star = data.find(b'*', position)
+
+        if star < 0:
+            # Without an end, this sentence only matters if it's the last in data
+            restart = data.find(b'$', position)
+            if restart < 0:
+                return None
+
+            self.new_sentence()
+            return restart + 1
+
+        restart = data.find(b'$', position, star + 3)
+
+        if 0 <= restart < star:
+            # Restarted before it ended, so none of it matters
+            self.new_sentence()
+            return restart + 1
+
+        # The CRC has to be complete and contain no special chars, and the sentence can't pass SENTENCE_LIMIT
+        # before the CRC. Otherwise, update_char() handles it.
+        if restart >= 0 or star + 2 >= len(data) or star - position + 2 > self.SENTENCE_LIMIT:
+            return None
+
+        crc = data[star + 1:star + 3]
+        if b',' in crc or b'*' in crc:
+            return None
+
+        body = data[position:star]
+        crc_xor = 0
+        for ascii_char in body:
+            crc_xor ^= ascii_char
+
+        self.gps_segments = body.decode().split(',')
+        self.gps_segments.append(crc.decode())
+        self.active_segment = len(self.gps_segments) - 1
+        self.crc_xor = crc_xor
+        self.process_crc = False
+        self.char_count = star - position + 3
+
+        valid_sentence = False
+        try:
+            final_crc = int(self.gps_segments[self.active_segment], 16)
+            if self.crc_xor == final_crc:
+                valid_sentence = True
+            else:
+                self.crc_fails += 1
+        except ValueError:
+            pass  # CRC Value was deformed and could not have been correct
+
+        if valid_sentence:
+            self.clean_sentences += 1  # Increment clean sentences received
+            self.sentence_active = False  # Clear Active Processing Flag
+
+            if self.gps_segments[0] in self.supported_sentences:
+                if self.supported_sentences[self.gps_segments[0]](self):
+                    self.parsed_sentences += 1
+                    parsed.append(self.gps_segments[0])
+                    return star + 3
+
+        if self.char_count > self.SENTENCE_LIMIT:
+            self.sentence_active = False
+
+        return star + 3
+
     def new_fix_time(self):
         """Updates a high resolution counter with current time when fix is updated. Currently only triggered from
         GGA, GSA and RMC sentences"""
@@ -18,7 +18,9 @@
 #   - http://www.ucs.louisiana.edu/~jev9637
 #
 # Modified:
-#   *
+#   * 10/18/26
+#       - Read all of the waiting bytes at once and pass them to
+#         update_bytes(), rather than a char at a time
 #
 ###############################################################################
 
@@ -74,9 +76,10 @@ with open('/sd/GPS_log.csv', 'w') as log:
 
     while pyb.elapsed_millis(start_time) < 60000: # log data for 60 seconds
         if uart.any():
-            valid_sentence_received = gps.update(chr(uart.readchar())) # Note the conversion to to chr, UART outputs ints normally
+            # Read everything waiting and parse it at once
+            sentences_parsed = gps.update_bytes(uart.read())
             
-            if valid_sentence_received:
+            for sentence in sentences_parsed:
                 long_decimal = convert_longitude(gps.longitude)
                 lat_decimal = convert_latitude(gps.latitude)
                 log.write('{},{},{},{},{},{}\n'.format(pyb.elapsed_millis(start_time),
@@ -0,0 +1,406 @@
+#! /usr/bin/env python
+
+###############################################################################
+# nmea_replay.py
+#
+# Replays raw NMEA logs, like those written by MicropyGPS.start_logging(),
+# through the MicropyGPS sentence parsers to build a table of fixes. The
+# table is saved as columns of a NumPy .npz file, with an index sorted by
+# time, so later queries over weeks of logs don't parse the text again.
+#
+# Each fix is one epoch of the receiver, the sentences sharing a timestamp.
+# The columns are:
+#   time - UTC time (s since 1970), NaN until the date is known from an RMC
+#   latitude, longitude - decimal degrees (+/- = North/South, East/West)
+#   speed - speed over ground (m/s)
+#   course - course over ground (deg from N)
+#   hdop - horizontal dilution of precision
+#   satellites - number of satellites used in the fix
+#   altitude - altitude (m)
+# Values that none of an epoch's sentences contained are NaN.
+#
+# Large logs are split into byte ranges, each starting on a '$', which are
+# replayed in parallel. An epoch split between two ranges is merged back into
+# one fix, as are the sentences at the start of a range that belong to the
+# last epoch of the range before it.
+#
+# Created: 10/18/26
+#
+# Modified:
+#   * 10/18/26
+#       - EpochCollector is public, for live readers like gps_reader.py, and
+#         can pass each fix to a callback as soon as its epoch is complete
+#       - Date the fixes at the start of a range from the ranges before it,
+#         rather than leaving their time NaN until the range's first date
+#
+# TODO:
+#   *
+###############################################################################
+
+import calendar
+import os
+import sys
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+
+# The parser is in the micropyGPS folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'micropyGPS'))
+from micropyGPS import MicropyGPS
+
+COLUMNS = ('time', 'latitude', 'longitude', 'speed', 'course', 'hdop', 'satellites', 'altitude')
+
+KNOTS_TO_MPS = 0.514444
+
+
+def _decimal_degrees(angle):
+    """ Converts a MicropyGPS (degrees, minutes, hemisphere) tuple """
+    return (angle[0] + angle[1] / 60.0) * (-1.0 if angle[2] in ('S', 'W') else 1.0)
+
+
+def _utc_time(date, clock):
+    """ Converts a MicropyGPS (day, month, year) date and the seconds since
+    midnight, which can be an array, to UTC time (s since 1970)
+    """
+    day, month, year = date
+    return calendar.timegm((2000 + int(year), int(month), int(day), 0, 0, 0)) + clock
+
+
+def byte_ranges(filename, num_ranges, search_length=4096):
+    """ Splits a file into about num_ranges byte ranges, each starting on a '$'
+
+    Returns:
+        a list of (start, end) byte offsets
+    """
+    size = os.path.getsize(filename)
+    starts = [0]
+
+    with open(filename, 'rb') as log_file:
+        for index in range(1, num_ranges):
+            position = max(size * index // num_ranges, starts[-1] + 1)
+
+            # Move forward to the next sentence
+            while position < size:
+                log_file.seek(position)
+                found = log_file.read(search_length).find(b'$')
+
+                if found >= 0:
+                    position = position + found
+                    break
+
+                position = position + search_length
+
+            if position < size and position > starts[-1]:
+                starts.append(position)
+
+    return list(zip(starts, starts[1:] + [size]))
+
+
+class EpochCollector(object):
+    """ Collects the values from each parsed sentence into fixes """
+
+    def __init__(self, on_fix=None, complete_after=None):
+        """ Initializing
+
+        Arguments:
+            on_fix : if given, called with the values of each fix, in the
+                     order of COLUMNS, rather than keeping them in rows
+            complete_after : if given, the sentences that complete an epoch,
+                             like ('GPRMC', 'GPGGA'). The fix is finished as
+                             soon as all of them are in, rather than when the
+                             next epoch starts, and later sentences of the
+                             epoch are ignored.
+        """
+        self.rows = []
+        self.clocks = []
+        self.date = None
+        self.on_fix = on_fix
+        self.complete_after = frozenset(complete_after or ())
+        self.sentences = set()
+
+        # Until a sentence with a time, the values belong to the epoch before
+        # this part of the log
+        self.epoch = dict.fromkeys(COLUMNS, np.nan)
+        self.epoch_time = None
+        self.leading = None
+
+    def add(self, gps, sentence):
+        if sentence in ('GPRMC', 'GPGGA', 'GPGLL') and gps.timestamp != self.epoch_time:
+            self.flush()
+            self.epoch_time = gps.timestamp
+            self.epoch = dict.fromkeys(COLUMNS, np.nan)
+            self.sentences.clear()
+
+        if self.epoch is None:
+            return
+
+        self.sentences.add(sentence)
+
+        if sentence == 'GPRMC':
+            if gps.valid:
+                self.date = gps.date
+                self.epoch['latitude'] = _decimal_degrees(gps.latitude)
+                self.epoch['longitude'] = _decimal_degrees(gps.longitude)
+                self.epoch['speed'] = gps.speed[0] * KNOTS_TO_MPS
+                self.epoch['course'] = gps.course
+
+        elif sentence == 'GPGGA':
+            if gps.fix_stat > 0:
+                self.epoch['latitude'] = _decimal_degrees(gps.latitude)
+                self.epoch['longitude'] = _decimal_degrees(gps.longitude)
+                self.epoch['altitude'] = gps.altitude
+            self.epoch['hdop'] = gps.hdop
+            self.epoch['satellites'] = gps.satellites_in_use
+
+        elif sentence == 'GPGSA':
+            self.epoch['hdop'] = gps.hdop
+
+        elif sentence == 'GPVTG':
+            self.epoch['speed'] = gps.speed[0] * KNOTS_TO_MPS
+            self.epoch['course'] = gps.course
+
+        if self.complete_after and self.complete_after <= self.sentences:
+            self.flush()
+
+    def flush(self):
+        """ Adds the current epoch to the rows, if it has a position """
+        if self.epoch_time is None and self.epoch is not None:
+            self.leading = self.epoch
+            self.epoch = None
+            return
+
+        if self.epoch is None or np.isnan(self.epoch['latitude']):
+            return
+
+        hours, minutes, seconds = self.epoch_time
+        clock = 3600 * hours + 60 * minutes + seconds
+
+        if self.has_date():
+            self.epoch['time'] = _utc_time(self.date, clock)
+
+        values = [self.epoch[column] for column in COLUMNS]
+        self.epoch = None
+
+        if self.on_fix is not None:
+            self.on_fix(values)
+        else:
+            self.rows.append(values)
+            self.clocks.append(clock)
+
+    def has_date(self):
+        return self.date is not None and self.date[2] > 0
+
+    def table(self):
+        self.flush()
+        values = np.array(self.rows, dtype=float).reshape(-1, len(COLUMNS))
+        table = {column: values[:, index] for index, column in enumerate(COLUMNS)}
+
+        # The time of day of each fix, for dating the fixes before the first
+        # date, from the range of the log before
+        table['clock'] = np.array(self.clocks, dtype=float)
+        return table
+
+
+def replay_range(filename, start=0, end=None, chunk_size=1 << 20):
+    """ Replays the sentences in a byte range of a log through MicropyGPS
+
+    Returns:
+        a dict of the fix table columns, and the number of sentences parsed
+        and those that failed their CRC or could not be parsed. Also, for
+        joining ranges, 'leading', the values before the first timed sentence,
+        'clock', the seconds since midnight of each fix, and 'date', the last
+        date in the range, if any.
+    """
+    gps = MicropyGPS()
+    collector = EpochCollector()
+    parse_errors = 0
+
+    if end is None:
+        end = os.path.getsize(filename)
+
+    with open(filename, 'rb') as log_file:
+        log_file.seek(start)
+        remaining = end - start
+        partial = b''
+
+        while remaining > 0:
+            chunk = log_file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+
+            lines = (partial + chunk).split(b'\n')
+            partial = lines.pop()
+
+            # A line at a time, so each sentence's values can be collected
+            for line in lines:
+                try:
+                    parsed = gps.update_bytes(line + b'\n')
+                except (IndexError, ValueError):
+                    # A sentence with a valid CRC, but missing fields
+                    parse_errors += 1
+                    continue
+
+                for sentence in parsed:
+                    collector.add(gps, sentence)
+
+        try:
+            for sentence in gps.update_bytes(partial):
+                collector.add(gps, sentence)
+        except (IndexError, ValueError):
+            parse_errors += 1
+
+    table = collector.table()
+    table['leading'] = np.array([collector.leading[column] for column in COLUMNS])
+    table['date'] = collector.date if collector.has_date() else None
+    table['parsed_sentences'] = gps.parsed_sentences
+    table['crc_fails'] = gps.crc_fails + parse_errors
+
+    return table
+
+
+def _replay_range(arguments):
+    return replay_range(*arguments)
+
+
+def _merge_split_epochs(table):
+    """ Combines neighboring fixes with the same time, from an epoch split
+    between byte ranges. Each column takes the later non-NaN value.
+    """
+    time = table['time']
+    same = (time[1:] == time[:-1])
+
+    if not np.any(same):
+        return table
+
+    for column in COLUMNS:
+        values = table[column]
+        later = values[1:]
+        table[column][1:] = np.where(same & np.isnan(later), values[:-1], later)
+
+    keep = np.concatenate((~same, [True]))
+    return {column: table[column][keep] for column in COLUMNS}
+
+
+def replay_logs(filenames, num_processes=None, min_range_bytes=4 << 20):
+    """ Replays NMEA log files in parallel, building one fix table
+
+    Each file is split into byte ranges of at least min_range_bytes, which are
+    shared among the processes.
+
+    Returns:
+        a dict of the fix table columns, in log order, plus 'index', the order
+        that sorts the fixes by time, and the total parsed_sentences and
+        crc_fails
+    """
+    if num_processes is None:
+        num_processes = cpu_count()
+
+    tasks = []
+    for filename in filenames:
+        num_ranges = max(min(os.path.getsize(filename) // min_range_bytes, num_processes), 1)
+        tasks.extend((filename, start, end) for start, end in byte_ranges(filename, num_ranges))
+
+    if len(tasks) > 1 and num_processes > 1:
+        with Pool(min(num_processes, len(tasks))) as pool:
+            pieces = pool.map(_replay_range, tasks, chunksize=1)
+    else:
+        pieces = [_replay_range(task) for task in tasks]
+
+    # Give the values from the start of each range to the last fix of the
+    # range before it, in the same file. Like replaying in one piece, later
+    # values replace earlier ones.
+    last = None
+    date = None
+    for task, piece in zip(tasks, pieces):
+        if task[1] == 0:
+            last = None
+            date = None
+
+        if last is not None:
+            for index, column in enumerate(COLUMNS):
+                if not np.isnan(piece['leading'][index]):
+                    last[column][-1] = piece['leading'][index]
+
+        # The fixes before the range's first date have the date from the
+        # ranges before, like replaying in one piece
+        undated = np.isnan(piece['time'])
+        if date is not None and np.any(undated):
+            dated = np.flatnonzero(~undated)
+            leading_rows = slice(0, dated[0] if len(dated) else len(undated))
+            piece['time'][leading_rows] = _utc_time(date, piece['clock'][leading_rows])
+
+        if len(piece['time']) > 0:
+            last = piece
+        if piece['date'] is not None:
+            date = piece['date']
+
+    table = {column: np.concatenate([piece[column] for piece in pieces]) for column in COLUMNS}
+    table = _merge_split_epochs(table)
+
+    # Fixes without a time sort to the end
+    table['index'] = np.argsort(table['time'], kind='stable')
+    table['parsed_sentences'] = sum(piece['parsed_sentences'] for piece in pieces)
+    table['crc_fails'] = sum(piece['crc_fails'] for piece in pieces)
+
+    return table
+
+
+def save_fix_table(filename, table):
+    """ Saves a fix table from replay_logs() as a compressed .npz file """
+    np.savez_compressed(filename, **table)
+
+
+class FixTable(object):
+    """ A saved fix table, for queries by time """
+
+    def __init__(self, filename):
+        with np.load(filename) as data:
+            self.columns = {column: data[column] for column in COLUMNS}
+            self.index = data['index']
+
+        self._sorted_time = self.columns['time'][self.index]
+
+    def __len__(self):
+        return len(self.index)
+
+    def between(self, start_time, end_time):
+        """ Returns the columns of the fixes from start_time up to end_time
+        (s since 1970), in time order
+        """
+        first, last = np.searchsorted(self._sorted_time, (start_time, end_time))
+        rows = self.index[first:last]
+        return {column: values[rows] for column, values in self.columns.items()}
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Build a fix table from raw NMEA logs.')
+    parser.add_argument('logs', nargs='+', help='the NMEA log files')
+    parser.add_argument('-o', '--output', default='fix_table.npz', help='the table file to write')
+    parser.add_argument('-p', '--processes', type=int, default=None, help='number of processes')
+    parser.add_argument('--check', action='store_true',
+                        help='check that replaying in small ranges matches replaying each log in one piece')
+    args = parser.parse_args()
+
+    if args.check:
+        # Small ranges, so epochs are split and ranges start before their
+        # first date
+        serial = replay_logs(args.logs, num_processes=1, min_range_bytes=1 << 62)
+        ranges = replay_logs(args.logs, num_processes=args.processes or 8, min_range_bytes=2000)
+
+        for column in COLUMNS + ('index',):
+            if not np.array_equal(serial[column], ranges[column], equal_nan=True):
+                raise SystemExit('Column {} differs between replaying in one piece and in ranges'.format(column))
+
+        print('Replaying in ranges matches replaying in one piece, {} fixes'.format(len(serial['time'])))
+        raise SystemExit
+
+    start_time = time.time()
+    table = replay_logs(args.logs, num_processes=args.processes)
+    save_fix_table(args.output, table)
+
+    print('{} fixes from {} sentences ({} failed) in {:.1f} s'.format(
+          len(table['time']), table['parsed_sentences'], table['crc_fails'], time.time() - start_time))
@@ -7,36 +7,34 @@ def CRAWLAB_fft(data,time,plotflag):
     #
     # Inputs:
     #   time = time array corresponding to the data
-    #   data = the response data array (only pass a single dimension/state at at time)
+    #   data = the response data array, or a (channels, samples) array for several
     #   plotflag = will plot the FFT if nonzero
     #   
     # Output:
     #   fft_freq = an array of the freqs used in the FFT
-    #   fft_mag = an array of the amplitude of the FFT at each freq in fft_freq
+    #   fft_mag = an array of the amplitude of the FFT at each freq in fft_freq,
+    #             with one row per channel
     #
     # Created: 03/28/14
     #   - Joshua Vaughan
     #   - joshua.vaughan@louisiana.edu
     #   - http://www.ucs.louisiana.edu/~jev9637
+    #
+    # Modified:
+    #   * 10/18/26
+    #       - Use amplitude_spectrum() from spectral_analysis.py, which fixes
+    #         the float index under Python 3 and uses a real FFT. The
+    #         magnitude is now scaled by the window, so a sine wave's peak is
+    #         about its amplitude, and the frequencies are the FFT bins.
     ######################################################################################
     '''
-    import numpy as np
-    from scipy.fftpack import fft
     import matplotlib.pyplot as plt
-    
-    # correct for any DC offset
-    offset = np.mean(data) 
+    from spectral_analysis import amplitude_spectrum
 
-    # Get the natural frequency
+    # correct for any DC offset, and use a Hanning window
     sample_time = time[1] - time[0]
-    n = len(data)
+    fft_freq, fft_mag, peak_freq = amplitude_spectrum(data, sample_time, window='hann')
 
-    fft_mag = fft((data - offset)*np.hanning(len(data)))
-    fft_freq = np.linspace(0.0, 1.0/(2.0*sample_time), n/2)
-    
-    # Only return the "useful" part of the fft
-    fft_mag = 2.0/n * np.abs(fft_mag[0:n/2])
-    
     if plotflag:
         # Plot the relationshiop
         #   Many of these setting could also be made default by the .matplotlibrc file
@@ -55,14 +53,13 @@ def CRAWLAB_fft(data,time,plotflag):
         plt.xlabel('Frequency (Hz)',fontsize=22,labelpad=8)
         plt.ylabel('FFT magnitude',fontsize=22,labelpad=10)
     
-        plt.plot(fft_freq, fft_mag, linewidth=2, linestyle='-')
+        plt.plot(fft_freq, fft_mag.T, linewidth=2, linestyle='-')
         
         # Adjust the page layout filling the page using the new tight_layout command
         plt.tight_layout(pad=0.5)
         plt.show()
     
-    # Uncomment below to find and print the frequency at which the highest peak occurs
-#     freq_index = np.argmax(2.0/n * np.abs(fft_mag[0:n/2]))
-#     print '\nHighest magnitude peak occurs at: ' + str(fft_freq[freq_index]) + ' Hz.'
+    # Uncomment below to print the frequency at which the highest peak occurs
+#     print('\nHighest magnitude peak occurs at: {} Hz.'.format(peak_freq))
     
     return fft_freq, fft_mag
\ No newline at end of file
@@ -0,0 +1,190 @@
+#! /usr/bin/env python
+
+################################################################################
+# error_metrics.py
+#
+# Running tracking-error metrics, calculated as the samples arrive rather than
+# from full arrays held in memory. See tracking_error.py for the definitions.
+#   * ISE - integral square error
+#   * IAE - integral absolute error
+#   * ITSE - integral time squared error
+#   * ITAE - integral time absolute error
+#   * RMS - root-mean-square error
+#
+# The integrals use the trapezoidal rule, like np.trapz. An ErrorMetrics
+# object only keeps the running sums and the first and last samples, so its
+# memory use doesn't grow. Samples can be added one at a time, from a running
+# controller, or in chunks, from a log file.
+#
+# Long logs can also be split into pieces that are processed separately, in
+# parallel, then merged. Merging adds the integral over the gap between the
+# last sample of one piece and the first of the next, so the result is the
+# same as processing the whole log at once.
+#
+# Created: 10/18/26
+#
+# Modified:
+#   *
+#
+# TODO:
+#   *
+################################################################################
+
+import numpy as np
+
+
+class ErrorMetrics(object):
+    """ Constant-memory accumulator of ISE, IAE, ITSE, ITAE, and RMS error """
+
+    def __init__(self, sample_time=None, start_time=0.0):
+        """ Initializing
+
+        Arguments:
+            sample_time : the time between samples (s), used when update() is
+                          not given the sample times
+            start_time : the time of the first sample, when using sample_time
+        """
+        self.sample_time = sample_time
+        self.start_time = start_time
+
+        self.count = 0
+        self.ise = 0.0
+        self.iae = 0.0
+        self.itse = 0.0
+        self.itae = 0.0
+        self.sum_squares = 0.0
+        self.max_abs = 0.0
+
+        # The first and last (time, error) samples, to join to others
+        self.first = None
+        self.last = None
+
+    def _sample_times(self, num):
+        if self.sample_time is None:
+            raise ValueError('The sample times are needed, unless sample_time is set.')
+        return self.start_time + (self.count + np.arange(num)) * self.sample_time
+
+    def update(self, error, time=None, return_running=False):
+        """ Adds one sample, or a chunk of samples, of the error
+
+        Arguments:
+            error : the error, a scalar or array, in time order
+            time : the time of each sample (s). If None, sample_time is used.
+            return_running : if True, return the running totals at each sample
+
+        Returns:
+            if return_running, a dict of arrays of the running ISE, IAE, ITSE,
+            and ITAE at each of the new samples
+        """
+        error = np.atleast_1d(np.asarray(error, dtype=float))
+        if len(error) == 0:
+            return None
+
+        if time is None:
+            time = self._sample_times(len(error))
+        else:
+            time = np.atleast_1d(np.asarray(time, dtype=float))
+
+        # Include the last sample of the previous update, so the integrals
+        # cover the interval between the updates too
+        if self.last is not None:
+            t = np.concatenate(([self.last[0]], time))
+            e = np.concatenate(([self.last[1]], error))
+        else:
+            t, e = time, error
+            self.first = (time[0], error[0])
+
+        dt = np.diff(t)
+        square = e**2
+        absolute = np.abs(e)
+
+        # Area of each trapezoid
+        pieces = {'ise': dt * (square[1:] + square[:-1]) / 2,
+                  'iae': dt * (absolute[1:] + absolute[:-1]) / 2,
+                  'itse': dt * (t[1:] * square[1:] + t[:-1] * square[:-1]) / 2,
+                  'itae': dt * (t[1:] * absolute[1:] + t[:-1] * absolute[:-1]) / 2}
+
+        running = None
+        if return_running:
+            running = {}
+            for name, areas in pieces.items():
+                totals = getattr(self, name) + np.cumsum(areas)
+                # With no previous sample, the first new one has no area yet
+                if len(totals) < len(error):
+                    totals = np.concatenate(([getattr(self, name)], totals))
+                running[name] = totals
+
+        for name, areas in pieces.items():
+            setattr(self, name, getattr(self, name) + np.sum(areas))
+
+        self.count += len(error)
+        self.sum_squares += np.sum(error**2)
+        self.max_abs = max(self.max_abs, np.max(np.abs(error)))
+        self.last = (time[-1], error[-1])
+
+        return running
+
+    def merge(self, other):
+        """ Adds the results of other, which must cover a later time span """
+        if other.count == 0:
+            return self
+
+        if self.count == 0:
+            self.__dict__.update({key: value for key, value in other.__dict__.items()
+                                  if key not in ('sample_time', 'start_time')})
+            return self
+
+        # The trapezoid between our last sample and other's first
+        (t0, e0), (t1, e1) = self.last, other.first
+        dt = t1 - t0
+        self.ise += other.ise + dt * (e0**2 + e1**2) / 2
+        self.iae += other.iae + dt * (abs(e0) + abs(e1)) / 2
+        self.itse += other.itse + dt * (t0 * e0**2 + t1 * e1**2) / 2
+        self.itae += other.itae + dt * (t0 * abs(e0) + t1 * abs(e1)) / 2
+
+        self.count += other.count
+        self.sum_squares += other.sum_squares
+        self.max_abs = max(self.max_abs, other.max_abs)
+        self.last = other.last
+
+        return self
+
+    @property
+    def rms(self):
+        """ The root-mean-square of the error samples """
+        return np.sqrt(self.sum_squares / self.count) if self.count else np.nan
+
+    def results(self):
+        """ Returns a dict of the current totals """
+        return {'ISE': self.ise, 'IAE': self.iae, 'ITSE': self.itse,
+                'ITAE': self.itae, 'RMS': self.rms, 'max': self.max_abs,
+                'samples': self.count}
+
+
+if __name__ == '__main__':
+    # Compare to the full-array calculations, then process the same data as
+    # four pieces, which could be done in parallel, and merge them
+    sample_time = 0.01
+    time = np.arange(0, 600, sample_time)
+    error = np.sin(2 * np.pi * 0.1 * time) + 0.1 * np.random.randn(len(time))
+
+    metrics = ErrorMetrics(sample_time)
+    for chunk in np.array_split(error, 1000):
+        metrics.update(chunk)
+
+    trapezoid = getattr(np, 'trapezoid', getattr(np, 'trapz', None))
+    print('Streamed: {}'.format(metrics.results()))
+    print('Full arrays: ISE={}, ITAE={}'.format(trapezoid(error**2, dx=sample_time),
+                                                trapezoid(time * np.abs(error), dx=sample_time)))
+
+    pieces = []
+    for time_chunk, error_chunk in zip(np.array_split(time, 4), np.array_split(error, 4)):
+        piece = ErrorMetrics()
+        piece.update(error_chunk, time_chunk)
+        pieces.append(piece)
+
+    merged = ErrorMetrics()
+    for piece in pieces:
+        merged.merge(piece)
+
+    print('Merged: {}'.format(merged.results()))
@@ -0,0 +1,351 @@
+#! /usr/bin/env python
+
+################################################################################
+# input_shapers.py
+#
+# Input shaper design functions. Includes the ZV, ZVD, EI, multi-hump EI and
+# UMZV shapers, along with multi-mode shapers formed by convolving the shapers
+# for each mode.
+#
+# All of the shaper functions follow the format of ZV() in
+# basic_InputShaping.py. They return:
+#   shaper : the digitized version of the shaper
+#   exactshaper : the exact shaper. Impulse times and amplitudes in an Nx2 array
+#
+# Designs are cached, keyed on the frequency, damping ratio, sampling time,
+# and shaper type (plus any other design parameters). Controllers that redesign
+# the shaper whenever a parameter changes, like the cable length of a crane,
+# will see the same few designs over and over. Those cost only a lookup after
+# the first time. The arrays returned are copies, so modifying them will not
+# corrupt the cache.
+#
+# Created: 10/18/26
+#
+# Modified:
+#   *
+#
+################################################################################
+
+import functools
+
+import numpy as np
+from scipy.optimize import fsolve
+
+# The number of designs to keep in the cache. Old ones are discarded first.
+CACHE_SIZE = 1024
+
+
+def digseq(seq, step):
+    """
+    This function digitizes an impulse sequence, seq, so that it will function properly
+    for a sampling rate of step seconds/sample.
+
+    Original MATLAB preamble
+        digseq - Whit Rappole
+        DIGITIZESEQ Map a sequence onto digital timing loop
+        dseq = digseq(seq,step)
+
+        Uses a linear extrapolation to split each continuous
+        impulse into two digital impulses
+
+    This version processes all of the impulses at once, rather than looping.
+    """
+    seq = np.atleast_2d(np.asarray(seq, dtype=float))
+
+    index = np.floor(seq[:, 0] / step).astype(int)
+    woof = (seq[:, 0] - index * step) / step
+
+    dseq = np.zeros(max(int(round(seq[-1, 0] / step)), index.max() + 1) + 2)
+
+    # np.add.at accumulates correctly when impulses land on the same index
+    np.add.at(dseq, index + 1, woof * seq[:, 1])
+    np.add.at(dseq, index, seq[:, 1] - woof * seq[:, 1])
+
+    # Remove any trailing zeros
+    last_nonzero = np.flatnonzero(dseq)
+    if len(last_nonzero) > 0:
+        dseq = dseq[:last_nonzero[-1] + 1]
+
+    return dseq.reshape(-1, 1)
+
+
+def seqconv(shaper1, shaper2):
+    """
+    Convolves two impulse sequences, returning a sequence with impulses at
+    every sum of the times and amplitudes that are the products of the
+    amplitudes. Impulses at the same time are combined.
+
+    Arguments:
+      shaper1, shaper2 : impulse sequences in the form [Ti Ai]
+
+    Returns:
+      shaper : the convolved sequence, sorted by time
+    """
+    shaper1 = np.atleast_2d(np.asarray(shaper1, dtype=float))
+    shaper2 = np.atleast_2d(np.asarray(shaper2, dtype=float))
+
+    times = (shaper1[:, 0, np.newaxis] + shaper2[np.newaxis, :, 0]).ravel()
+    amps = (shaper1[:, 1, np.newaxis] * shaper2[np.newaxis, :, 1]).ravel()
+
+    # Combine impulses that fall at the same time (to within round-off)
+    unique_times, inverse = np.unique(np.round(times, 12), return_inverse=True)
+    unique_amps = np.zeros_like(unique_times)
+    np.add.at(unique_amps, inverse, amps)
+
+    return np.column_stack((unique_times, unique_amps))
+
+
+def vib(shaper, f, zeta):
+    """
+    Returns the percentage residual vibration of a mode at frequency f Hz and
+    damping ratio zeta caused by the impulse sequence, shaper.
+    """
+    shaper = np.atleast_2d(np.asarray(shaper, dtype=float))
+    wn = 2 * np.pi * f
+    wd = wn * np.sqrt(1 - zeta**2)
+
+    ti = shaper[:, 0]
+    Ai = shaper[:, 1]
+    decay = Ai * np.exp(zeta * wn * ti)
+
+    return (100 * np.exp(-zeta * wn * ti[-1])
+                * np.hypot(np.sum(decay * np.cos(wd * ti)),
+                           np.sum(decay * np.sin(wd * ti))))
+
+
+def _damped_period(f, zeta):
+    """ Returns the damped period of vibration (s) """
+    return 1.0 / (f * np.sqrt(1 - zeta**2))
+
+
+def _damping_correction(times, amps, f, zeta):
+    """
+    Scales the amplitudes of a shaper designed for an undamped system by the
+    decay of the vibration between impulses, then normalizes them to sum to 1.
+    This is exact for the ZV and ZVD shapers and a good approximation for
+    lightly-damped EI shapers.
+    """
+    amps = amps * np.exp(-zeta * 2 * np.pi * f * times)
+    return amps / np.sum(amps)
+
+
+def _zv(f, zeta):
+    Td = _damped_period(f, zeta)
+    K = np.exp(-zeta * np.pi / np.sqrt(1 - zeta**2))
+
+    times = np.array([0.0, Td / 2])
+    amps = np.array([1.0, K]) / (1 + K)
+    return times, amps
+
+
+def _zvd(f, zeta):
+    Td = _damped_period(f, zeta)
+    K = np.exp(-zeta * np.pi / np.sqrt(1 - zeta**2))
+
+    times = np.array([0.0, Td / 2, Td])
+    amps = np.array([1.0, 2 * K, K**2]) / (1 + K)**2
+    return times, amps
+
+
+def _ei(f, zeta, Vtol):
+    """ EI shaper, using Singhose's curve fits for the damped case """
+    Td = _damped_period(f, zeta)
+
+    A1 = (0.24968 + 0.24961 * Vtol + 0.80008 * zeta + 1.23328 * Vtol * zeta
+          + 0.49599 * zeta**2 + 3.17316 * Vtol * zeta**2)
+    A3 = (0.25149 + 0.21474 * Vtol - 0.83249 * zeta + 1.41498 * Vtol * zeta
+          + 0.85181 * zeta**2 - 4.90094 * Vtol * zeta**2)
+    A2 = 1 - A1 - A3
+
+    t2 = Td * (0.49990 + 0.46159 * Vtol * zeta + 4.26169 * Vtol * zeta**2
+               + 1.75601 * Vtol * zeta**3 + 8.57843 * Vtol**2 * zeta
+               - 108.644 * Vtol**2 * zeta**2 + 336.989 * Vtol**2 * zeta**3)
+
+    times = np.array([0.0, t2, Td])
+    amps = np.array([A1, A2, A3])
+    return times, amps
+
+
+def _ei_multihump(f, zeta, Vtol, humps):
+    """ Two- and three-hump EI shapers, exact for the undamped case """
+    Td = _damped_period(f, zeta)
+
+    if humps == 2:
+        X = (Vtol**2 * (np.sqrt(1 - Vtol**2) + 1))**(1.0 / 3)
+        A1 = (3 * X**2 + 2 * X + 3 * Vtol**2) / (16 * X)
+        A2 = 0.5 - A1
+        amps = np.array([A1, A2, A2, A1])
+    elif humps == 3:
+        A1 = (1 + 3 * Vtol + 2 * np.sqrt(2 * (Vtol**2 + Vtol))) / 16
+        A2 = (1 - Vtol) / 4
+        A3 = 1 - 2 * (A1 + A2)
+        amps = np.array([A1, A2, A3, A2, A1])
+    else:
+        raise ValueError('Only 2- and 3-hump EI shapers are available.')
+
+    times = np.arange(len(amps)) * Td / 2
+    return times, _damping_correction(times, amps, f, zeta)
+
+
+def _umzv(f, zeta):
+    """
+    Unity-magnitude ZV shaper. The amplitudes are fixed at [1, -1, 1], so
+    the impulse times are found by solving the zero-vibration constraints.
+    The undamped solution (0, T/6, T/3) is used as the initial guess.
+    """
+    wn = 2 * np.pi * f
+    wd = wn * np.sqrt(1 - zeta**2)
+    T = 1.0 / f
+    amps = np.array([1.0, -1.0, 1.0])
+
+    if zeta == 0:
+        return np.array([0.0, T / 6, T / 3]), amps
+
+    def residual(t):
+        ti = np.array([0.0, t[0], t[1]])
+        decay = amps * np.exp(zeta * wn * ti)
+        return [np.sum(decay * np.cos(wd * ti)), np.sum(decay * np.sin(wd * ti))]
+
+    t2, t3 = fsolve(residual, [T / 6, T / 3], xtol=1e-12)
+
+    return np.array([0.0, t2, t3]), amps
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _design(shaper_type, f, zeta, deltaT, Vtol=0.05, humps=2):
+    """
+    Designs the exact and digitized shaper. This is the cached function, so
+    all of its arguments must be hashable.
+    """
+    shaper_type = shaper_type.upper()
+
+    if shaper_type == 'ZV':
+        times, amps = _zv(f, zeta)
+    elif shaper_type == 'ZVD':
+        times, amps = _zvd(f, zeta)
+    elif shaper_type == 'EI':
+        times, amps = _ei(f, zeta, Vtol)
+    elif shaper_type == 'EI_MULTIHUMP':
+        times, amps = _ei_multihump(f, zeta, Vtol, humps)
+    elif shaper_type == 'UMZV':
+        times, amps = _umzv(f, zeta)
+    else:
+        raise ValueError('Unknown shaper type: {}'.format(shaper_type))
+
+    exactshaper = np.column_stack((times, amps))
+    shaper = digseq(exactshaper, deltaT)
+
+    # Lock the cached arrays. Callers get copies from design_shaper().
+    exactshaper.setflags(write=False)
+    shaper.setflags(write=False)
+
+    return shaper, exactshaper
+
+
+def design_shaper(shaper_type, f, zeta, deltaT, **kwargs):
+    """
+    Returns an exact and digitized shaper of type shaper_type for natural
+    frequency, f Hz, and damping ratio, zeta. The exact shaper is digitized
+    for use at a sampling time of deltaT seconds/sample.
+
+    Arguments:
+      shaper_type : one of 'ZV', 'ZVD', 'EI', 'EI_multihump', or 'UMZV'
+      f : frequency to suppress vibration at (Hz)
+      zeta : damping ratio
+      deltaT : The sampling time used in the digital implementation of the shaper
+      Vtol : (EI only) tolerable level of vibration, default 0.05 (5%)
+      humps : (EI_multihump only) number of humps, 2 or 3
+
+    Returns:
+      shaper : the digitized version of the shaper
+      exactshaper : the exact shaper solution. Impulse times and amplitudes
+                    are in an Nx2 array
+    """
+    shaper, exactshaper = _design(shaper_type, float(f), float(zeta),
+                                  float(deltaT), **kwargs)
+    return shaper.copy(), exactshaper.copy()
+
+
+def ZV(f, zeta, deltaT):
+    """ ZV shaper, see design_shaper() for the arguments and returns """
+    return design_shaper('ZV', f, zeta, deltaT)
+
+
+def ZVD(f, zeta, deltaT):
+    """ ZVD shaper, see design_shaper() for the arguments and returns """
+    return design_shaper('ZVD', f, zeta, deltaT)
+
+
+def EI(f, zeta, deltaT, Vtol=0.05):
+    """ EI shaper, see design_shaper() for the arguments and returns """
+    return design_shaper('EI', f, zeta, deltaT, Vtol=Vtol)
+
+
+def EI_multihump(f, zeta, deltaT, Vtol=0.05, humps=2):
+    """ 2- or 3-hump EI shaper, see design_shaper() for the arguments and returns """
+    return design_shaper('EI_multihump', f, zeta, deltaT, Vtol=Vtol, humps=humps)
+
+
+def UMZV(f, zeta, deltaT):
+    """ UMZV shaper, see design_shaper() for the arguments and returns """
+    return design_shaper('UMZV', f, zeta, deltaT)
+
+
+def multi_mode(freqs, zetas, deltaT, shaper_type='ZV', **kwargs):
+    """
+    Returns an exact and digitized multi-mode shaper, formed by convolving
+    the shapers designed for each mode.
+
+    Arguments:
+      freqs : array of the frequencies to suppress vibration at (Hz)
+      zetas : array of the damping ratios of each mode
+      deltaT : The sampling time used in the digital implementation of the shaper
+      shaper_type : the type of shaper to use for every mode. Can also be a
+                    list, with a type for each mode
+      kwargs : passed to design_shaper() for each mode
+
+    Returns:
+      shaper : the digitized version of the shaper
+      exactshaper : the exact shaper solution. Impulse times and amplitudes
+                    are in an Nx2 array
+    """
+    if isinstance(shaper_type, str):
+        shaper_type = [shaper_type] * len(freqs)
+
+    exactshaper = np.array([[0.0, 1.0]])
+
+    for f, zeta, mode_type in zip(freqs, zetas, shaper_type):
+        _, mode_shaper = design_shaper(mode_type, f, zeta, deltaT, **kwargs)
+        exactshaper = seqconv(exactshaper, mode_shaper)
+
+    return digseq(exactshaper, deltaT), exactshaper
+
+
+def cache_info():
+    """ Returns the hits, misses, and size of the shaper design cache """
+    return _design.cache_info()
+
+
+def clear_cache():
+    """ Empties the shaper design cache """
+    _design.cache_clear()
+
+
+if __name__ == '__main__':
+    # Print the residual vibration of each shaper at, and 10% above, the
+    # design frequency
+    f = 0.5
+    zeta = 0.05
+    deltaT = 0.001
+
+    for name, (shaper, exactshaper) in [('ZV', ZV(f, zeta, deltaT)),
+                                        ('ZVD', ZVD(f, zeta, deltaT)),
+                                        ('EI', EI(f, zeta, deltaT)),
+                                        ('2-hump EI', EI_multihump(f, zeta, deltaT)),
+                                        ('3-hump EI', EI_multihump(f, zeta, deltaT, humps=3)),
+                                        ('UMZV', UMZV(f, zeta, deltaT)),
+                                        ('ZV-ZV', multi_mode([f, 3 * f], [zeta, zeta], deltaT))]:
+        print('{:10s} Duration: {:.4f}s   Vib. at f: {:6.3f}%   Vib. at 1.1f: {:6.3f}%'.format(
+              name, exactshaper[-1, 0], vib(exactshaper, f, zeta), vib(exactshaper, 1.1 * f, zeta)))
+
+    print(cache_info())
@@ -0,0 +1,160 @@
+#! /usr/bin/env python
+
+################################################################################
+# shaped_command.py
+#
+# Vectorized generator for (possibly) input-shaped bang-bang and
+# bang-coast-bang acceleration commands. It replaces the hard-coded, 9-impulse
+# accel_input() function.
+#
+# The command is piecewise constant, so it is fully described by a sorted array
+# of switching times and the acceleration level that holds after each switch.
+# Those are computed once, when the command is created. After that:
+#   * an entire time vector is evaluated in one NumPy pass (np.searchsorted)
+#   * a single time is evaluated in O(log n) with a binary search (bisect),
+#     which is what we want inside an ODE right-hand side
+#
+# Shapers of any length are supported. They use the same [Ti Ai] array format
+# as the shaper functions in the toolbox.
+#
+# Created: 10/18/26
+#
+# Modified:
+#   *
+#
+################################################################################
+
+import bisect
+
+import numpy as np
+
+
+def unshaped_switches(Amax, Vmax, Distance, StartTime=0.0):
+    """
+    Returns the switching times and acceleration steps of the unshaped,
+    rest-to-rest command. The command is bang-bang if Vmax is not reached before
+    the midpoint of the move. Otherwise, it is bang-coast-bang.
+
+    Arguments:
+      Amax : maximum accel, assumed to be symmetric +/-
+      Vmax : maximum velocity, assumed to be symmetric +/-
+      Distance : desired travel distance
+      StartTime : time the command should begin
+
+    Returns:
+      times : array of switch times
+      steps : array of the change in acceleration at each switch time
+    """
+    t1 = StartTime
+    t2 = (Vmax / Amax) + t1
+    t3 = (Distance / Vmax) + t1
+    t4 = (t2 + t3) - t1
+
+    if t3 <= t2:  # command should be bang-bang, not bang-coast-bang
+        t2 = np.sqrt(Distance / Amax) + t1
+        t3 = 2.0 * np.sqrt(Distance / Amax) + t1
+
+        times = np.array([t1, t2, t3])
+        steps = Amax * np.array([1.0, -2.0, 1.0])
+    else:         # command is bang-coast-bang
+        times = np.array([t1, t2, t3, t4])
+        steps = Amax * np.array([1.0, -1.0, -1.0, 1.0])
+
+    return times, steps
+
+
+class ShapedCommand(object):
+    """ Precomputed, piecewise constant acceleration command
+
+    The unshaped command is convolved with the shaper once, here in the
+    constructor. Calls with a scalar time use a binary search. Calls with an
+    array of times are evaluated all at once.
+    """
+
+    def __init__(self, Amax, Vmax, Distance, StartTime=0.0, Shaper=None):
+        """
+        Arguments:
+          Amax : maximum accel, assumed to be symmetric +/-
+          Vmax : maximum velocity, assumed to be symmetric +/-
+          Distance : desired travel distance
+          StartTime : time the command should begin
+          Shaper : array of the form [Ti Ai] - matches output format of shaper
+                   functions in toolbox. If None or empty, then unshaped is run.
+        """
+        base_times, base_steps = unshaped_switches(Amax, Vmax, Distance, StartTime)
+
+        if Shaper is None or len(Shaper) == 0:
+            Shaper = np.array([[0.0, 1.0]])
+
+        Shaper = np.atleast_2d(np.asarray(Shaper, dtype=float))
+        ts = Shaper[:, 0]  # Shaper impulse times
+        A = Shaper[:, 1]   # Shaper impulse amplitudes
+
+        # Every impulse in the shaper gets a delayed, scaled copy of the
+        # unshaped switches. The outer sum/product does this for all of them.
+        times = (base_times[np.newaxis, :] + ts[:, np.newaxis]).ravel()
+        steps = (base_steps[np.newaxis, :] * A[:, np.newaxis]).ravel()
+
+        # Sort, then form the acceleration level that holds *after* each switch
+        order = np.argsort(times, kind='mergesort')
+        self.switch_times = times[order]
+        self.levels = np.concatenate(([0.0], np.cumsum(steps[order])))
+
+        # The steps sum to zero. Clean up the round-off so the command is
+        # exactly zero once the move is over.
+        self.levels[-1] = 0.0
+
+        # A plain list is much faster than an ndarray for bisect on one time
+        self._switch_list = self.switch_times.tolist()
+        self._level_list = self.levels.tolist()
+
+        self.end_time = self.switch_times[-1]
+
+    def __call__(self, CurrTime):
+        """ Returns the acceleration at CurrTime, scalar or array """
+        if np.ndim(CurrTime) == 0:
+            # Matches the (CurrTime > t_switch) convention of accel_input()
+            return self._level_list[bisect.bisect_left(self._switch_list, CurrTime)]
+
+        return self.accel(CurrTime)
+
+    def accel(self, time):
+        """ Returns the acceleration for every entry in the array time """
+        index = np.searchsorted(self.switch_times, time, side='left')
+        return self.levels[index]
+
+
+def accel_input(Amax, Vmax, Distance, StartTime, CurrTime, Shaper):
+    """
+    Drop-in replacement for the original accel_input() function. Works for
+    shapers of any length and for a scalar or an array of CurrTime.
+
+    If you are going to evaluate the same command many times (inside an ODE
+    solver, for example), create a ShapedCommand once and call it instead.
+    """
+    return ShapedCommand(Amax, Vmax, Distance, StartTime, Shaper)(CurrTime)
+
+
+if __name__ == '__main__':
+    # Compare the vectorized and scalar evaluation for a ZV-shaped command
+    import matplotlib.pyplot as plt
+
+    f = 0.5       # frequency of the mode to suppress (Hz)
+    zeta = 0.0    # damping ratio of the mode to suppress
+
+    K = np.exp(-zeta * np.pi / np.sqrt(1 - zeta**2))
+    Shaper = np.array([[0.0, 1.0 / (1 + K)],
+                       [0.5 / (f * np.sqrt(1 - zeta**2)), K / (1 + K)]])
+
+    command = ShapedCommand(Amax=20.0, Vmax=1.0, Distance=1.5, StartTime=0.5, Shaper=Shaper)
+
+    time = np.linspace(0, 5, 5001)
+    accel = command(time)
+    accel_scalar = np.array([command(t) for t in time])
+
+    print('Max. difference between vector and scalar evaluation: {}'.format(np.max(np.abs(accel - accel_scalar))))
+
+    plt.plot(time, accel, linewidth=2)
+    plt.xlabel('Time (s)')
+    plt.ylabel('Acceleration Command (m/s$^2$)')
+    plt.show()
@@ -0,0 +1,204 @@
+#! /usr/bin/env python
+
+################################################################################
+# spatial_error.py
+#
+# Spatial tracking error between an actual trajectory and a desired, or
+# reference, path. For each actual point, this finds the nearest point on
+# the reference, either the nearest of its points or the nearest point on the
+# line segments joining them.
+#
+# The reference is indexed once, when a ReferencePath is created, so queries
+# don't compare every actual point to every part of the path:
+#   * A KD-tree over the points of the path
+#   * A KD-tree over the midpoints of short pieces of each segment. Long
+#     segments are split into several pieces, so every piece is short.
+#
+# For the segments, the distance to the nearest path point is an upper bound
+# on the distance to the nearest segment. Only the segments that have a piece
+# within that distance (plus the piece length) can be closer, so only those
+# are checked. All of the actual points are queried at once.
+#
+# For time-ordered data, like a GPS track following a route, the nearest
+# segment can be on a part of the path that was already passed, or not reached
+# yet. ReferencePath.windowed() only allows matches within a window ahead of
+# the last match.
+#
+# Created: 10/18/26
+#
+# Modified:
+#   *
+#
+# TODO:
+#   *
+################################################################################
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class ReferencePath(object):
+    """ A desired path, indexed for nearest point and segment queries """
+
+    def __init__(self, x, y, piece_length=None):
+        """ Initializing
+
+        Arguments:
+            x, y : arrays of the points of the path
+            piece_length : the maximum length of the pieces that segments are
+                           split into for the index. Defaults to the median
+                           segment length.
+        """
+        self.points = np.column_stack((np.asarray(x, dtype=float), np.asarray(y, dtype=float)))
+
+        self.starts = self.points[:-1]
+        self.directions = np.diff(self.points, axis=0)
+        self.lengths_squared = np.sum(self.directions**2, axis=1)
+
+        self.point_tree = cKDTree(self.points)
+
+        # Split each segment into pieces no longer than piece_length, then
+        # index the midpoints of the pieces
+        lengths = np.sqrt(self.lengths_squared)
+
+        if piece_length is None:
+            piece_length = np.median(lengths) if len(lengths) else 1.0
+        self.piece_length = max(piece_length, np.finfo(float).eps)
+
+        num_pieces = np.maximum(np.ceil(lengths / self.piece_length).astype(int), 1)
+        self._piece_segment = np.repeat(np.arange(len(lengths)), num_pieces)
+
+        first_piece = np.cumsum(num_pieces) - num_pieces
+        piece_number = np.arange(len(self._piece_segment)) - first_piece[self._piece_segment]
+        fraction = (piece_number + 0.5) / num_pieces[self._piece_segment]
+
+        midpoints = self.starts[self._piece_segment] + fraction[:, np.newaxis] * self.directions[self._piece_segment]
+        self.piece_tree = cKDTree(midpoints)
+
+        # Any point of a piece is within this distance of its midpoint
+        self._piece_radius = 0.5 * np.max(lengths / num_pieces) if len(lengths) else 0.0
+
+    def nearest_points(self, x, y):
+        """ Returns the distance to, and index of, the nearest path point for
+        each of the actual points x, y
+        """
+        query = np.column_stack((np.ravel(x), np.ravel(y)))
+        distances, indices = self.point_tree.query(query)
+        return distances, indices
+
+    def segment_distances(self, x, y, segments):
+        """ Returns the distance from each point to the matching segment, and
+        how far along the segment (0 to 1) the nearest point is
+        """
+        offset_x = x - self.starts[segments, 0]
+        offset_y = y - self.starts[segments, 1]
+
+        # Zero-length segments are just their start point
+        lengths_squared = self.lengths_squared[segments]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            fraction = (offset_x * self.directions[segments, 0]
+                        + offset_y * self.directions[segments, 1]) / lengths_squared
+        fraction = np.clip(np.nan_to_num(fraction), 0.0, 1.0)
+
+        distances = np.hypot(offset_x - fraction * self.directions[segments, 0],
+                             offset_y - fraction * self.directions[segments, 1])
+
+        return distances, fraction
+
+    def nearest_segments(self, x, y):
+        """ Returns the distance to the nearest point on the path's segments
+        for each of the actual points x, y
+
+        Returns:
+            distances : the distance to the nearest segment
+            segments : the index of that segment, from point i to point i + 1
+            fractions : how far along the segment (0 to 1) the nearest point is
+        """
+        x = np.ravel(np.asarray(x, dtype=float))
+        y = np.ravel(np.asarray(y, dtype=float))
+
+        upper_bounds, _ = self.nearest_points(x, y)
+
+        candidates = self.piece_tree.query_ball_point(np.column_stack((x, y)),
+                                                      upper_bounds + self._piece_radius + 1e-12)
+
+        # Flatten the candidates of all the points, so they are checked at once
+        counts = np.array([len(pieces) for pieces in candidates])
+        query = np.repeat(np.arange(len(x)), counts)
+        segments = self._piece_segment[np.concatenate(candidates).astype(int)]
+
+        distances, fractions = self.segment_distances(x[query], y[query], segments)
+
+        # Sort by query, then distance, so the first of each query is its nearest
+        order = np.lexsort((distances, query))
+        first = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        best = order[first]
+
+        return distances[best], segments[best], fractions[best]
+
+    def windowed(self, x, y, window=50, back=0, start_segment=0):
+        """ Like nearest_segments(), but for time-ordered points, where the path
+        should be followed in order
+
+        Each point is matched only to the segments from back segments behind
+        the last point's match to window segments ahead of it.
+
+        Arguments:
+            x, y : arrays of the actual points, in time order
+            window : the number of segments ahead of the last match to search
+            back : the number of segments behind the last match to allow
+            start_segment : the segment to start the search from
+        """
+        distances, segments, fractions = self.nearest_segments(x, y)
+        x = np.ravel(np.asarray(x, dtype=float))
+        y = np.ravel(np.asarray(y, dtype=float))
+
+        num_segments = len(self.starts)
+        last = start_segment
+
+        for index in range(len(x)):
+            low = max(last - back, 0)
+            high = min(last + window, num_segments - 1)
+
+            # Usually, the nearest segment overall is inside the window, so it
+            # is also the nearest in the window. Otherwise, search the window.
+            if not low <= segments[index] <= high:
+                window_segments = np.arange(low, high + 1)
+                window_distances, window_fractions = self.segment_distances(x[index], y[index], window_segments)
+                best = np.argmin(window_distances)
+
+                distances[index] = window_distances[best]
+                segments[index] = window_segments[best]
+                fractions[index] = window_fractions[best]
+
+            last = segments[index]
+
+        return distances, segments, fractions
+
+
+if __name__ == '__main__':
+    import time
+
+    # A dense reference path and an hour of 10Hz samples following it
+    num_path_points = 100000
+    path_time = np.linspace(0, 3600, num_path_points)
+    path = ReferencePath(path_time, 10 * np.sin(2 * np.pi * path_time / 600))
+
+    sample_time = np.arange(0, 3600, 0.1)
+    x_actual = sample_time + np.random.normal(0, 0.5, len(sample_time))
+    y_actual = 10 * np.sin(2 * np.pi * sample_time / 600) + np.random.normal(0, 0.5, len(sample_time))
+
+    start_time = time.perf_counter()
+    distances, segments, _ = path.nearest_segments(x_actual, y_actual)
+    print('Nearest segments for {} points in {:.2f} s'.format(len(x_actual), time.perf_counter() - start_time))
+
+    start_time = time.perf_counter()
+    windowed_distances, _, _ = path.windowed(x_actual, y_actual, window=500, back=50)
+    print('Windowed in {:.2f} s'.format(time.perf_counter() - start_time))
+
+    # Check a few against all of the segments
+    check = np.random.randint(0, len(x_actual), 100)
+    all_segments = np.arange(len(path.starts))
+    brute_force = [np.min(path.segment_distances(x_actual[ii], y_actual[ii], all_segments)[0]) for ii in check]
+    print('Max. difference from brute force: {:.2e}'.format(np.max(np.abs(distances[check] - brute_force))))
+    print('Mean spatial error: {:.3f}, windowed: {:.3f}'.format(np.mean(distances), np.mean(windowed_distances)))
@@ -0,0 +1,182 @@
+#! /usr/bin/env python
+
+###############################################################################
+# spectral_analysis.py
+#
+# Frequency content of many channels of data at once, like all of the sensors
+# from a test run. The data is a (channels, samples) array, and one call
+# returns the one-sided amplitude spectrum and the peak frequency of every
+# channel.
+#
+#   * Real FFTs, since the data is real, so only the one-sided half of the
+#     spectrum is computed
+#   * The data is zero-padded to the next length that the FFT is fast for,
+#     unless told not to. Lengths with large prime factors can be many times
+#     slower.
+#   * Windows are cached, so analyzing many records of the same length
+#     doesn't recompute them
+#   * An optional Welch-averaged mode, which averages the spectra of
+#     overlapping segments, for noisy data
+#
+# The amplitudes are scaled by the window, so a sine wave of amplitude A
+# shows a peak of about A.
+#
+# Created: 10/18/26
+#
+# Modified:
+#   * 10/18/26
+#       - A min_frequency above the whole spectrum raises a ValueError that
+#         says so, rather than one from np.argmax
+#
+# TODO:
+#   *
+###############################################################################
+
+from functools import lru_cache
+
+import numpy as np
+from scipy import fft, signal
+
+
+@lru_cache(maxsize=32)
+def get_window(window, length):
+    """ Returns a read-only, cached window of length samples
+
+    Arguments:
+        window : the name or tuple of a window for scipy.signal.get_window,
+                 or None for no window
+        length : the number of samples
+    """
+    if window is None:
+        values = np.ones(length)
+    else:
+        values = signal.get_window(window, length)
+
+    values.flags.writeable = False
+    return values
+
+
+def peak_frequencies(freq, mag, min_frequency=0.0, interpolate=True):
+    """ Returns the frequency of the largest peak of each channel
+
+    Arguments:
+        freq : the frequencies of the spectrum
+        mag : the magnitude of each channel, shape (channels, frequencies)
+        min_frequency : ignore peaks below this, like from a DC offset. A
+                        ValueError is raised if it's above every frequency.
+        interpolate : if True, fit a parabola through the largest bin and its
+                      neighbors, for better resolution than the bin spacing
+
+    Returns:
+        the peak frequency of each channel
+    """
+    mag = np.atleast_2d(mag)
+    first = np.searchsorted(freq, min_frequency)
+
+    if first >= len(freq):
+        raise ValueError('min_frequency ({} Hz) is above the highest frequency of the '
+                         'spectrum ({} Hz).'.format(min_frequency, freq[-1]))
+
+    index = first + np.argmax(mag[:, first:], axis=1)
+    peaks = freq[index]
+
+    if interpolate:
+        # Only bins with a neighbor on each side can be interpolated
+        inner = (index > 0) & (index < len(freq) - 1)
+        rows = np.nonzero(inner)[0]
+        center = index[inner]
+
+        left, middle, right = mag[rows, center - 1], mag[rows, center], mag[rows, center + 1]
+        denominator = left - 2 * middle + right
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            offset = np.where(denominator != 0, 0.5 * (left - right) / denominator, 0.0)
+
+        peaks = peaks.astype(float)
+        peaks[inner] = peaks[inner] + offset * (freq[1] - freq[0])
+
+    return peaks
+
+
+def amplitude_spectrum(data, sample_time, window='hann', remove_offset=True, fast_length=True,
+                       segment_length=None, overlap=None, min_frequency=0.0):
+    """ Computes the one-sided amplitude spectrum of each channel of data
+
+    Arguments:
+        data : array of shape (channels, samples), or (samples,) for one channel
+        sample_time : the time between samples (s)
+        window : the window to use. See get_window().
+        remove_offset : if True, remove the mean of each channel first
+        fast_length : if True, zero-pad to the next fast FFT length
+        segment_length : if given, use Welch's method, averaging the spectra
+                         of segments of this many samples
+        overlap : the number of samples shared by Welch segments. Defaults
+                  to half of segment_length.
+        min_frequency : ignore peaks below this when finding peak frequencies
+
+    Returns:
+        freq : the frequencies of the spectrum (Hz)
+        mag : the amplitude at each frequency, shape (channels, frequencies),
+              or (frequencies,) for one channel
+        peaks : the frequency of the largest peak of each channel (Hz)
+    """
+    data = np.asarray(data, dtype=float)
+    one_channel = data.ndim == 1
+    data = np.atleast_2d(data)
+
+    if segment_length is None:
+        num_samples = data.shape[-1]
+        window_values = get_window(window, num_samples)
+
+        if remove_offset:
+            data = data - np.mean(data, axis=-1, keepdims=True)
+
+        num_fft = fft.next_fast_len(num_samples, real=True) if fast_length else num_samples
+
+        freq = fft.rfftfreq(num_fft, sample_time)
+        mag = (2.0 / np.sum(window_values)) * np.abs(fft.rfft(data * window_values, n=num_fft, axis=-1))
+    else:
+        if overlap is None:
+            overlap = segment_length // 2
+
+        num_fft = fft.next_fast_len(segment_length, real=True) if fast_length else segment_length
+        window_values = get_window(window, segment_length)
+
+        # With spectrum scaling, a sine wave's peak is its RMS value squared
+        freq, power = signal.welch(data, 1.0 / sample_time, window=window_values,
+                                   nperseg=segment_length, noverlap=overlap, nfft=num_fft,
+                                   detrend='constant' if remove_offset else False,
+                                   scaling='spectrum', axis=-1)
+        mag = np.sqrt(2.0 * power)
+
+    peaks = peak_frequencies(freq, mag, min_frequency)
+
+    if one_channel:
+        return freq, mag[0], peaks[0]
+
+    return freq, mag, peaks
+
+
+if __name__ == '__main__':
+    import time
+
+    # Dozens of noisy channels, each with its own frequency
+    sample_time = 0.001
+    t = np.arange(0, 60, sample_time)
+    num_channels = 48
+    true_frequencies = np.linspace(1.0, 20.0, num_channels)
+
+    data = (np.sin(2 * np.pi * true_frequencies[:, np.newaxis] * t)
+            + 0.5 * np.random.randn(num_channels, len(t)))
+
+    start_time = time.perf_counter()
+    freq, mag, peaks = amplitude_spectrum(data, sample_time)
+    print('FFT of {} channels in {:.3f} s'.format(num_channels, time.perf_counter() - start_time))
+    print('Max. peak frequency error: {:.4f} Hz, mean amplitude: {:.3f}'.format(
+          np.max(np.abs(peaks - true_frequencies)), np.mean(np.max(mag, axis=1))))
+
+    start_time = time.perf_counter()
+    freq, mag, peaks = amplitude_spectrum(data, sample_time, segment_length=8192)
+    print('Welch of {} channels in {:.3f} s'.format(num_channels, time.perf_counter() - start_time))
+    print('Max. peak frequency error: {:.4f} Hz, mean amplitude: {:.3f}'.format(
+          np.max(np.abs(peaks - true_frequencies)), np.mean(np.max(mag, axis=1))))
@@ -20,9 +20,14 @@
 #
 # Modified:
 #   * 10/10/19 - JEV - Added spatial error calculations
+#   * 10/18/26
+#       - Use the indexed ReferencePath for the spatial errors
+#       - Limit the segment errors to the segments, not the lines through them
+#       - Added a sliding window version for spatial error
+#       - Added the streaming metrics from error_metrics.py
 #
 # TODO:
-#   * 10/01/19 - JEV - Implement a sliding window version for spatial error 
+#   * 
 #
 ################################################################################
 
@@ -30,6 +35,12 @@ import numpy as np
 import matplotlib.pyplot as plt
 from scipy import interpolate
 
+from error_metrics import ErrorMetrics
+from spatial_error import ReferencePath
+
+# np.trapz was renamed np.trapezoid in NumPy 2.0
+trapezoid = getattr(np, 'trapezoid', None) or np.trapz
+
 # Define an array representing the time 
 DURATION = 5        # seconds of data to use
 SAMPLE_TIME = 0.1   # Sampling time
@@ -58,27 +69,42 @@ temporal_error = np.sqrt((x_desired - x_actual)**2 + (y_desired - y_actual)**2)
 # Now, calculate the integral square error (ISE). We'll calculate the total over 
 # the entire time interval and the running total.
 integral_square_error_overTime = np.cumsum(temporal_error**2) * SAMPLE_TIME
-integral_square_error_total = np.trapz(temporal_error**2, dx=SAMPLE_TIME)
+integral_square_error_total = trapezoid(temporal_error**2, dx=SAMPLE_TIME)
 
 # Now, calculate the integral absolute error (IAE). We'll calculate the total 
 # over the entire time interval and the running total.
 integral_absolute_error_overTime = np.cumsum(temporal_error) * SAMPLE_TIME
-integral_absolute_error_total = np.trapz(temporal_error, dx=SAMPLE_TIME)
+integral_absolute_error_total = trapezoid(temporal_error, dx=SAMPLE_TIME)
 
 # Now, calculate the integral time squared (ITSE) error. We'll calculate the 
 # total over the entire time interval and the running total.
 integral_time_sqaured_overTime = np.cumsum(time * temporal_error**2) * SAMPLE_TIME
-integral_time_sqaured_total = np.trapz(time * temporal_error**2, dx=SAMPLE_TIME)
+integral_time_sqaured_total = trapezoid(time * temporal_error**2, dx=SAMPLE_TIME)
 
 # Now, calculate the integral time absolute (ITAE) error. We'll calculate the 
 # total over the entire time interval and the running total.
 integral_time_absolute_overTime = np.cumsum(time * temporal_error) * SAMPLE_TIME
-integral_time_absolute_total = np.trapz(time * temporal_error, dx=SAMPLE_TIME)
+integral_time_absolute_total = trapezoid(time * temporal_error, dx=SAMPLE_TIME)
 
 # We can also calculate root-mean-square (RMS) error over the full trajectory 
 # using the temporal error measurement
 rms = np.sqrt(np.mean(temporal_error**2))
 
+# All of those need the full arrays in memory. For a running controller or a
+# long log file, the ErrorMetrics class in error_metrics.py calculates the 
+# same metrics as the samples arrive, in chunks of any size. Here, we'll feed
+# it 10 samples at a time and also get the running totals at each sample.
+streamed_metrics = ErrorMetrics(SAMPLE_TIME)
+streamed_running = {'ise': [], 'iae': [], 'itse': [], 'itae': []}
+
+for error_chunk in np.array_split(temporal_error, len(temporal_error) // 10):
+    running = streamed_metrics.update(error_chunk, return_running=True)
+
+    for name, values in running.items():
+        streamed_running[name].append(values)
+
+streamed_running = {name: np.concatenate(values) for name, values in streamed_running.items()}
+
 
 # ----- Spatial Tracking Error -----
 # Calculating the spatial tracking error is more complex. We need to find the 
@@ -91,18 +117,13 @@ rms = np.sqrt(np.mean(temporal_error**2))
 
 # Let's first implement the naive version. It can be a decent approximation if 
 # the spacing between the points is fine enough and the trajectories are "simple"
-# NOTE: This for loop implementation will not scale up well
-spatial_naive = np.zeros_like(x_actual)
-error_index_naive = np.zeros_like(x_actual)
+#
+# Rather than comparing each actual point to every desired point, we index the
+# desired trajectory once, using the ReferencePath class in spatial_error.py. 
+# It uses a KD-tree, so all of the actual points are matched in one query.
+desired_path = ReferencePath(x_desired, y_desired)
 
-for index, _ in enumerate(x_actual):
-    spatial_naive[index] = np.min(np.sqrt((x_desired - x_actual[index])**2 +
-                                          (y_desired - y_actual[index])**2))
-    
-    # We'll also save the index of the point in desired trajetory that was the
-    # minimum error
-    error_index_naive[index] = np.argmin(np.sqrt((x_desired - x_actual[index])**2 +
-                                                 (y_desired - y_actual[index])**2))
+spatial_naive, error_index_naive = desired_path.nearest_points(x_actual, y_actual)
 
 
 # A slightly more sophistaiced way is to generate a higher density array  
@@ -140,78 +161,31 @@ y_desired_interp = y_desired_func(time_interp)
 
 # Let's first implement the version using the interpolated desired trajectory. 
 # We'll use the same algorithm as the naive version. 
-# NOTE: As with the naive version, this for loop implementation will not scale up well
-spatial_interp = np.zeros_like(x_actual)
-error_index_interp = np.zeros_like(x_actual)
+desired_path_interp = ReferencePath(x_desired_interp, y_desired_interp)
 
-for index, _ in enumerate(x_actual):
-    spatial_interp[index] = np.min(np.sqrt((x_desired_interp - x_actual[index])**2 +
-                                          (y_desired_interp - y_actual[index])**2))
-    
-    # We'll also save the index of the point in desired trajetory that was the
-    # minimum error
-    error_index_interp[index] = np.argmin(np.sqrt((x_desired_interp - x_actual[index])**2 +
-                                                 (y_desired_interp - y_actual[index])**2))
+spatial_interp, error_index_interp = desired_path_interp.nearest_points(x_actual, y_actual)
 
 
 
 # A more sophisticated (and perhaps necessary, depending on the spacing of the
-# data) way is to generate line segments representing lines connecting each
-# successive pairs on points on the desired trajectory. Then, we'll look for the
-# closest point on each of those lines to the current point in the actual 
-# trajectory. We'll have to be careful, because the lines we define will extend
-# beyond the two poitns on the desired trajectory used to define them.
-# TODO: 10/01/19 - JEV - Implement this fix
-#
-# The wikipedia entry on this actually does a 
-# pretty good job of summarizing the various ways to do this:
+# data) way is to use the line segments connecting each successive pair of
+# points on the desired trajectory. Then, we'll look for the closest point on
+# each of those segments to the current point in the actual trajectory. The
+# closest point is limited to the segment itself, not the infinite line through
+# its two points. The wikipedia entry on this does a pretty good job of
+# summarizing the various ways to do this:
 #
 #   https://en.wikipedia.org/wiki/Distance_from_a_point_to_a_line
 #
-# We will implement this version:
-#
-#   https://en.wikipedia.org/wiki/Distance_from_a_point_to_a_line#Line_defined_by_two_points
-#
-# using every pair of two points on the desired trajectory and calculating the 
-# distance to every one of those segments from the current point on the actual
-# trajectory. We'll select the minimum value.
-#
-# In general, we would want to be be more careful than I am here about "where" 
-# we connect to the desired path. For example, we are not taking any precautions
-# against connecting to some point that the actual trajectory should have already
-# passed.
-#
-# For example, you'll notice that the error reported by this method is much 
-# lower than that calculated by the methods above. We're matching *any* point 
-# on the lines defined by the pairs of points of the desired trajectory, which
-# extend beyond the poitns themselves.
-#
-# TODO: 10/01/19 - JEV - Add an example using a sliding window on the desired 
-# trajectory to demonstrate one way to address this issue.
-
-# We'll have 1 less point than array length because we need two points to define
-# each line segment
-spatial_error = np.zeros(len(x_actual)-1)
-spatial_error_index = np.zeros(len(x_actual)-1)
-error_array = np.zeros_like(spatial_error)
-
-# NOTE: This for loop implementation will not scale up well
-for act_index, _ in enumerate(spatial_error):
-    # Zero the error array for the current acutal trajetory part
-    error_array = np.zeros_like(spatial_error)
-
-    for index, _ in enumerate(spatial_error):
-        x_diff = x_desired[index + 1] - x_desired[index]
-        y_diff = y_desired[index + 1] - y_desired[index]
-        den = np.sqrt(x_diff**2 + y_diff**2)
-        
-        num = np.abs(y_diff * x_actual[act_index] - 
-                     x_diff * y_actual[act_index] +
-                     x_desired[index + 1] * y_desired[index] -
-                     y_desired[index + 1] * x_desired[index])
-        
-        error_array[index] = num / den
-
-    spatial_error[act_index] = np.min(error_array)
-    spatial_error_index[act_index] = np.argmin(error_array)
-
+# ReferencePath only checks the segments near each actual point, so we don't
+# need to calculate the distance to every segment.
+spatial_error, spatial_error_index, _ = desired_path.nearest_segments(x_actual, y_actual)
+
+# In general, we would want to be be more careful than that about "where" we
+# connect to the desired path. For example, we are not taking any precautions
+# against connecting to some point that the actual trajectory should have
+# already passed. For time-ordered data, we can use a sliding window on the
+# desired trajectory. Each actual point is only matched to segments within
+# a window ahead of where the last one was matched.
+spatial_error_windowed, spatial_error_index_windowed, _ = desired_path.windowed(
+    x_actual, y_actual, window=10, back=1)
@@ -0,0 +1,308 @@
+#! /usr/bin/env python
+
+###############################################################################
+# explicit_mpc.py
+#
+# Explicit, or precomputed, Model Predictive Control for small linear systems
+#
+# For a linear system with a quadratic cost and linear limits, the optimal MPC
+# input is a piecewise-affine function of the current state. In each region of
+# the state space, the same set of limits is active, and
+#   u = K x + k
+# Here, the regions are found offline. The condensed MPC problem from
+# CondensedMPC is solved at each point of a grid over the states. The active
+# limits at the solution then give the exact affine law for that region and
+# the inequalities, A x <= b, that bound it.
+#
+# At runtime, there is no optimization. The grid cell nearest the state gives
+# a candidate region. If the state is inside it, u = K x + k. If not, the
+# other regions are checked. So, the controller can run at loop rates that an
+# online solver can't meet on small targets.
+#
+# The table can be saved to a compressed .npz file and loaded on the target.
+# Only NumPy is needed to evaluate it.
+#
+# The reference is fixed when the table is built. For plants like the mass in
+# mpc_mass_positionControl_velConstraint.py, where the dynamics don't depend
+# on position, a table built for a reference of 0 can be used for any
+# setpoint by evaluating it at the position error.
+#
+# Created: 10/18/26
+#
+# Modified:
+#   *
+#
+# TODO:
+#   *
+###############################################################################
+
+import itertools
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _affine_law(H_inverse, F_x, f_r, G, w, S, active):
+    """ Returns the affine law and region for one set of active limits
+
+    For the condensed problem,
+        minimize 1/2 U^T H U + (F_x x + f_r)^T U, subject to G U <= w + S x
+    with the limits in active held as equalities, both the inputs and the
+    Lagrange multipliers are affine in the state, x.
+
+    Returns:
+        K_U, k_U : the input sequence, U = K_U x + k_U
+        A, b : the region where this law is optimal, A x <= b
+    """
+    if len(active):
+        G_a = G[active]
+        M_inverse = np.linalg.pinv(G_a @ H_inverse @ G_a.T)
+
+        # The multipliers, lambda = L_x x + l_c
+        L_x = -M_inverse @ (S[active] + G_a @ H_inverse @ F_x)
+        l_c = -M_inverse @ (w[active] + G_a @ H_inverse @ f_r)
+
+        K_U = -H_inverse @ (F_x + G_a.T @ L_x)
+        k_U = -H_inverse @ (f_r + G_a.T @ l_c)
+    else:
+        K_U = -H_inverse @ F_x
+        k_U = -H_inverse @ f_r
+
+    inactive = np.setdiff1d(np.arange(len(w)), active)
+
+    # The inactive limits must hold, and the multipliers must be >= 0
+    A = G[inactive] @ K_U - S[inactive]
+    b = w[inactive] - G[inactive] @ k_U
+
+    if len(active):
+        A = np.vstack((A, -L_x))
+        b = np.concatenate((b, l_c))
+
+    # Drop the rows that don't depend on the state and always hold
+    keep = np.any(np.abs(A) > 1e-12, axis=1) | (b < 0)
+
+    return K_U, k_U, A[keep], b[keep]
+
+
+class ExplicitMPC(object):
+    """ A precomputed, piecewise-affine MPC law and the lookup to evaluate it """
+
+    def __init__(self, K, k, A, b, region_grid, grid_min, grid_step, u_max=None):
+        """ Initializing. Use from_mpc() or load() to create one.
+
+        Arguments:
+            K, k : the law in each region, u = K[r] x + k[r]
+            A, b : the inequalities of each region, A[r] x <= b[r]. Regions
+                   with fewer inequalities are padded with 0 x <= inf.
+            region_grid : the region at each grid point, -1 if none
+            grid_min : the state at the first grid point
+            grid_step : the spacing of the grid in each state
+            u_max : used to clip the input outside the gridded states
+        """
+        self.K = np.asarray(K, dtype=float)
+        self.k = np.asarray(k, dtype=float)
+        self.A = np.asarray(A, dtype=float)
+        self.b = np.asarray(b, dtype=float)
+        self.region_grid = np.asarray(region_grid, dtype=int)
+        self.grid_min = np.asarray(grid_min, dtype=float)
+        self.grid_step = np.asarray(grid_step, dtype=float)
+        self.u_max = None if u_max is None else np.asarray(u_max, dtype=float)
+
+        self._grid_max_index = np.array(self.region_grid.shape) - 1
+
+        # Number of evaluations that weren't in the candidate region, and
+        # that weren't in any region
+        self.num_searches = 0
+        self.num_misses = 0
+
+    @property
+    def num_regions(self):
+        return len(self.K)
+
+    @classmethod
+    def from_mpc(cls, mpc, reference, grid_min, grid_max, num_points, tol=1e-6):
+        """ Builds the table by solving mpc over a grid of states
+
+        Arguments:
+            mpc : a CondensedMPC
+            reference : the desired state, as for mpc.solve()
+            grid_min, grid_max : the range of each state to cover
+            num_points : the number of grid points in each state, a scalar
+                         or one per state
+            tol : how close a limit must be to be considered active
+        """
+        n, m = mpc.num_states, mpc.num_inputs
+
+        grid_min = np.asarray(grid_min, dtype=float)
+        grid_max = np.asarray(grid_max, dtype=float)
+        num_points = np.broadcast_to(np.asarray(num_points, dtype=int), (n,))
+        grid_step = (grid_max - grid_min) / np.maximum(num_points - 1, 1)
+
+        reference = np.asarray(reference, dtype=float)
+        if reference.ndim == 1:
+            reference = np.tile(reference[:, np.newaxis], (1, mpc.prediction_horizon))
+
+        # The condensed problem, with f = F_x x + f_r
+        H_inverse = np.linalg.inv(mpc.H)
+        F_x = mpc.F @ mpc.Phi
+        f_r = -mpc.F @ reference.T.ravel()
+        G, w, S = mpc.constraint_matrices()
+
+        laws = []               # (K, k, A, b) of each region
+        region_of_active = {}   # active limits -> region number
+        region_grid = -np.ones(num_points, dtype=int)
+
+        # SLSQP often stops just short of its tolerance at these solutions.
+        # Each one is checked below instead, so don't warn about them.
+        mpc_logger = logging.getLogger(type(mpc).__module__)
+        log_level = mpc_logger.level
+        mpc_logger.setLevel(logging.ERROR)
+
+        try:
+            for cell in itertools.product(*[range(num) for num in num_points]):
+                x = grid_min + grid_step * np.array(cell)
+
+                mpc.solve(x, reference)
+
+                slack = w + S @ x - G @ mpc.U
+                if np.any(slack < -tol * (1 + np.abs(w))):
+                    # Usually, no input can meet the state limits from here
+                    continue
+
+                active = tuple(np.flatnonzero(slack < tol * (1 + np.abs(w))))
+
+                if active not in region_of_active:
+                    K_U, k_U, A, b = _affine_law(H_inverse, F_x, f_r, G, w, S, list(active))
+
+                    # If the solution wasn't accurate enough to find the
+                    # right active limits, x won't be in the region
+                    if np.any(A @ x > b + tol * (1 + np.abs(b))):
+                        logger.debug('Skipping grid point %s, not inside its region', x)
+                        continue
+
+                    region_of_active[active] = len(laws)
+                    laws.append((K_U[:m], k_U[:m], A, b))
+
+                region_grid[cell] = region_of_active[active]
+        finally:
+            mpc_logger.setLevel(log_level)
+
+        if not laws:
+            raise ValueError('The MPC problem could not be solved anywhere on the grid.')
+
+        # Pad the inequalities, so that all regions can be checked at once
+        max_rows = max(len(law[3]) for law in laws)
+        A = np.zeros((len(laws), max_rows, n))
+        b = np.full((len(laws), max_rows), np.inf)
+
+        for index, (_, _, A_r, b_r) in enumerate(laws):
+            A[index, :len(b_r)] = A_r
+            b[index, :len(b_r)] = b_r
+
+        u_max = None if mpc.u_max is None else mpc.u_max[:m]
+
+        return cls(np.array([law[0] for law in laws]), np.array([law[1] for law in laws]),
+                   A, b, region_grid, grid_min, grid_step, u_max)
+
+    def evaluate(self, x, tol=1e-8):
+        """ Returns the optimal input at the state x """
+        x = np.asarray(x, dtype=float)
+
+        cell = np.rint((x - self.grid_min) / self.grid_step).astype(int)
+        np.clip(cell, 0, self._grid_max_index, out=cell)
+        region = self.region_grid[tuple(cell)]
+
+        if region < 0 or np.any(self.A[region] @ x > self.b[region] + tol):
+            # Not in the candidate region, so find the one it is in
+            self.num_searches += 1
+            violation = np.max(self.A @ x - self.b, axis=1)
+            best = np.argmin(violation)
+
+            if violation[best] > tol:
+                # Outside all of the regions, so probably outside the grid
+                self.num_misses += 1
+
+                if region < 0:
+                    region = best
+            else:
+                region = best
+
+        u = self.K[region] @ x + self.k[region]
+
+        if self.u_max is not None:
+            np.clip(u, -self.u_max, self.u_max, out=u)
+
+        return u
+
+    def save(self, filename):
+        """ Saves the table to a compressed .npz file """
+        arrays = {'K': self.K, 'k': self.k, 'A': self.A, 'b': self.b,
+                  'region_grid': self.region_grid,
+                  'grid_min': self.grid_min, 'grid_step': self.grid_step}
+
+        if self.u_max is not None:
+            arrays['u_max'] = self.u_max
+
+        np.savez_compressed(filename, **arrays)
+
+    @classmethod
+    def load(cls, filename):
+        """ Loads a table saved by save() """
+        with np.load(filename) as data:
+            return cls(data['K'], data['k'], data['A'], data['b'],
+                       data['region_grid'], data['grid_min'], data['grid_step'],
+                       data['u_max'] if 'u_max' in data else None)
+
+
+if __name__ == '__main__':
+    # Compare the explicit and online MPC for the planar crane, as in mpc_planarCrane.py
+    import time
+    import control
+
+    from mpc_controller import CondensedMPC
+
+    dt = 0.1
+    l = 1.0
+    g = 9.81
+    theta_max = np.deg2rad(5)
+    V_max = 1.25
+
+    A = np.array([[0, 1, 0, 0], [-g/l, 0, 0, 0], [0, 0, 0, 1], [0, 0, 0, 0]])
+    B = np.array([[0], [1/l], [0], [1]])
+    digital_sys = control.sample_system(control.ss(A, B, np.eye(4), np.zeros((4, 1))), dt)
+
+    mpc = CondensedMPC(digital_sys.A, digital_sys.B, Q=np.diag([100, 10, 10, 0]), R=[[0.0001]],
+                       prediction_horizon=20, u_max=10, state_max={0: theta_max, 3: V_max},
+                       ftol=1e-12, maxiter=1000)
+
+    reference = [0, 0, 1.0, 0]
+
+    start_time = time.perf_counter()
+    explicit_mpc = ExplicitMPC.from_mpc(mpc, reference,
+                                        grid_min=[-theta_max, -0.5, -0.25, -V_max],
+                                        grid_max=[theta_max, 0.5, 1.25, V_max],
+                                        num_points=[7, 7, 11, 7])
+    print('Built {} regions in {:.1f} s'.format(explicit_mpc.num_regions, time.perf_counter() - start_time))
+
+    x_online = np.zeros(4)
+    x_explicit = np.zeros(4)
+    max_difference = 0.0
+    eval_times = []
+
+    for _ in range(100):
+        u_online = mpc.solve(x_online, reference)
+
+        start_time = time.perf_counter()
+        u_explicit = explicit_mpc.evaluate(x_explicit)
+        eval_times.append(time.perf_counter() - start_time)
+
+        max_difference = max(max_difference, np.max(np.abs(u_online - u_explicit)))
+        x_online = digital_sys.A @ x_online + digital_sys.B @ u_online
+        x_explicit = digital_sys.A @ x_explicit + digital_sys.B @ u_explicit
+
+    print('Max. difference in input: {:.3e}'.format(max_difference))
+    print('Final states, online: {}, explicit: {}'.format(x_online, x_explicit))
+    print('Median evaluation time: {:.1f} us, {} searches, {} misses'.format(
+        1e6 * np.median(eval_times), explicit_mpc.num_searches, explicit_mpc.num_misses))
@@ -0,0 +1,438 @@
+#! /usr/bin/env python
+
+###############################################################################
+# mpc_controller.py
+#
+# Model Predictive Controllers for discrete, linear systems
+#
+# There are two versions here:
+#   * LinearMPC - uses cvxpy
+#   * CondensedMPC - uses only NumPy and scipy, for when cvxpy isn't available
+#
+# The scripts in this folder build a new list of cvxpy problems at every sample
+# of the receding-horizon loop, so they pay the full cost of setting up the
+# problem every time. Here, the quadratic program is built only once. The
+# initial state and the reference are cvxpy Parameters. So, at each sample we
+# just update their values and re-solve, warm starting from the last solution.
+#
+# The time taken by each solve is saved, so we can check whether the
+# controller can keep up with the sampling rate. Both the total time and the
+# time reported by the solver itself are kept. For small problems, most of the
+# total is cvxpy mapping the new parameter values into the solver's format.
+#
+# CondensedMPC removes the states from the problem. Over the horizon, they are
+#   X = Phi x_0 + Gamma U
+# so the cost is a quadratic in the inputs, U, alone. Its Hessian, H, and
+# most of its gradient are computed once, when it's created. If the
+# unconstrained solution, U = -H^-1 f, is within the limits, it is used
+# directly. Otherwise, SLSQP solves the constrained problem, using the exact
+# gradients and warm started from the last solution.
+#
+# cvxpy - https://www.cvxpy.org
+#
+# Created: 10/18/26
+#
+# Modified:
+#   *
+#
+# TODO:
+#   *
+###############################################################################
+
+import logging
+import time
+
+import numpy as np
+from scipy.linalg import cho_factor, cho_solve
+from scipy.optimize import minimize
+
+try:
+    import cvxpy as cvx
+except ImportError:
+    cvx = None  # CondensedMPC can still be used
+
+logger = logging.getLogger(__name__)
+
+# Methods of scipy.optimize.minimize that use the Hessian
+HESSIAN_METHODS = ('Newton-CG', 'dogleg', 'trust-ncg', 'trust-krylov',
+                   'trust-exact', 'trust-constr')
+
+
+def _matrix_square_root(Q):
+    """ Returns L, so that L.T @ L = Q, for a symmetric, positive semidefinite Q
+
+    Unlike the Cholesky factor, this works when some states have zero weight.
+    """
+    Q = np.atleast_2d(np.asarray(Q, dtype=float))
+    eigenvalues, eigenvectors = np.linalg.eigh((Q + Q.T) / 2)
+    return np.diag(np.sqrt(np.clip(eigenvalues, 0, None))) @ eigenvectors.T
+
+
+def _time_stats(times):
+    """ Returns a dict of statistics of an array of times """
+    if len(times) == 0:
+        return {}
+
+    return {'num_solves': len(times),
+            'mean': np.mean(times),
+            'median': np.median(times),
+            'p95': np.percentile(times, 95),
+            'max': np.max(times)}
+
+
+def _reference_array(reference, num_states, prediction_horizon):
+    """ Returns the reference as a (num_states, prediction_horizon) array """
+    reference = np.asarray(reference, dtype=float)
+    if reference.ndim == 1:
+        reference = np.tile(reference[:, np.newaxis], (1, prediction_horizon))
+    return reference
+
+
+class LinearMPC(object):
+    """ MPC for x[k+1] = Ad x[k] + Bd u[k], built once and re-solved each sample
+
+    The cost over the prediction horizon is
+
+        sum_k (x[k+1] - r[k])^T Q (x[k+1] - r[k]) + u[k]^T R u[k]
+
+    subject to the dynamics and, optionally, symmetric limits on the inputs
+    and on any of the states.
+    """
+
+    def __init__(self, Ad, Bd, Q, R, prediction_horizon, u_max=None,
+                 state_max=None, solver='OSQP', **solver_kwargs):
+        """ Initializing
+
+        Arguments:
+            Ad, Bd : the discrete state and input matrices
+            Q : state weighting matrix, num_states x num_states
+            R : input weighting matrix, num_inputs x num_inputs
+            prediction_horizon : number of samples to use in prediction
+            u_max : maximum magnitude of each input, scalar or array
+            state_max : dict of {state index: maximum magnitude} for any
+                        states that should be limited
+            solver : the cvxpy solver to use. OSQP supports warm starting.
+            solver_kwargs : passed to the solver at every solve
+        """
+        if cvx is None:
+            raise ImportError('LinearMPC needs cvxpy. Use CondensedMPC without it.')
+
+        self.Ad = np.atleast_2d(np.asarray(Ad, dtype=float))
+        self.Bd = np.asarray(Bd, dtype=float).reshape(self.Ad.shape[0], -1)
+        self.num_states, self.num_inputs = self.Bd.shape
+        self.prediction_horizon = N = prediction_horizon
+
+        self.solver = solver
+        self.solver_kwargs = solver_kwargs
+
+        # The values of these are updated at every sample
+        self.x_0 = cvx.Parameter(self.num_states)
+        self.reference = cvx.Parameter((self.num_states, N))
+
+        self.x = cvx.Variable((self.num_states, N + 1))
+        self.u = cvx.Variable((self.num_inputs, N))
+
+        Q_sqrt = _matrix_square_root(Q)
+        R_sqrt = _matrix_square_root(R)
+
+        cost = (cvx.sum_squares(Q_sqrt @ (self.x[:, 1:] - self.reference))
+                + cvx.sum_squares(R_sqrt @ self.u))
+
+        constraints = [self.x[:, 0] == self.x_0,
+                       self.x[:, 1:] == self.Ad @ self.x[:, :-1] + self.Bd @ self.u]
+
+        if u_max is not None:
+            u_max = np.broadcast_to(np.asarray(u_max, dtype=float), (self.num_inputs,))
+            constraints += [cvx.abs(self.u) <= np.tile(u_max[:, np.newaxis], (1, N))]
+
+        if state_max is not None:
+            for index, limit in state_max.items():
+                constraints += [cvx.abs(self.x[index, 1:]) <= limit]
+
+        self.problem = cvx.Problem(cvx.Minimize(cost), constraints)
+
+        # Check this now, rather than failing at the first solve
+        if not self.problem.is_dcp(dpp=True):
+            raise ValueError('The MPC problem is not DPP, so it would be rebuilt at every solve.')
+
+        self.solve_times = []       # total time of each solve (s)
+        self.solver_times = []      # time reported by the solver (s)
+        self.status = None
+
+    def solve(self, x_0, reference):
+        """ Solve for the optimal input sequence from the current state
+
+        Arguments:
+            x_0 : the current state
+            reference : the desired state, either a constant (num_states,)
+                        array or a (num_states, prediction_horizon) trajectory
+
+        Returns:
+            the first input of the optimal sequence, the one to apply now
+        """
+        self.x_0.value = np.asarray(x_0, dtype=float)
+
+        self.reference.value = _reference_array(reference, self.num_states,
+                                                self.prediction_horizon)
+
+        start_time = time.perf_counter()
+        self.problem.solve(solver=self.solver, warm_start=True, **self.solver_kwargs)
+        self.solve_times.append(time.perf_counter() - start_time)
+        self.solver_times.append(self.problem.solver_stats.solve_time)
+
+        self.status = self.problem.status
+
+        if self.u.value is None:
+            raise RuntimeError('MPC solve failed with status: {}'.format(self.status))
+
+        return self.u.value[:, 0]
+
+    @property
+    def predicted_states(self):
+        """ The predicted states over the horizon, from the last solve """
+        return self.x.value
+
+    @property
+    def predicted_inputs(self):
+        """ The optimal input sequence, from the last solve """
+        return self.u.value
+
+    def solve_time_stats(self, skip_first=True, solver_only=False):
+        """ Returns a dict of statistics of the solve times (s)
+
+        Arguments:
+            skip_first : the first solve includes compiling the problem, so
+                         it is not included by default
+            solver_only : if True, use the times reported by the solver,
+                          rather than the total time of each solve
+        """
+        times = self.solver_times if solver_only else self.solve_times
+        return _time_stats([t for t in times[int(skip_first):] if t is not None])
+
+
+class CondensedMPC(object):
+    """ The same MPC as LinearMPC, but condensed to a QP in the inputs alone
+
+    The states are written in terms of the inputs using the prediction
+    matrices, so only the inputs are optimized. The inputs limits are then
+    simple bounds and the state limits are linear inequalities.
+    """
+
+    def __init__(self, Ad, Bd, Q, R, prediction_horizon, u_max=None,
+                 state_max=None, method='SLSQP', **solver_options):
+        """ Initializing
+
+        Arguments:
+            Ad, Bd, Q, R, prediction_horizon, u_max, state_max : as for LinearMPC
+            method : the scipy.optimize.minimize method used when the limits
+                     are active. It must support bounds and, if state_max
+                     is used, constraints.
+            solver_options : the options passed to minimize
+        """
+        self.Ad = np.atleast_2d(np.asarray(Ad, dtype=float))
+        self.Bd = np.asarray(Bd, dtype=float).reshape(self.Ad.shape[0], -1)
+        self.num_states, self.num_inputs = n, m = self.Bd.shape
+        self.prediction_horizon = N = prediction_horizon
+
+        self.method = method
+        self.solver_options = solver_options
+
+        # Prediction matrices, so that the stacked states x[1], ..., x[N] are
+        # X = Phi x_0 + Gamma U, with U the stacked inputs u[0], ..., u[N-1]
+        powers = [np.eye(n)]
+        for _ in range(N):
+            powers.append(self.Ad @ powers[-1])
+
+        self.Phi = np.vstack(powers[1:])
+        self.Gamma = np.zeros((N * n, N * m))
+        for row in range(N):
+            for col in range(row + 1):
+                self.Gamma[row*n:(row + 1)*n, col*m:(col + 1)*m] = powers[row - col] @ self.Bd
+
+        # The cost is 1/2 U^T H U + f^T U, plus a constant, with
+        # f = F (Phi x_0 - reference)
+        Q_bar = np.kron(np.eye(N), np.asarray(Q, dtype=float))
+        R_bar = np.kron(np.eye(N), np.atleast_2d(np.asarray(R, dtype=float)))
+
+        self.F = self.Gamma.T @ Q_bar
+        self.H = self.F @ self.Gamma + R_bar
+        self._H_factor = cho_factor(self.H)
+
+        if u_max is not None:
+            u_max = np.tile(np.broadcast_to(np.asarray(u_max, dtype=float), (m,)), N)
+            self.u_max = u_max
+            self.bounds = list(zip(-u_max, u_max))
+        else:
+            self.u_max = None
+            self.bounds = None
+
+        # For the state limits, |Phi_s x_0 + Gamma_s U| <= limits, where the
+        # _s rows are those of the limited states
+        if state_max:
+            rows = np.array([k*n + index for k in range(N) for index in state_max])
+            self._Phi_limited = self.Phi[rows]
+            self._Gamma_limited = self.Gamma[rows]
+            self._state_limits = np.tile([state_max[index] for index in state_max], N)
+        else:
+            self._Gamma_limited = None
+
+        self.x_0 = np.zeros(n)
+        self.U = np.zeros(N * m)
+
+        self.solve_times = []
+        self.status = None
+        self.num_constrained_solves = 0
+
+    def _constraints(self, x_0):
+        """ Returns the state limits as scipy.optimize constraints """
+        if self._Gamma_limited is None:
+            return ()
+
+        predicted = self._Phi_limited @ x_0
+        G = np.vstack((-self._Gamma_limited, self._Gamma_limited))
+        h = np.concatenate((self._state_limits - predicted, self._state_limits + predicted))
+
+        # SLSQP wants fun(U) >= 0
+        return ({'type': 'ineq', 'fun': lambda U: h + G @ U, 'jac': lambda U: G},)
+
+    def constraint_matrices(self):
+        """ Returns G, w, and S, so that the limits are G U <= w + S x_0
+
+        The rows are the upper input limits, the lower input limits, then the
+        upper and lower state limits.
+        """
+        N_m = self.prediction_horizon * self.num_inputs
+        G, w, S = [], [], []
+
+        if self.u_max is not None:
+            G += [np.eye(N_m), -np.eye(N_m)]
+            w += [self.u_max, self.u_max]
+            S += [np.zeros((2 * N_m, self.num_states))]
+
+        if self._Gamma_limited is not None:
+            G += [self._Gamma_limited, -self._Gamma_limited]
+            w += [self._state_limits, self._state_limits]
+            S += [-self._Phi_limited, self._Phi_limited]
+
+        if not G:
+            return np.zeros((0, N_m)), np.zeros(0), np.zeros((0, self.num_states))
+
+        return np.vstack(G), np.concatenate(w), np.vstack(S)
+
+    def _is_feasible(self, U, x_0, tol=1e-9):
+        """ True if U is within all of the limits """
+        if self.u_max is not None and np.any(np.abs(U) > self.u_max + tol):
+            return False
+
+        if self._Gamma_limited is not None:
+            predicted = self._Phi_limited @ x_0 + self._Gamma_limited @ U
+            if np.any(np.abs(predicted) > self._state_limits + tol):
+                return False
+
+        return True
+
+    def solve(self, x_0, reference):
+        """ Solve for the optimal input sequence from the current state
+
+        Arguments:
+            x_0 : the current state
+            reference : the desired state, either a constant (num_states,)
+                        array or a (num_states, prediction_horizon) trajectory
+
+        Returns:
+            the first input of the optimal sequence, the one to apply now
+        """
+        start_time = time.perf_counter()
+
+        self.x_0 = np.asarray(x_0, dtype=float)
+        reference = _reference_array(reference, self.num_states, self.prediction_horizon)
+
+        f = self.F @ (self.Phi @ self.x_0 - reference.T.ravel())
+
+        U = cho_solve(self._H_factor, -f)
+
+        if self._is_feasible(U, self.x_0):
+            self.status = 'optimal'
+        else:
+            # Warm start from the last solution, shifted by one sample
+            m = self.num_inputs
+            initial_guess = np.concatenate((self.U[m:], self.U[-m:]))
+            if self.u_max is not None:
+                initial_guess = np.clip(initial_guess, -self.u_max, self.u_max)
+
+            kwargs = {'hess': lambda U: self.H} if self.method in HESSIAN_METHODS else {}
+
+            res = minimize(lambda U: 0.5 * U @ self.H @ U + f @ U,
+                           initial_guess,
+                           jac=lambda U: self.H @ U + f,
+                           bounds=self.bounds,
+                           constraints=self._constraints(self.x_0),
+                           method=self.method,
+                           options=self.solver_options,
+                           **kwargs)
+
+            if not res.success:
+                logger.warning('MPC solve did not converge: %s', res.message)
+
+            U = res.x
+            self.status = 'optimal' if res.success else res.message
+            self.num_constrained_solves += 1
+
+        self.U = U
+        self.solve_times.append(time.perf_counter() - start_time)
+
+        return U[:self.num_inputs]
+
+    @property
+    def predicted_states(self):
+        """ The predicted states over the horizon, from the last solve,
+        as a (num_states, prediction_horizon + 1) array like LinearMPC's
+        """
+        X = self.Phi @ self.x_0 + self.Gamma @ self.U
+        return np.hstack((self.x_0[:, np.newaxis],
+                          X.reshape(self.prediction_horizon, self.num_states).T))
+
+    @property
+    def predicted_inputs(self):
+        """ The optimal input sequence, from the last solve """
+        return self.U.reshape(self.prediction_horizon, self.num_inputs).T
+
+    def solve_time_stats(self, skip_first=False):
+        """ Returns a dict of statistics of the solve times (s) """
+        return _time_stats(self.solve_times[int(skip_first):])
+
+
+if __name__ == '__main__':
+    # Position control of a mass-spring-damper, as in mpc_mass_spring_damper_cvxpy.py
+    import control
+
+    dt = 0.1
+    m = 1.0
+    wn = 2 * np.pi
+    zeta = 0.1
+
+    sys = control.ss([[0, 1], [-wn**2, -2*zeta*wn]], [[0], [1/m]], np.eye(2), np.zeros((2, 1)))
+    digital_sys = control.sample_system(sys, dt)
+
+    controllers = [CondensedMPC(digital_sys.A, digital_sys.B, Q=np.diag([100, 1]), R=[[0.0001]],
+                                prediction_horizon=10, u_max=50)]
+
+    if cvx is not None:
+        controllers.append(LinearMPC(digital_sys.A, digital_sys.B, Q=np.diag([100, 1]), R=[[0.0001]],
+                                     prediction_horizon=10, u_max=50))
+
+    inputs = []
+    for mpc in controllers:
+        x_0 = np.zeros(2)
+        inputs.append([])
+
+        for _ in range(50):
+            u = mpc.solve(x_0, [1.0, 0.0])
+            x_0 = digital_sys.A @ x_0 + digital_sys.B @ u
+            inputs[-1].append(u[0])
+
+        print('{} final state: {}'.format(type(mpc).__name__, x_0))
+        print('    Solve times (s): {}'.format(mpc.solve_time_stats(skip_first=True)))
+
+    if len(inputs) == 2:
+        print('Max. difference in inputs (N): {:.3e}'.format(np.max(np.abs(np.subtract(*inputs)))))
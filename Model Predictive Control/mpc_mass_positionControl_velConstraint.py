@@ -4,14 +4,12 @@
 # mpc_mass_positionControl_velConstraint.py
 #
 # Solving a Model Predictive Controller for a simple mass system with viscous
-# friction using the cvxpy module. The solution has a constraint on maximum
-# velocity. We'll use a course sample time during the solution procedure then 
-# simulate the system with a finer time.
+# friction. The solution has a constraint on maximum velocity. We'll use a
+# course sample time during the solution procedure then simulate the system
+# with a finer time.
 #
-# cvxpy - https://cvxgrp.github.io/cvxpy/index.html
-# 
-# This full optimal control tutorial for cvxpy was used as the basis for this script:
-#  http://nbviewer.jupyter.org/github/cvxgrp/cvx_short_course/blob/master/intro/control.ipynb
+# The MPC law is precomputed over a grid of the states, using explicit_mpc.py,
+# so there is no optimization while the controller runs.
 #
 # NOTE: Any plotting is set up for output, not viewing on screen.
 #       So, it will likely be ugly on screen. The saved PDFs should look
@@ -23,7 +21,9 @@
 #   - http://www.ucs.louisiana.edu/~jev9637
 #
 # Modified:
-#   * 
+#   * 10/18/26
+#       - Use an explicit, precomputed MPC law, so each sample is a table
+#         lookup rather than an online solve
 #
 # TODO:
 #   * 
@@ -33,7 +33,9 @@ import numpy as np
 import matplotlib.pyplot as plt
 
 import control
-import cvxpy as cvx
+
+from mpc_controller import CondensedMPC
+from explicit_mpc import ExplicitMPC
 
 
 # Define the time oriented parameters for the problem
@@ -97,39 +99,42 @@ x2_total = np.array([x1_dot_init])
 u_total = np.zeros(1,)
 
 
-# Form the variables needed for the cvxpy solver
-x = cvx.Variable(int(num_states), int(prediction_horizon + 1))
-u = cvx.Variable(int(num_inputs), int(prediction_horizon))
+# Build the MPC, then precompute its control law over a grid of states. The
+# mass dynamics don't depend on position, so the table is built for a
+# reference of zero and used with the error from the desired states. At each
+# sample, there is then just a table lookup, rather than an optimization.
+mpc = CondensedMPC(digital_sys.A, digital_sys.B,
+                   Q=np.diag([q11, q22]),
+                   R=np.array([[r11]]),
+                   prediction_horizon=prediction_horizon,
+                   u_max=U_max,
+                   state_max={1: V_max},
+                   ftol=1e-12,
+                   maxiter=1000)
+
+explicit_mpc = ExplicitMPC.from_mpc(mpc, np.zeros(num_states),
+                                    grid_min=[-1.5, -V_max],
+                                    grid_max=[1.5, V_max],
+                                    num_points=[61, 21])
+
+print('The explicit MPC has {} regions.'.format(explicit_mpc.num_regions))
+
+# Uncomment to save the table, for example to load on an embedded target
+# explicit_mpc.save('mpc_mass_velConstraint_table.npz')
+
+reference = np.array([XD, XD_dot])
 
 # Now, we work through the range of the simulation time. At each step, we
-# look prediction_horizon samples into the future and optimize the input over
-# that range of time. We then take only the first element of that sequence
-# as the current input, then repeat.
+# look up the optimal input for the current state, then simulate one sample
 for _ in range(int(num_samples)):
+    u = explicit_mpc.evaluate(x_0 - reference)
+
+    # Finally, save the next state as the initial condition for the next
+    x_0 = digital_sys.A @ x_0 + digital_sys.B @ u
 
-    states = []
-    for t in range(prediction_horizon):
-        cost = (q11 * cvx.sum_squares(XD - x[0, t+1]) + 
-                q22 * cvx.sum_squares(XD_dot - x[1, t+1]) + 
-                r11 * cvx.sum_squares(u[:,t]))
-
-        constr = [x[:, t+1] == digital_sys.A * x[:, t] + digital_sys.B * u[:, t],
-                  cvx.norm(u[:,t], 'inf') <= U_max,
-                  cvx.norm(x[1,t], 'inf') <= V_max,]
-              
-        states.append(cvx.Problem(cvx.Minimize(cost), constr))
-
-    # sums problem objectives and concatenates constraints.
-    prob = sum(states)
-    prob.constraints += [x[:,0] == x_0]
-    prob.solve()
-
-    u_total = np.append(u_total, u[0].value)
-    x1_total = np.append(x1_total, x[0,1].value)
-    x2_total = np.append(x2_total, x[1,1].value)
-
-    # Finally, save the current state as the initial condition for the next
-    x_0 = np.array(x[:,1].value.A.flatten())
+    u_total = np.append(u_total, u[0])
+    x1_total = np.append(x1_total, x_0[0])
+    x2_total = np.append(x2_total, x_0[1])
 
 
 # ----- Simulation using this command ----
@@ -25,6 +25,8 @@
 #       - General cleanup
 #       - Simplification of program logic around looping over full duration
 #       - Using the discrete model for simluation too
+#   * 10/18/26
+#       - Use LinearMPC, which builds the problem once rather than every sample
 #
 # TODO:
 #   * 
@@ -34,7 +36,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 
 import control
-import cvxpy as cvx
+
+from mpc_controller import LinearMPC
 
 
 # Define the time oriented parameters for the problem
@@ -104,38 +107,30 @@ x2_total = np.array([x1_dot_init])
 u_total = np.zeros(1,)
 
 
-# Form the variables needed for the cvxpy solver
-x = cvx.Variable(int(num_states), int(prediction_horizon + 1))
-u = cvx.Variable(int(num_inputs), int(prediction_horizon))
+# Build the MPC problem once. At each sample, only the current state changes.
+mpc = LinearMPC(digital_sys.A, digital_sys.B,
+                Q=np.diag([q11, q22]),
+                R=np.array([[r11]]),
+                prediction_horizon=prediction_horizon,
+                u_max=U_max)
+
+reference = np.array([XD, XD_dot])
 
 # Now, we work through the range of the simulation time. At each step, we
 # look prediction_horizon samples into the future and optimize the input over
 # that range of time. We then take only the first element of that sequence
 # as the current input, then repeat.
 for _ in range(int(num_samples)):
+    u = mpc.solve(x_0, reference)
 
-    states = []
-    for t in range(prediction_horizon):
-        cost = (q11 * cvx.sum_squares(XD - x[0, t+1]) + 
-                q22 * cvx.sum_squares(XD_dot - x[1, t+1]) + 
-                r11 * cvx.sum_squares(u[:,t]))
-
-        constr = [x[:, t+1] == digital_sys.A * x[:, t] + digital_sys.B * u[:, t],
-                  cvx.norm(u[:,t], 'inf') <= U_max]
-              
-        states.append(cvx.Problem(cvx.Minimize(cost), constr))
-
-    # sums problem objectives and concatenates constraints.
-    prob = sum(states)
-    prob.constraints += [x[:,0] == x_0]
-    prob.solve(solver=cvx.ECOS)
+    # Finally, save the predicted next state as the initial condition for the next
+    x_0 = mpc.predicted_states[:, 1]
 
-    u_total = np.append(u_total, u[0].value)
-    x1_total = np.append(x1_total, x[0,1].value)
-    x2_total = np.append(x2_total, x[1,1].value)
+    u_total = np.append(u_total, u[0])
+    x1_total = np.append(x1_total, x_0[0])
+    x2_total = np.append(x2_total, x_0[1])
 
-    # Finally, save the current state as the initial condition for the next
-    x_0 = np.array(x[:,1].value.A.flatten())
+print('MPC solve times (s): {}'.format(mpc.solve_time_stats()))
 
 
 # ----- Simulation using this command ----
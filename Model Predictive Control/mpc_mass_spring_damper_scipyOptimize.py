@@ -17,7 +17,10 @@
 #   - http://www.ucs.louisiana.edu/~jev9637
 #
 # Modified:
-#   * 
+#   * 10/18/26
+#       - Use CondensedMPC, which optimizes over only the inputs, using
+#         exact gradients. The old formulation, over both the states and
+#         inputs, only kept the constraint on the last step of the dynamics.
 #
 # TODO:
 #   * 
@@ -26,12 +29,12 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
-# import minimize from scipy
-from scipy.optimize import minimize
-
 # We'll use the control system toolbox to create and simulate the system
 import control
 
+# The MPC solved with scipy.optimize.minimize, with exact gradients
+from mpc_controller import CondensedMPC
+
 
 # Define the time oriented parameters for the problem
 prediction_horizon = 10     # Number of samples to use in prediction
@@ -100,138 +103,35 @@ x2_total = np.array([x1_dot_init])
 u_total = np.zeros(1,)
 
 
-# Form the variables needed for solver. x will hold the states during the
-# horizon and u contains the variables that we are solving for. 
-#
-# Both are set to zero here, but a smarter initial guess, particular with the 
-# u array is *strongly* advised
-x = np.zeros(num_states * (int(prediction_horizon + 1)))
-u = np.zeros(num_inputs * (int(prediction_horizon + 1),))
-
-# We will pass the states to the optimizer too. This allows us to define the 
-# constraints in a way that is more easily integrated with the minimize method
-initial_guess = np.hstack((x, u))
-
-
-
-def cost_function(optim_states, *args):
-    """ 
-    Cost function to minimize during the optimization. Here, we are using a 
-    quadratic cost on state error and actuator effor
-    
-    Arguments:
-      inputs : the input to solve for
-      states : the states
-      Q : An array weighting the states error xT * Q * x
-      R : An array weighting the input uT * R * u
-      
-    Returns:
-      float representing the cost
-    """
-    
-    prediction_horizon, desired_states, x0, Q, R = args
-    
-    # parse the states in the optimization to system states and inputs
-    states = optim_states[:num_states * (int(prediction_horizon + 1))].reshape(prediction_horizon+1, num_states)
-    inputs = optim_states[num_states * (int(prediction_horizon + 1)):].reshape(prediction_horizon+1, num_inputs)
-    
-    # initialize the costs
-    state_cost = 0
-    input_cost = 0
-    
-    # calculate the state error
-    states_error = desired_states - states
-    
-    for state_error in states_error:
-        state_cost = state_cost + state_error.T @ Q @ state_error
-        
-    for input in inputs:
-        try:
-            input_cost = input_cost + input.T @ R @ input
-        except ValueError:    
-            input_cost = input_cost + input * R * input
-            
-    return 0.5 * state_cost + 0.5 * input_cost
-   
-def calculate_next_step(optim_states, t, args):
-    # parse the states in the optimization to system states and inputs
-    x = optim_states[:num_states * (int(prediction_horizon + 1))].reshape(prediction_horizon+1, num_states)
-    u = optim_states[num_states * (int(prediction_horizon + 1)):].reshape(prediction_horizon+1, num_inputs)
-    
-#     import pdb
-#     pdb.set_trace()
-    ineq_constraint = -x[t+1, :].reshape(2,1) + digital_sys.A * x[t, :].reshape(2,1) + digital_sys.B * u[t, :]
-    print(ineq_constraint.reshape(1,2))
-    return ineq_constraint
-
-    
-def generate_constraints(optim_states, args):
-
-    prediction_horizon, desired_states, x0, Q, R = args
-        
-    # parse the states in the optimization to system states and inputs
-    x = optim_states[:num_states * (int(prediction_horizon + 1))].reshape(prediction_horizon+1, num_states)
-    u = optim_states[num_states * (int(prediction_horizon + 1)):].reshape(prediction_horizon+1, num_inputs)
-    
-    for t in range(prediction_horizon):
-        constraints = ({'type': 'eq',
-                        'fun': lambda x: calculate_next_step(x, t, args)})
-    
-#     contraints += ({'type': 'ineq',
-#                     'fun': lambda u: u_max - u})
-#                     
-#     contraints += ({'type': 'ineq',
-#                     'fun': lambda u: u - u_min})
-                    
-    return constraints
-
-Q = 100*np.eye(num_states)
-R = np.eye(num_inputs)
-desired_states = np.hstack((np.ones((prediction_horizon+1,1)), np.zeros((prediction_horizon+1,1))))
-
-x_init = 0.0
-x_dot_init = 0.0
-x0 = [x_init, x_dot_init]
-
-args = prediction_horizon, desired_states, x0, Q, R
-
-# Now, form the contraints
-constraints = generate_constraints(initial_guess, args)
-
-# And generate bounds
-# bounds = []
-# x_max = 10
-# x_min = -x_max
-# x_dot_max = 100
-# x_dot_min = -x_dot_max
-# u_max = 100
-# u_min = -100
-# 
-# for _ in range(prediction_horizon):
-#     bounds.append((x_min, x_max), (x_dot_min, x_dot_max), (u_min, u_max))
+# Build the MPC. The dynamics are condensed into prediction matrices once, here,
+# so that only the inputs are optimized. The limits on the input are then just
+# bounds. The initial guesses are taken care of inside, warm starting each solve
+# from the last solution.
+mpc = CondensedMPC(digital_sys.A, digital_sys.B,
+                   Q=np.diag([q11, q22]),
+                   R=np.array([[r11]]),
+                   prediction_horizon=prediction_horizon,
+                   u_max=U_max,
+                   method='SLSQP',
+                   maxiter=1000)
 
+reference = np.array([XD, XD_dot])
 
-u_total = np.zeros((int(num_samples), num_inputs))
 # Now, we work through the range of the simulation time. At each step, we
 # look prediction_horizon samples into the future and optimize the input over
 # that range of time. We then take only the first element of that sequence
 # as the current input, then repeat.
-for index in range(int(num_samples)):
-
-    res = minimize(cost_function, initial_guess, args, #bounds=bnds,
-                   constraints=constraints, method='SLSQP', 
-                   options={'maxiter':1e3, 'eps':1e-9, 'disp':True})
-    
-    # Finally, save the current state as the initial condition for the next
-    initial_guess = res.x
-    
-    x = res.x[:num_states * (int(prediction_horizon + 1))].reshape(prediction_horizon+1, num_states)
-    x0 = x[0, :]
-    
-    u = res.x[num_states * (int(prediction_horizon + 1)):].reshape(prediction_horizon+1, num_inputs)
-    u_total[index, :] = u[0,:]
-    
-    args = prediction_horizon, desired_states, x0, Q, R
+for _ in range(int(num_samples)):
+    u = mpc.solve(x_0, reference)
+
+    # Finally, save the predicted next state as the initial condition for the next
+    x_0 = mpc.predicted_states[:, 1]
+
+    u_total = np.append(u_total, u[0])
+    x1_total = np.append(x1_total, x_0[0])
+    x2_total = np.append(x2_total, x_0[1])
+
+print('MPC solve times (s): {}'.format(mpc.solve_time_stats()))
 
 
 # ----- Simulation using this command ----
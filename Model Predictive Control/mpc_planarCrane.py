@@ -25,7 +25,8 @@
 #   - http://www.ucs.louisiana.edu/~jev9637
 #
 # Modified:
-#   * 
+#   * 10/18/26
+#       - Use LinearMPC, which builds the problem once rather than every sample
 #
 # TODO:
 #   * 
@@ -35,7 +36,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 
 import control
-import cvxpy as cvx
+
+from mpc_controller import LinearMPC
 
 
 # Define the time oriented parameters for the problem
@@ -117,44 +119,34 @@ x_dot_total = np.array([x_dot_init])
 u_total = np.zeros(1,)
 
 
-# Form the variables needed for the cvxpy solver
-x = cvx.Variable(int(num_states), int(prediction_horizon + 1))
-u = cvx.Variable(int(num_inputs), int(prediction_horizon))
+# Build the MPC problem once. At each sample, only the current state changes.
+# The angle, x[0], and trolley velocity, x[3], are limited.
+mpc = LinearMPC(digital_sys.A, digital_sys.B,
+                Q=np.diag([q11, q22, q33, q44]),
+                R=np.array([[r11]]),
+                prediction_horizon=prediction_horizon,
+                u_max=U_max,
+                state_max={0: theta_max, 3: V_max})
+
+reference = np.array([thetaD, thetaD_dot, XD, XD_dot])
 
 # Now, we work through the range of the simulation time. At each step, we
 # look prediction_horizon samples into the future and optimize the input over
 # that range of time. We then take only the first element of that sequence
 # as the current input, then repeat.
 for _ in range(int(num_samples)):
+    u = mpc.solve(x_0, reference)
+
+    # Finally, save the predicted next state as the initial condition for the next
+    x_0 = mpc.predicted_states[:, 1]
+
+    u_total = np.append(u_total, u[0])
+    theta_total = np.append(theta_total, x_0[0])
+    theta_dot_total = np.append(theta_dot_total, x_0[1])
+    x_total = np.append(x_total, x_0[2])
+    x_dot_total = np.append(x_dot_total, x_0[3])
 
-    states = []
-    for t in range(prediction_horizon):
-        cost = (q11 * cvx.sum_squares(thetaD - x[0, t+1]) + 
-                q22 * cvx.sum_squares(thetaD_dot - x[1, t+1]) + 
-                q33 * cvx.sum_squares(XD - x[2, t+1]) + 
-                q44 * cvx.sum_squares(XD_dot - x[3, t+1]) + 
-                r11 * cvx.sum_squares(u[:,t]))
-
-        constr = [x[:, t+1] == digital_sys.A * x[:, t] + digital_sys.B * u[:, t],
-                  cvx.norm(u[:,t], 'inf') <= U_max,
-                  cvx.norm(x[0,t], 'inf') <= theta_max,
-                  cvx.norm(x[3,t], 'inf') <= V_max]
-              
-        states.append(cvx.Problem(cvx.Minimize(cost), constr))
-
-    # sums problem objectives and concatenates constraints.
-    prob = sum(states)
-    prob.constraints += [x[:,0] == x_0]
-    prob.solve()
-
-    u_total = np.append(u_total, u[0].value)
-    theta_total = np.append(theta_total, x[0,1].value)
-    theta_dot_total = np.append(theta_dot_total, x[1,1].value)
-    x_total = np.append(x_total, x[2,1].value)
-    x_dot_total = np.append(x_dot_total, x[3,1].value)
-
-    # Finally, save the current state as the initial condition for the next
-    x_0 = np.array(x[:,1].value.A.flatten())
+print('MPC solve times (s): {}'.format(mpc.solve_time_stats()))
 
 
 # ----- Simulation using this command ----
@@ -0,0 +1,305 @@
+#! /usr/bin/env python
+
+###############################################################################
+# episode_log_analysis.py
+#
+# Loading and summarizing the logs from training on the OpenAI Gym
+# environments in this folder, without re-parsing text on every run.
+#
+# There are three parts:
+#   * load_episode_columns() - loads one episode, either from an old-style
+#     EpisodeData_*.csv file or from a recording made by EpisodeRecorder.
+#     Parsed CSV files are cached in a binary .npy "sidecar" file next to them.
+#   * load_json_log() - loads the json logs from the gym Monitor and the
+#     keras-rl FileLogger, also caching the parsed arrays in a sidecar file.
+#   * EpisodeLogSummary - per-episode returns and lengths for every episode
+#     in a folder. Its results are saved, so each run only processes the
+#     episodes that were added since the last one.
+#
+# Sidecar files are reused as long as they are newer than the file they were
+# parsed from. Delete them to force a re-parse.
+#
+# Created: 10/18/26
+#
+# Modified:
+#   * 10/18/26
+#       - The .npy sidecar is saved under a temporary name, then renamed, and
+#         one that can't be loaded is parsed again
+#       - Cached CSV data is mapped copy-on-write, so it's writable like the
+#         data from a first load
+#
+# TODO:
+#   *
+###############################################################################
+
+import glob
+import json
+import logging
+import os
+
+import numpy as np
+
+import episode_recorder
+
+logger = logging.getLogger(__name__)
+
+SIDECAR_EXTENSION = '.cache.npy'
+JSON_SIDECAR_EXTENSION = '.cache.npz'
+
+
+def _sidecar_is_current(filename, sidecar_filename):
+    """ True if the sidecar exists and is newer than the file it came from """
+    return (os.path.exists(sidecar_filename)
+            and os.path.getmtime(sidecar_filename) >= os.path.getmtime(filename))
+
+
+def load_csv_columns(filename):
+    """ Returns the data in a CSV file as a (num_columns, num_rows) array,
+    the same as np.loadtxt(filename, delimiter=',', unpack=True)
+
+    The parsed data is saved in a binary sidecar file. Later calls
+    memory-map that, rather than parsing the text again. The map is
+    copy-on-write, so the array is writable either way, but changes to it
+    are never saved.
+    """
+    sidecar_filename = filename + SIDECAR_EXTENSION
+
+    if _sidecar_is_current(filename, sidecar_filename):
+        try:
+            return np.load(sidecar_filename, mmap_mode='c')
+        except (IOError, OSError, ValueError):
+            logger.warning('Could not load the cache for {}, parsing it again'.format(filename))
+
+    data = np.loadtxt(filename, delimiter=',', unpack=True, ndmin=2)
+
+    try:
+        # Write to a temporary name first, so an interrupted save can't
+        # leave a sidecar that looks current
+        np.save(sidecar_filename + '.tmp.npy', data)
+        os.replace(sidecar_filename + '.tmp.npy', sidecar_filename)
+    except (IOError, OSError):
+        logger.warning('Could not save the cache for {}'.format(filename))
+
+    return data
+
+
+def load_episode_columns(filename, episode=-1):
+    """ Returns the data for one episode as a (num_columns, num_rows) array
+
+    Arguments:
+        filename : an old-style EpisodeData_*.csv file, which holds one
+                   episode, or the _index.csv file of an EpisodeRecorder
+                   recording
+        episode : for recordings, the episode to load. Negative numbers
+                  count back from the last episode, like list indexing.
+    """
+    if not filename.endswith('_index.csv'):
+        return load_csv_columns(filename)
+
+    index = episode_recorder.load_index(filename)
+
+    if episode < 0:
+        episode = index[episode, 0]
+
+    return episode_recorder.load_episode(filename, episode, index=index).T
+
+
+def load_json_log(filename):
+    """ Returns a dict of arrays from a json log file, like those written by
+    the gym Monitor wrapper or the keras-rl FileLogger callback
+
+    Only the keys holding lists of numbers are included. Those are saved
+    in a binary sidecar file, so later calls don't have to parse the json.
+    """
+    sidecar_filename = filename + JSON_SIDECAR_EXTENSION
+
+    if _sidecar_is_current(filename, sidecar_filename):
+        with np.load(sidecar_filename) as cached:
+            return dict(cached)
+
+    with open(filename) as data_file:
+        data = json.load(data_file)
+
+    arrays = {}
+    for key, value in data.items():
+        if isinstance(value, list):
+            try:
+                # Missing values (null in the json) become NaN
+                arrays[key] = np.array([np.nan if item is None else item for item in value], dtype=float)
+            except (TypeError, ValueError):
+                pass  # not a list of numbers
+
+    try:
+        # Write to a temporary name first, so an interrupted save can't
+        # leave a sidecar that looks current
+        np.savez(sidecar_filename + '.tmp.npz', **arrays)
+        os.replace(sidecar_filename + '.tmp.npz', sidecar_filename)
+    except (IOError, OSError):
+        logger.warning('Could not save the cache for {}'.format(filename))
+
+    return arrays
+
+
+class EpisodeLogSummary(object):
+    """ Incrementally computed returns and lengths of every episode in a folder
+
+    Both old-style EpisodeData_*.csv files and EpisodeRecorder recordings are
+    included. The reward is assumed to be the last column, as it is for all
+    of the environments in this folder.
+    """
+
+    def __init__(self, directory='example_data', gamma=0.99, prefix='EpisodeData'):
+        """ Initializing
+
+        Arguments:
+            directory : the folder holding the episode data
+            gamma : discount factor used for the discounted return
+            prefix : start of the episode data filenames
+        """
+        self.directory = directory
+        self.gamma = gamma
+        self.prefix = prefix
+        self.cache_filename = os.path.join(directory, '{}_summary{}'.format(prefix, JSON_SIDECAR_EXTENSION))
+
+        # Per-episode results. The source is an index into self.sources.
+        self.returns = np.zeros(0)
+        self.discounted_returns = np.zeros(0)
+        self.lengths = np.zeros(0, dtype=int)
+        self.source_ids = np.zeros(0, dtype=int)
+
+        # filename -> [id, mtime, size, number of episodes processed]
+        self.sources = {}
+
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.cache_filename):
+            return
+
+        with np.load(self.cache_filename) as cached:
+            if float(cached['gamma']) != self.gamma:
+                logger.info('Discount factor changed, recomputing the summary.')
+                return
+
+            self.returns = cached['returns']
+            self.discounted_returns = cached['discounted_returns']
+            self.lengths = cached['lengths']
+            self.source_ids = cached['source_ids']
+            self.sources = json.loads(str(cached['sources']))
+
+    def save(self):
+        """ Saves the summary, so the next update() only processes new episodes """
+        temp_filename = self.cache_filename + '.tmp.npz'
+        np.savez(temp_filename,
+                 gamma=self.gamma,
+                 returns=self.returns,
+                 discounted_returns=self.discounted_returns,
+                 lengths=self.lengths,
+                 source_ids=self.source_ids,
+                 sources=np.array(json.dumps(self.sources)))
+        os.replace(temp_filename, self.cache_filename)
+
+    def _episode_results(self, rewards):
+        """ Returns the return, discounted return, and length of one episode """
+        # The first row holds the initial conditions, with no reward
+        rewards = np.asarray(rewards)[1:]
+        discounts = self.gamma ** np.arange(len(rewards))
+        return np.sum(rewards), np.dot(discounts, rewards), len(rewards)
+
+    def _source_id(self, filename, stat):
+        """ Returns the id for filename, dropping old results if it changed """
+        if filename in self.sources:
+            source_id, mtime, size, processed = self.sources[filename]
+
+            if filename.endswith('_index.csv') or (mtime == stat.st_mtime and size == stat.st_size):
+                return source_id
+
+            # The file was replaced, so its old results are no longer valid
+            keep = self.source_ids != source_id
+            self.returns = self.returns[keep]
+            self.discounted_returns = self.discounted_returns[keep]
+            self.lengths = self.lengths[keep]
+            self.source_ids = self.source_ids[keep]
+            self.sources[filename][3] = 0
+            return source_id
+
+        source_id = max([value[0] for value in self.sources.values()], default=-1) + 1
+        self.sources[filename] = [source_id, stat.st_mtime, stat.st_size, 0]
+        return source_id
+
+    def update(self, save=True):
+        """ Processes any new episodes in the folder
+
+        Returns:
+            the number of new episodes processed
+        """
+        new_results = []
+
+        pattern = os.path.join(self.directory, '{}_*.csv'.format(self.prefix))
+
+        for filename in sorted(glob.glob(pattern)):
+            stat = os.stat(filename)
+            source_id = self._source_id(filename, stat)
+            processed = self.sources[filename][3]
+
+            if filename.endswith('_index.csv'):
+                # Recordings only ever have episodes appended, so just
+                # process the episodes past the ones we've already seen
+                index = episode_recorder.load_index(filename)
+                new_episodes = index[index[:, 0] >= processed]
+                basename = filename[:-len('_index.csv')]
+
+                for shard in np.unique(new_episodes[:, 1]):
+                    # Only the reward column is read from the memory-mapped shard
+                    shard_data = np.load('{}_shard{:05d}.npy'.format(basename, shard), mmap_mode='r')
+
+                    for episode, _, start, stop in new_episodes[new_episodes[:, 1] == shard]:
+                        new_results.append(self._episode_results(shard_data[start:stop, -1]) + (source_id,))
+
+                self.sources[filename][3] = len(index)
+
+            elif processed == 0:
+                # Old-style files hold a single episode
+                reward = load_csv_columns(filename)[-1]
+                new_results.append(self._episode_results(reward) + (source_id,))
+                self.sources[filename][3] = 1
+
+            self.sources[filename][1:3] = [stat.st_mtime, stat.st_size]
+
+        if new_results:
+            returns, discounted, lengths, source_ids = zip(*new_results)
+            self.returns = np.concatenate((self.returns, returns))
+            self.discounted_returns = np.concatenate((self.discounted_returns, discounted))
+            self.lengths = np.concatenate((self.lengths, np.array(lengths, dtype=int)))
+            self.source_ids = np.concatenate((self.source_ids, np.array(source_ids, dtype=int)))
+
+        if save:
+            self.save()
+
+        return len(new_results)
+
+    def statistics(self):
+        """ Returns a dict of summary statistics over all episodes """
+        stats = {'episodes': len(self.returns)}
+
+        for name, values in [('return', self.returns),
+                             ('discounted_return', self.discounted_returns),
+                             ('length', self.lengths)]:
+            if len(values) == 0:
+                continue
+
+            stats[name] = {'mean': np.mean(values),
+                           'std': np.std(values),
+                           'min': np.min(values),
+                           'max': np.max(values)}
+
+        return stats
+
+
+if __name__ == '__main__':
+    # Summarize all the episode data in the example_data folder
+    summary = EpisodeLogSummary('example_data')
+    num_new = summary.update()
+
+    print('Processed {} new episodes'.format(num_new))
+    print(summary.statistics())
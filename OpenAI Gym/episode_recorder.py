@@ -0,0 +1,263 @@
+#! /usr/bin/env python
+
+###############################################################################
+# episode_recorder.py
+#
+# Shared episode data recorder for the OpenAI Gym environments in this folder.
+#
+# Rather than filling a new array for every episode and writing it out as its
+# own CSV file from inside step(), rows are appended into a preallocated
+# buffer. When a buffer fills, it is handed to a background thread that saves
+# it as one .npy shard, and recording continues into a spare buffer. So, the
+# environment never waits on the disk unless every buffer is waiting to be
+# written.
+#
+# Along with the shards, an index of the episodes is saved as a CSV file, with
+# one line per episode:
+#   episode, shard, start row, stop row
+# It is written once per shard, not once per episode. load_episode() and
+# iter_episodes() use it to read episodes back, memory-mapping the shards.
+#
+# Files for a recording session share a timestamped prefix, for example
+#   example_data/EpisodeData_2026-10-18_120000_index.csv
+#   example_data/EpisodeData_2026-10-18_120000_shard00000.npy
+#
+# Created: 10/18/26
+#
+# Modified:
+#   *
+#
+# TODO:
+#   *
+###############################################################################
+
+import atexit
+import datetime # for unique filenames
+import glob
+import logging
+import os
+import queue
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EpisodeRecorder(object):
+    """ Records episode data into preallocated buffers, saved as .npy shards """
+
+    def __init__(self, header, num_columns=7, max_episode_rows=501,
+                 episodes_per_shard=200, num_buffers=3,
+                 directory='example_data', prefix='EpisodeData'):
+        """ Initializing
+
+        Arguments:
+            header : comma-separated names of the columns, saved in the index
+            num_columns : number of values recorded at each step
+            max_episode_rows : maximum number of rows an episode will normally
+                               need, MAX_STEPS + 1 for the initial conditions
+            episodes_per_shard : sets the size of each buffer, so the number of
+                                 episodes in each saved shard
+            num_buffers : number of preallocated buffers. Recording only waits
+                          if all of them are waiting to be written to disk.
+            directory : folder to save the data in
+            prefix : start of the filenames
+        """
+        self.header = header
+        self.num_columns = num_columns
+        self.max_episode_rows = max_episode_rows
+        self.buffer_rows = episodes_per_shard * max_episode_rows
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        session = datetime.datetime.now().strftime('%Y-%m-%d_%H%M%S')
+        self.basename = os.path.join(directory, '{}_{}'.format(prefix, session))
+        self.index_filename = self.basename + '_index.csv'
+
+        with open(self.index_filename, 'w') as index_file:
+            index_file.write('# {}\n'.format(header))
+            index_file.write('# episode, shard, start row, stop row\n')
+
+        # Buffers that are free to record into
+        self._free_buffers = queue.Queue()
+        for ii in range(num_buffers - 1):
+            self._free_buffers.put(np.zeros((self.buffer_rows, num_columns)))
+
+        # (shard number, buffer, number of rows, index lines) waiting to be saved
+        self._to_write = queue.Queue()
+
+        self._buffer = np.zeros((self.buffer_rows, num_columns))
+        self._row = 0
+        self._episode_start = None
+        self._shard_episodes = []
+
+        self.episode = 0
+        self.shard = 0
+        self.closed = False
+
+        self._writer = threading.Thread(target=self._write_shards, name='EpisodeRecorder')
+        self._writer.daemon = True
+        self._writer.start()
+
+        # Make sure a partially-filled buffer is saved when Python exits
+        atexit.register(self.close)
+
+    def start_episode(self, initial_row):
+        """ Starts a new episode, with initial_row as its first row
+
+        An episode that was started, but not ended, is discarded, matching
+        the old behavior of saving only completed episodes.
+        """
+        if self._episode_start is not None:
+            self._row = self._episode_start
+            self._episode_start = None
+
+        if self._row + self.max_episode_rows > len(self._buffer):
+            self._swap_buffers()
+
+        self._episode_start = self._row
+        self.record(initial_row)
+
+    def record(self, row):
+        """ Appends one row to the current episode """
+        if self._row == len(self._buffer):
+            # Only happens if an episode runs longer than max_episode_rows.
+            # Move the episode so far to the start of the next buffer.
+            self._swap_buffers(carry_episode=True)
+
+        self._buffer[self._row] = row
+        self._row += 1
+
+    def end_episode(self):
+        """ Marks the current episode as complete, to be saved with its shard """
+        if self._episode_start is None:
+            return
+
+        self._shard_episodes.append('{}, {}, {}, {}\n'.format(
+            self.episode, self.shard, self._episode_start, self._row))
+
+        self.episode += 1
+        self._episode_start = None
+
+    def flush(self):
+        """ Hands the completed episodes in the current buffer to the writer """
+        if self._shard_episodes:
+            self._swap_buffers(carry_episode=self._episode_start is not None)
+
+    def close(self):
+        """ Saves any completed episodes and waits for all writes to finish """
+        if self.closed:
+            return
+
+        self.flush()
+        self._to_write.put(None)
+        self._writer.join()
+        self.closed = True
+
+    def _swap_buffers(self, carry_episode=False):
+        """ Queue the current buffer to be saved and switch to a free one
+
+        The rows of an episode in progress are not saved. If carry_episode is
+        True, they are moved to the start of the next buffer. Otherwise, they
+        are discarded.
+        """
+        old_buffer = self._buffer
+        start = self._episode_start if self._episode_start is not None else self._row
+
+        if self._shard_episodes:
+            self._to_write.put((self.shard, old_buffer, start, self._shard_episodes))
+            self.shard += 1
+            new_buffer = self._free_buffers.get()  # waits if every buffer is busy
+        else:
+            # Nothing to save, so we can keep using this buffer
+            new_buffer = old_buffer
+
+        row = 0
+        if carry_episode and self._episode_start is not None:
+            carried = self._row - self._episode_start
+
+            if carried >= len(new_buffer):
+                # Grow, so that the over-long episode fits. The standard-size
+                # buffer goes back in the pool. It's only read from below.
+                if len(new_buffer) == self.buffer_rows:
+                    self._free_buffers.put(new_buffer)
+                new_buffer = np.zeros((2 * carried, self.num_columns))
+
+            new_buffer[:carried] = old_buffer[start:self._row]
+            row = carried
+            self._episode_start = 0
+        else:
+            self._episode_start = None
+
+        self._buffer = new_buffer
+        self._row = row
+        self._shard_episodes = []
+
+    def _write_shards(self):
+        """ Runs on the writer thread, saving each full buffer as a shard """
+        while True:
+            item = self._to_write.get()
+
+            if item is None:
+                break
+
+            shard, buffer, num_rows, index_lines = item
+
+            try:
+                np.save('{}_shard{:05d}.npy'.format(self.basename, shard), buffer[:num_rows])
+
+                with open(self.index_filename, 'a') as index_file:
+                    index_file.writelines(index_lines)
+            except (IOError, OSError):
+                logger.exception('Could not save episode shard {}'.format(shard))
+
+            # Only the standard-size buffers go back into the pool
+            if len(buffer) == self.buffer_rows:
+                self._free_buffers.put(buffer)
+
+
+def load_index(index_filename):
+    """ Returns the index of a recording as an (N, 4) integer array of
+    episode, shard, start row, and stop row
+    """
+    return np.loadtxt(index_filename, delimiter=',', dtype=int, ndmin=2)
+
+
+def load_episode(index_filename, episode, index=None):
+    """ Returns the data from one episode of a recording
+
+    Arguments:
+        index_filename : the _index.csv file of the recording
+        episode : the number of the episode to load
+        index : the array from load_index(), to avoid re-reading it
+    """
+    if index is None:
+        index = load_index(index_filename)
+
+    _, shard, start, stop = index[index[:, 0] == episode][0]
+    basename = index_filename[:-len('_index.csv')]
+
+    shard_data = np.load('{}_shard{:05d}.npy'.format(basename, shard), mmap_mode='r')
+
+    return np.array(shard_data[start:stop])
+
+
+def iter_episodes(index_filename):
+    """ Yields (episode number, episode data) for every episode in a recording.
+    Each shard is opened once, memory-mapped, and the data are views into it.
+    """
+    index = load_index(index_filename)
+    basename = index_filename[:-len('_index.csv')]
+
+    for shard in np.unique(index[:, 1]):
+        shard_data = np.load('{}_shard{:05d}.npy'.format(basename, shard), mmap_mode='r')
+
+        for episode, _, start, stop in index[index[:, 1] == shard]:
+            yield episode, shard_data[start:stop]
+
+
+def find_recordings(directory='example_data', prefix='EpisodeData'):
+    """ Returns the index files of all the recordings in directory """
+    return sorted(glob.glob(os.path.join(directory, '{}_*_index.csv'.format(prefix))))
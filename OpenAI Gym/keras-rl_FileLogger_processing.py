@@ -16,7 +16,7 @@
 #   - http://www.ucs.louisiana.edu/~jev9637
 #
 # Modified:
-#   * 
+#   * 10/18/26 - Load with the cached episode_log_analysis functions
 #
 # TODO:
 #   * 
@@ -25,15 +25,16 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
-import json # the data files generated are json
+# The data files generated are json. This parses them once, then caches the
+# arrays in a binary file next to them for later runs.
+from episode_log_analysis import load_json_log
 
 # TODO: 07/13/17 - JEV - Add GUI, argparse, or CLI for selecting file
 FILENAME = 'logs/ddpg_planar_crane_continuous-v0_log_32_3_100000_2017-07-20_012022.json'
 
 
 
-with open(FILENAME) as data_file:
-    data = json.load(data_file)
+data = load_json_log(FILENAME)
 
 # This is the key data that we're interested in plotting. You can use the 
 # method data.keys() to see others
@@ -16,7 +16,8 @@
 #   - http://www.ucs.louisiana.edu/~jev9637
 #
 # Modified:
-#   * 
+#   * 10/18/26 - Episode data saved with the shared EpisodeRecorder
+#       - EpisodeRecorder is imported only when SAVE_DATA is set
 #
 # TODO:
 #   * 
@@ -27,8 +28,9 @@ import gym
 from gym import spaces
 from gym.utils import seeding
 import logging
+import os
+import sys
 import numpy as np
-import datetime # for unique filenames
 
 # Import the ODE solver
 from scipy.integrate import solve_ivp
@@ -83,6 +85,7 @@ class MassSpringDamperContEnv(gym.Env):
 
         self._seed()
         self.viewer = None
+        self.recorder = None
         self.state = None
         self.done = False
         self.force = 0.0
@@ -194,8 +197,7 @@ class MassSpringDamperContEnv(gym.Env):
         reward = np.clip(-10*distance_to_target**2 - 0.01*self.force**2, -1, 1)
         
         if self.SAVE_DATA:
-            current_data = np.array([self.counter * self.tau, x1, x1_dot, x2, x2_dot, self.force, reward])
-            self.episode_data[self.counter, :] = current_data
+            self.recorder.record((self.counter * self.tau, x1, x1_dot, x2, x2_dot, self.force, reward))
 
         if self.counter >= self.MAX_STEPS:
             self.done = True
@@ -205,9 +207,7 @@ class MassSpringDamperContEnv(gym.Env):
             self.done = True
         
         if self.done == True and self.SAVE_DATA:
-            header = header='Time (s), x1 (m), x1_dot (m/s), x2 (m), x2_dot (m/s), Force (N), Reward'
-            data_filename = 'example_data/EpisodeData_{}.csv'.format(datetime.datetime.now().strftime('%Y-%m-%d_%H%M%S'))
-            np.savetxt(data_filename, self.episode_data,  header=header, delimiter=',')
+            self.recorder.end_episode()
 
         return np.array(self.state), reward, self.done, {}
 
@@ -227,8 +227,16 @@ class MassSpringDamperContEnv(gym.Env):
         self.done = False
 
         if self.SAVE_DATA:
-            self.episode_data = np.zeros((self.MAX_STEPS+1, 7))
-            self.episode_data[0,:] = np.array([0, self.state[0], self.state[1], self.state[2], self.state[3], 0, 0])
+            if self.recorder is None:
+                # Imported only when saving data, so the env can be imported
+                # from anywhere. The recorder is in the OpenAI Gym folder.
+                sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+                from episode_recorder import EpisodeRecorder
+
+                self.recorder = EpisodeRecorder(header='Time (s), x1 (m), x1_dot (m/s), x2 (m), x2_dot (m/s), Force (N), Reward',
+                                                max_episode_rows=self.MAX_STEPS+1)
+
+            self.recorder.start_episode((0, self.state[0], self.state[1], self.state[2], self.state[3], 0, 0))
 
         return np.array(self.state)
 
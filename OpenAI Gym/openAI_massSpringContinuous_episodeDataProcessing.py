@@ -16,7 +16,7 @@
 #   - http://www.ucs.louisiana.edu/~jev9637
 #
 # Modified:
-#   * 
+#   * 10/18/26 - Load with the cached episode_log_analysis functions
 #
 # TODO:
 #   * 
@@ -25,13 +25,18 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
+# Cached loading of old-style CSV episode files and EpisodeRecorder recordings
+from episode_log_analysis import load_episode_columns
+
 FILENAME = 'example_data/EpisodeData_2018-04-27_174916.csv'
 
 # Files have data saved as:
 # Time (s), Angle (rad), Angle (rad/s), Trolley Pos (m), Trolly Vel (m/s), Trolley Accel (m/s^2), Reward
 # 
-# We'll unpack that data inline with opening the data file
-t, x1, x1_dot, x2, x2_dot, force, reward = np.loadtxt(FILENAME, delimiter=',', unpack=True)
+# We'll unpack that data inline with opening the data file. FILENAME can also be
+# the _index.csv file of an EpisodeRecorder recording. Then, the last episode
+# is loaded. Use load_episode_columns(FILENAME, episode) to pick another.
+t, x1, x1_dot, x2, x2_dot, force, reward = load_episode_columns(FILENAME)
 
 
 # ---- Plot the payload angle -------------------------------------------------
@@ -16,7 +16,7 @@
 #   - http://www.ucs.louisiana.edu/~jev9637
 #
 # Modified:
-#   * 
+#   * 10/18/26 - Load with the cached episode_log_analysis functions
 #
 # TODO:
 #   * 
@@ -25,14 +25,19 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
+# Cached loading of old-style CSV episode files and EpisodeRecorder recordings
+from episode_log_analysis import load_episode_columns
+
 FILENAME = 'example_data/EpisodeData_2017-07-15_110856.csv'
 CABLE_LENGTH = 2.0
 
 # Files have data saved as:
 # Time (s), Angle (rad), Angle (rad/s), Trolley Pos (m), Trolly Vel (m/s), Trolley Accel (m/s^2), Reward
 # 
-# We'll unpack that data inline with opening the data file
-t, theta, theta_dot, x, x_dot, x_ddot, reward = np.loadtxt(FILENAME, delimiter=',', unpack=True)
+# We'll unpack that data inline with opening the data file. FILENAME can also be
+# the _index.csv file of an EpisodeRecorder recording. Then, the last episode
+# is loaded. Use load_episode_columns(FILENAME, episode) to pick another.
+t, theta, theta_dot, x, x_dot, x_ddot, reward = load_episode_columns(FILENAME)
 
 
 # ---- Plot the payload angle -------------------------------------------------
@@ -19,7 +19,8 @@
 #   - http://www.ucs.louisiana.edu/~jev9637
 #
 # Modified:
-#   * 
+#   * 10/18/26 - Episode data saved with the shared EpisodeRecorder
+#       - EpisodeRecorder is imported only when SAVE_DATA is set
 #
 # TODO:
 #   * 
@@ -30,8 +31,9 @@ import gym
 from gym import spaces
 from gym.utils import seeding
 import logging
+import os
+import sys
 import numpy as np
-import datetime # for unique filenames
 
 logger = logging.getLogger(__name__)
 
@@ -80,6 +82,7 @@ class PlanarCraneEnv(gym.Env):
 
         self.seed()
         self.viewer = None
+        self.recorder = None
         self.state = None
         self.x_accel = 0.0
 
@@ -126,17 +129,14 @@ class PlanarCraneEnv(gym.Env):
         # reward = -(1/0.01) * x**2 - 1/(0.5 * np.pi/180)*theta**2 - limits*100
         
         if self.SAVE_DATA:
-            current_data = np.array([self.counter * self.tau, theta, theta_dot, x, x_dot, self.x_accel, reward])
-            self.episode_data[self.counter, :] = current_data
+            self.recorder.record((self.counter * self.tau, theta, theta_dot, x, x_dot, self.x_accel, reward))
 
 
         if self.counter >= self.MAX_STEPS:
             done = True
             
             if self.SAVE_DATA:
-                header = header='Time (s), Angle (rad), Angle (rad/s), Trolley Pos (m), Trolly Vel (m/s), Trolley Accel (m/s^2), Reward'
-                data_filename = 'example_data/EpisodeData_{}.csv'.format(datetime.datetime.now().strftime('%Y-%m-%d_%H%M%S'))
-                np.savetxt(data_filename, self.episode_data,  header=header, delimiter=',')
+                self.recorder.end_episode()
         else:
             done = False
             
@@ -153,8 +153,16 @@ class PlanarCraneEnv(gym.Env):
         self.counter = 0
         
         if self.SAVE_DATA:
-            self.episode_data = np.zeros((501, 7))
-            self.episode_data[0,:] = np.array([0, self.state[0], self.state[1], self.state[2], self.state[3], 0, 0])
+            if self.recorder is None:
+                # Imported only when saving data, so the env can be imported
+                # from anywhere. The recorder is in the OpenAI Gym folder.
+                sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+                from episode_recorder import EpisodeRecorder
+
+                self.recorder = EpisodeRecorder(header='Time (s), Angle (rad), Angle (rad/s), Trolley Pos (m), Trolly Vel (m/s), Trolley Accel (m/s^2), Reward',
+                                                max_episode_rows=self.MAX_STEPS+1)
+
+            self.recorder.start_episode((0, self.state[0], self.state[1], self.state[2], self.state[3], 0, 0))
 
         return np.array(self.state)
 
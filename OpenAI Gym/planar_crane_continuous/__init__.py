@@ -15,7 +15,7 @@
 #   - http://www.ucs.louisiana.edu/~jev9637
 #
 # Modified:
-#   * 
+#   * 10/18/26 - Registered the vectorized planar_crane_continuous_vec-v0
 #
 # TODO:
 #   * 
@@ -26,4 +26,10 @@ from gym.envs.registration import register
 register(
     id='planar_crane_continuous-v0',
     entry_point='planar_crane_continuous.planar_crane_continuous:PlanarCraneContEnv',
-)
\ No newline at end of file
+)
+
+# Vectorized version, steps num_envs cranes at once
+register(
+    id='planar_crane_continuous_vec-v0',
+    entry_point='planar_crane_continuous.planar_crane_continuous_vec:PlanarCraneContVecEnv',
+)
@@ -19,7 +19,8 @@
 #   - http://www.ucs.louisiana.edu/~jev9637
 #
 # Modified:
-#   * 
+#   * 10/18/26 - Episode data saved with the shared EpisodeRecorder
+#       - EpisodeRecorder is imported only when SAVE_DATA is set
 #
 # TODO:
 #   * 
@@ -30,8 +31,9 @@ import gym
 from gym import spaces
 from gym.utils import seeding
 import logging
+import os
+import sys
 import numpy as np
-import datetime # for unique filenames
 
 logger = logging.getLogger(__name__)
 
@@ -76,6 +78,7 @@ class PlanarCraneContEnv(gym.Env):
 
         self._seed()
         self.viewer = None
+        self.recorder = None
         self.state = None
         self.done = False
         self.x_accel = 0.0
@@ -149,16 +152,13 @@ class PlanarCraneContEnv(gym.Env):
 #             reward = 1000.0 - 250*self.x_accel**2 #- 10*theta**2 - 0.1*self.x_accel**2 - limits*10
 
         if self.SAVE_DATA:
-            current_data = np.array([self.counter * self.tau, theta, theta_dot, x, x_dot, self.x_accel, reward])
-            self.episode_data[self.counter, :] = current_data
+            self.recorder.record((self.counter * self.tau, theta, theta_dot, x, x_dot, self.x_accel, reward))
 
         if self.counter >= self.MAX_STEPS:
             self.done = True
         
         if self.done == True and self.SAVE_DATA:
-            header = header='Time (s), Angle (rad), Angle (rad/s), Trolley Pos (m), Trolly Vel (m/s), Trolley Accel (m/s^2), Reward'
-            data_filename = 'example_data/EpisodeData_{}.csv'.format(datetime.datetime.now().strftime('%Y-%m-%d_%H%M%S'))
-            np.savetxt(data_filename, self.episode_data,  header=header, delimiter=',')
+            self.recorder.end_episode()
 
         return np.array(self.state), reward, self.done, {}
 
@@ -176,8 +176,16 @@ class PlanarCraneContEnv(gym.Env):
         self.done = False
 
         if self.SAVE_DATA:
-            self.episode_data = np.zeros((self.MAX_STEPS+1, 7))
-            self.episode_data[0,:] = np.array([0, self.state[0], self.state[1], self.state[2], self.state[3], 0, 0])
+            if self.recorder is None:
+                # Imported only when saving data, so the env can be imported
+                # from anywhere. The recorder is in the OpenAI Gym folder.
+                sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+                from episode_recorder import EpisodeRecorder
+
+                self.recorder = EpisodeRecorder(header='Time (s), Angle (rad), Angle (rad/s), Trolley Pos (m), Trolly Vel (m/s), Trolley Accel (m/s^2), Reward',
+                                                max_episode_rows=self.MAX_STEPS+1)
+
+            self.recorder.start_episode((0, self.state[0], self.state[1], self.state[2], self.state[3], 0, 0))
 
         return np.array(self.state)
 
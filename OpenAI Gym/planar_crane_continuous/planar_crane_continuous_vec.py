@@ -0,0 +1,160 @@
+#! /usr/bin/env python
+
+###############################################################################
+# planar_crane_continuous_vec.py
+#
+# Defines a vectorized version of the planar crane environment in
+# planar_crane_continuous.py. It steps num_envs independent cranes at once.
+# The states of all of them are held in one (num_envs, 4) array and each step
+# is a handful of NumPy operations on that array, rather than a Python call
+# per environment.
+#
+# The dynamics, reward, and done conditions match PlanarCraneContEnv.
+# Environments that are done are automatically reset on the same step. The
+# observation returned for them is the first observation of the new episode.
+# The last observation of the finished episode is in info['terminal_observation'].
+#
+# Created: 10/18/26
+#
+# Modified:
+#   *
+#
+# TODO:
+#   *
+###############################################################################
+
+
+import gym
+from gym import spaces
+from gym.utils import seeding
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class PlanarCraneContVecEnv(gym.Env):
+    metadata = {
+        'render.modes': [],
+    }
+
+
+    def __init__(self, num_envs=64):
+        self.num_envs = num_envs        # number of cranes to step at once
+        self.gravity = 9.8              # accel. due to gravity (m/s^2)
+        self.masspend = 1.0             # mass of the pendulum point mass (kg)
+        self.cable_length = 2.0         # cable length (m)
+        self.tau = 0.02                 # seconds between state updates
+        self.desired_trolley = 0        # desired final position of payload
+        self.max_trolley_accel = 1.0    # maximum allowed accel of trolley
+        self.MAX_STEPS = 500            # maximum number of steps to run
+        self.wn = np.sqrt(self.gravity / self.cable_length) # natural freq. (rad)
+
+        # Define thesholds for trial limits, penalized heavily for exceeding these
+        self.theta_threshold = 60 * np.pi / 180     # +/- 60 degree limit (rad)
+        self.x_max_threshold = 4.0                  # max trolley position (m)
+        self.v_max_threshold = 0.5                  # max trolley velocity (m/s)
+
+        # This action space is the range of acceleration of each trolley
+        self.action_space = spaces.Box(low=-self.max_trolley_accel,
+                                       high=self.max_trolley_accel,
+                                       shape = (num_envs, 1))
+
+        high_limit = np.array([2*self.theta_threshold,      # max observable angle
+                               10*2*self.theta_threshold,   # max observable angular vel.
+                               self.x_max_threshold,        # max observable position
+                               self.v_max_threshold])       # max observable cable vel
+        high_limit = np.tile(high_limit, (num_envs, 1))
+
+        low_limit = -high_limit # limits are symmetric about 0
+
+        self.observation_space = spaces.Box(low_limit, high_limit)
+
+        # Preallocate the states and per-environment counters. These are
+        # updated in place from here on.
+        self.state = np.zeros((num_envs, 4))
+        self.counter = np.zeros(num_envs, dtype=int)
+        self.done = np.zeros(num_envs, dtype=bool)
+        self.x_accel = np.zeros(num_envs)
+        self.reward = np.zeros(num_envs)
+
+        # Work arrays, so a step allocates as little as possible
+        self._theta_ddot = np.zeros(num_envs)
+        self._limits = np.zeros(num_envs, dtype=bool)
+        self._scratch = np.zeros(num_envs, dtype=bool)
+
+        self._seed()
+
+    def _seed(self, seed=None):
+        self.np_random, seed = seeding.np_random(seed)
+        return [seed]
+
+    def _initial_states(self, num):
+        """ Returns num initial states, drawn like PlanarCraneContEnv._reset() """
+        states = np.zeros((num, 4))
+        states[:, 2] = (np.sign(self.np_random.uniform(low=-1.0, high=1.0, size=num))
+                        * self.np_random.uniform(low=1.0, high=3.0, size=num))
+        return states
+
+    def _step(self, action):
+        # Views into the state array, so the updates below are in place
+        theta = self.state[:, 0]
+        theta_dot = self.state[:, 1]
+        x = self.state[:, 2]
+        x_dot = self.state[:, 3]
+
+        self.counter += 1
+
+        # Get the action and clip it to the min/max trolley accel
+        np.clip(np.reshape(action, self.num_envs), -self.max_trolley_accel,
+                self.max_trolley_accel, out=self.x_accel)
+
+        # Update the trolley states, clipping to the min/max trolley velocity
+        x_dot += self.tau * self.x_accel
+        np.clip(x_dot, -self.v_max_threshold, self.v_max_threshold, out=x_dot)
+        x += self.tau * x_dot
+
+        # Update the pendulum states
+        np.multiply(-self.gravity / self.cable_length, theta, out=self._theta_ddot)
+        self._theta_ddot += 1.0 / self.cable_length * self.x_accel
+        theta_dot += self.tau * self._theta_ddot
+        theta += self.tau * theta_dot
+
+        # Define a boolean on whether we're exceeding limits or not. This
+        # matches the limits in PlanarCraneContEnv, but like there, it is not
+        # currently used in the reward.
+        np.greater(np.abs(x), self.x_max_threshold, out=self._limits)
+        self._limits |= np.greater(np.abs(theta), self.theta_threshold, out=self._scratch)
+        self._limits |= np.greater(np.abs(x_dot), self.v_max_threshold, out=self._scratch)
+
+        self.reward[:] = -0.1*x**2 - theta**2 - 0.01*self.x_accel**2
+
+        # An environment is done when it's close enough to rest at the target
+        # or it has run out of steps
+        self.done[:] = ((x**2 < 0.05) & (x_dot**2 < 0.01)
+                        & (theta**2 < 0.1*np.pi/180)
+                        & (theta_dot**2 < 0.1*self.wn*np.pi/180))
+        self.done |= self.counter >= self.MAX_STEPS
+
+        reward = self.reward.copy()
+        done = self.done.copy()
+        info = {}
+
+        # Reset any environments that are done
+        if done.any():
+            info['terminal_observation'] = self.state[done].copy()
+            info['episode_length'] = self.counter[done].copy()
+            self._reset_envs(done)
+
+        return self.state.copy(), reward, done, info
+
+    def _reset_envs(self, mask):
+        """ Reset only the environments selected by the boolean array mask """
+        self.state[mask] = self._initial_states(np.count_nonzero(mask))
+        self.counter[mask] = 0
+        self.done[mask] = False
+        self.x_accel[mask] = 0.0
+
+    def _reset(self):
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self.state.copy()
@@ -18,6 +18,12 @@
 # Modified:
 #   * 01/24/18 - JEV - joshua.vaughan@louisiana.edu
 #       - Added integral windup check
+#   * 10/18/26
+#       - Added PIDBank, for updating many PID loops at once
+#       - Log messages use lazy formatting, so they're free when not debugging
+#       - PID uses the module logger too, like PIDBank
+#       - Example uses the fixed-step closed_loop_simulation, not odeint per sample,
+#         with a fixed-step PIDBank
 #
 ##########################################################################################
 
@@ -42,7 +48,7 @@ class PID(object):
             max_out = the maximum output of the controller
             min_out = the minimum output of the controller
         '''
-        logging.debug('Creating PID controller...')
+        logger.debug('Creating PID controller...')
         self.kp = kp
         self.kd = kd / dt
         self.ki = ki * dt
@@ -84,7 +90,7 @@ class PID(object):
 
     def compute_output(self, desired_state, current_state, current_time = None, previous_time = None):
         if current_time is None:
-            logging.debug('Current Time is None')
+            logger.debug('Current Time is None')
             self.current_time = time.time()
         else:
             self.current_time = current_time
@@ -92,8 +98,10 @@ class PID(object):
         if previous_time is not None:
             self.previous_time = previous_time
             
-        logging.debug('Current State: {:.4f}\t Desired State: {:.4f}'.format(current_state, desired_state))    
-        logging.debug('Current Time: {:.4f}\t Previous Time: {:.4f}'.format(self.current_time, self.previous_time))    
+        # Using logger's lazy formatting, so these cost almost nothing unless 
+        # debug logging is actually on
+        logger.debug('Current State: %.4f\t Desired State: %.4f', current_state, desired_state)
+        logger.debug('Current Time: %.4f\t Previous Time: %.4f', self.current_time, self.previous_time)
         
         if (self.current_time - self.previous_time >= self.dt):
             self.error = desired_state - current_state
@@ -110,8 +118,8 @@ class PID(object):
             self.state_change = current_state - self.last_state
             self.last_state = current_state
             
-            logging.debug('Error: {:.4f}\t Error_dot: {:.4f}'.format(self.error, self.state_change))
-            logging.debug('Integral term: {:.4f}'.format(self.integral_term))
+            logger.debug('Error: %.4f\t Error_dot: %.4f', self.error, self.state_change)
+            logger.debug('Integral term: %.4f', self.integral_term)
             
             self.output = self.kp * self.error + self.integral_term - self.kd * self.state_change
             
@@ -123,10 +131,151 @@ class PID(object):
             
             self.previous_time = self.current_time
                 
-        logging.debug('PID output: {:.4f}\n'.format(self.output))
+        logger.debug('PID output: %.4f\n', self.output)
 
         return self.output
 
+
+class PIDBank(object):
+    ''' Class to implement a bank of N PID controllers, updated all at once
+    
+    The gains, integrators, and last states are held in arrays, so one call to
+    compute_output() updates every loop with a few NumPy operations. This is 
+    meant for controlling many joints at once or for Monte-Carlo gain sweeps. 
+    The control law, integral windup check, and output limits match PID above.
+    '''
+    
+    def __init__(self, kp, ki, kd, dt, max_out, min_out, num_loops=None, 
+                 start_time=None, fixed_step=False):
+        ''' Initializing
+        
+        Arguments:
+            kp = proportional gains, float or array > 0
+            kd = derivative gains, float or array >= 0
+            ki = integral gains, float or array >= 0
+            dt = sample time (s), shared by all loops
+            max_out = the maximum output of each controller, float or array
+            min_out = the minimum output of each controller, float or array
+            num_loops = the number of loops. If None, found from the gains
+            start_time = if None, use time.time() for timing. Otherwise, 
+                         times must be passed to compute_output()
+            fixed_step = if True, every call to compute_output() is treated as 
+                         one sample of dt and no times are checked. This is 
+                         the mode to use for simulation-in-the-loop.
+        '''
+        logger.debug('Creating PID controller bank...')
+        
+        if num_loops is None:
+            num_loops = np.broadcast(np.atleast_1d(kp), np.atleast_1d(ki), 
+                                     np.atleast_1d(kd), np.atleast_1d(max_out), 
+                                     np.atleast_1d(min_out)).size
+        self.num_loops = num_loops
+        
+        self.dt = dt
+        self.change_gains(kp, kd, ki)
+        
+        self.max_output = self._to_array(max_out)
+        self.min_output = self._to_array(min_out)
+        
+        self.fixed_step = fixed_step
+        
+        if fixed_step or start_time is not None:
+            self.current_time = 0.0
+            self.previous_time = 0.0
+        else:
+            self.current_time = time.time()
+            self.previous_time = self.current_time
+        
+        self.reset()
+    
+    
+    def _to_array(self, value):
+        ''' Returns a (num_loops,) float array copy of a scalar or array '''
+        return np.array(np.broadcast_to(value, (self.num_loops,)), dtype=float)
+    
+    
+    def reset(self, mask=None):
+        ''' Zero the integrators, last states, and outputs 
+        
+        Arguments:
+            mask = boolean or index array of the loops to reset. All if None.
+        '''
+        if mask is None:
+            self.last_state = np.zeros(self.num_loops)
+            self.integral_term = np.zeros(self.num_loops)
+            self.error = np.zeros(self.num_loops)
+            self.output = np.zeros(self.num_loops)
+        else:
+            self.last_state[mask] = 0.0
+            self.integral_term[mask] = 0.0
+            self.error[mask] = 0.0
+            self.output[mask] = 0.0
+    
+    
+    def change_gains(self, kp, kd, ki):
+        self.kp = self._to_array(kp)
+        self.kd = self._to_array(kd) / self.dt
+        self.ki = self._to_array(ki) * self.dt
+    
+    
+    def change_sample_time(self, dt):
+        self.sample_time_ratio = dt / self.dt
+        
+        # update gain terms to reflect new sample time
+        self.ki *= self.sample_time_ratio
+        self.kd /= self.sample_time_ratio
+        
+        # update sample time
+        self.dt = dt
+    
+    
+    def compute_output(self, desired_state, current_state, current_time=None, previous_time=None):
+        ''' Update all loops and return the array of outputs
+        
+        Arguments:
+            desired_state = the setpoints, float or (num_loops,) array
+            current_state = the current states, float or (num_loops,) array
+            current_time, previous_time = used as in PID. Ignored in fixed_step mode.
+        
+        The returned array is reused by the next call. Copy it to keep it.
+        '''
+        if not self.fixed_step:
+            if current_time is None:
+                self.current_time = time.time()
+            else:
+                self.current_time = current_time
+            
+            if previous_time is not None:
+                self.previous_time = previous_time
+            
+            if self.current_time - self.previous_time < self.dt:
+                return self.output
+            
+            self.previous_time = self.current_time
+        
+        current_state = np.asarray(current_state, dtype=float)
+        
+        np.subtract(desired_state, current_state, out=self.error)
+        
+        # limit the integral to within the range of possible values to 
+        # prevent integral windup
+        self.integral_term += self.ki * self.error
+        np.clip(self.integral_term, self.min_output, self.max_output, out=self.integral_term)
+        
+        state_change = current_state - self.last_state
+        self.last_state[:] = current_state
+        
+        output = self.kp * self.error + self.integral_term - self.kd * state_change
+        
+        # limit the output to within the range of possible values
+        np.clip(output, self.min_output, self.max_output, out=self.output)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Error: %s\t Error_dot: %s', self.error, state_change)
+            logger.debug('PID bank output: %s\n', self.output)
+        
+        return self.output
+
 # Example use
 if __name__ == '__main__':
     """ Example use of the PID controller
@@ -137,7 +286,6 @@ if __name__ == '__main__':
     """
     
     import matplotlib.pyplot as plt
-    from scipy.integrate import odeint
     
     
     # Debug level logging
@@ -155,39 +303,25 @@ if __name__ == '__main__':
     kd = 3.5            # derivative gain
     deltaT = 0.01       # sampling time
     u_max = 100.0       # maximum actuator effort
-    pid = PID(kp, ki, kd, deltaT, u_max, -u_max, 0.0)
     
-    def eq_of_motion(w, t, p):
-        """
-        Defines the differential equations for the coupled spring-mass system.
-
-        Arguments:
-            w :  vector of the state variables:
-            t :  time
-            p :  vector of the parameters:
-        """
-        x, x_dot = w
-        m, desired, PID_force, F_disturb = p
-        
-        # logging.debug('PID_force = {:.4f}'.format(PID_force))
-        
-        # Create sysODE = (x',y_dot')
-        #  We ignore the xd_dot term, as it is only an impulse as the start of the step
-        sysODE = [x_dot,
-                  1.0/m * (PID_force -  F_disturb)]
-        return sysODE
+    # The simulator calls the controller exactly once per sample, so a one-loop 
+    # PIDBank in fixed-step mode is used. It treats each call as one sample of 
+    # deltaT, rather than comparing times, which could round to slightly less 
+    # than deltaT and make the controller skip a sample.
+    pid = PIDBank(kp, ki, kd, deltaT, u_max, -u_max, fixed_step=True)
+    
+    # The plant is linear, so we use the closed-loop simulator from the Simple 
+    # Simulations folder. It discretizes the plant exactly, once, then steps it 
+    # and the controller together. This is much faster than restarting odeint 
+    # for every controller sample.
+    import os, sys
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 
+                                    '..', '..', 'Simple Simulations'))
+    from closed_loop_simulation import ClosedLoopSimulator
     
-    # ODE solver parameters
-    abserr = 1.0e-12
-    relerr = 1.0e-12
-    max_step = 0.1
     stoptime = 10.0
 
-    # Create the time samples for the output of the ODE solver.
-    t = np.arange(0, stoptime, deltaT)
-
-
-    # Define and pack up the parameters and initial conditions:
+    # Define the parameters and initial conditions:
     m = 1.0         # system mass
     desired = 1.0   # desired setpoint - constant
     
@@ -197,25 +331,23 @@ if __name__ == '__main__':
     x_init = 0.0
     x_dot_init = 0.0
     x0 = [x_init, x_dot_init]
-
-    # Define an empty response array to fill in the for loop below
-    resp = np.zeros((len(t)-1,2))
-
-    pid_output = np.zeros_like(t)
-    # Call the ODE solver one step at a time to simulate a "real time" loop
-    for ii in range(len(t)-1):    
-        PID_force = pid.compute_output(desired, x0[0], t[ii+1], t[ii])
-        pid_output[ii] = PID_force # save current value for later plotting
-        logging.debug('PID Force in Time loop: {:.4f}'.format(PID_force))
-        logging.debug('Current resp: {:.4f}'.format(x0[0]))
-        logging.debug('Times {:.4f}, {:.4f}'.format(t[ii], t[ii+1]))
-        
-        # pack the parameters and call the ode solver
-        p = [m, desired, PID_force, F_disturb]
-        _, resp[ii,:] = odeint(eq_of_motion, x0, (t[ii], t[ii+1]), args=(p,), atol = abserr, rtol = relerr, hmax=max_step)  
-         
-        # Update the initial guess for the next time through this loop 
-        x0 = resp[ii,:]
+    
+    # The mass, x' = Ax + Bu, where the input u is the net force on the mass
+    A = np.array([[0, 1], 
+                  [0, 0]])
+    B = np.array([[0], 
+                  [1.0/m]])
+    
+    def controller(t, states):
+        """ Returns the net force on the mass, the PID force minus the disturbance """
+        PID_force = pid.compute_output(desired, states[0])[0]
+        return [PID_force - F_disturb]
+    
+    # Simulate a "real time" loop, with the PID force held constant over each sample
+    sim = ClosedLoopSimulator(deltaT, A, B)
+    t, resp, net_force = sim.simulate(x0, controller, stoptime)
+    
+    pid_output = net_force[:, 0] + F_disturb
 
 
 
@@ -244,7 +376,7 @@ if __name__ == '__main__':
     plt.ylabel('Position (m)',family='CMUSerif-Roman',fontsize=22,weight='bold',labelpad=10)
 
     plt.plot(t,desired * np.ones_like(t), linewidth=2, linestyle = '--', label=r'Setpoint')
-    plt.plot(t[0:-1], resp[:,0], linewidth=2, linestyle='-', label=r'Response')
+    plt.plot(t, resp[:,0], linewidth=2, linestyle='-', label=r'Response')
 
     # uncomment below and set limits if needed
     # plt.xlim(0,5)
@@ -0,0 +1,297 @@
+#! /usr/bin/env python
+
+###############################################################################
+# dubins_paths.py
+#
+# Vectorized Dubins paths. All six words (LSL, RSR, LSR, RSL, RLR, LRL) are
+# evaluated for arrays of start and goal poses at once, rather than one pose
+# pair at a time.
+#
+# The formulas for each word are those in dubins_path_tests.py, which were
+# adapted from the Python Robotics project:
+#
+#    https://github.com/AtsushiSakai/PythonRobotics/blob/master/PathPlanning/DubinsPath/dubins_path_planning.py
+#
+# Poses are arrays of x (m), y (m), and yaw (rad). Arrays of poses have one
+# pose per row. There are three main functions:
+#   * shortest_lengths() - only the length of the shortest path for each pair,
+#     for scoring lots of candidates quickly
+#   * length_matrix() - the shortest path lengths between every pair of a set
+#     of poses, to use as a lookup table when ordering waypoints
+#   * sample_paths() - the points along the shortest paths, computed in one
+#     pass into flat arrays
+#
+# Created: 10/18/26
+#
+# Modified:
+#   * 10/18/26
+#       - step_size is in turning radii, as it was in dubins_path_planning(),
+#         not meters, so callers get the same point spacing as before
+#
+# TODO:
+#   *
+###############################################################################
+
+import numpy as np
+
+
+# The words, and the direction of each of their segments: 1 for a left turn,
+# -1 for a right turn, and 0 for straight
+WORDS = ('LSL', 'RSR', 'LSR', 'RSL', 'RLR', 'LRL')
+SEGMENT_DIRECTIONS = np.array([[1, 0, 1],
+                               [-1, 0, -1],
+                               [1, 0, -1],
+                               [-1, 0, 1],
+                               [-1, 1, -1],
+                               [1, -1, 1]])
+
+
+def mod2pi(theta):
+    """ Wrap angles to [0, 2pi) """
+    return np.mod(theta, 2 * np.pi)
+
+
+def pi_2_pi(angle):
+    """ Wrap angles to [-pi, pi) """
+    return (angle + np.pi) % (2 * np.pi) - np.pi
+
+
+def _normalized_problem(start, goal, curvature):
+    """ Returns alpha, beta, and d, the standard form of the Dubins problem
+
+    The problem is rotated and scaled, so that the start is at the origin, the
+    goal is on the x-axis at distance d, and the turning radius is 1.
+    """
+    start = np.asarray(start, dtype=float)
+    goal = np.asarray(goal, dtype=float)
+
+    dx = goal[..., 0] - start[..., 0]
+    dy = goal[..., 1] - start[..., 1]
+
+    d = np.hypot(dx, dy) * curvature
+    theta = mod2pi(np.arctan2(dy, dx))
+    alpha = mod2pi(start[..., 2] - theta)
+    beta = mod2pi(goal[..., 2] - theta)
+
+    return alpha, beta, d
+
+
+def word_lengths(alpha, beta, d):
+    """ Returns the normalized segment lengths of all six words
+
+    Arguments:
+        alpha, beta, d : arrays, from _normalized_problem()
+
+    Returns:
+        a (6, 3, ...) array of the lengths of the three segments of each word,
+        in the order of WORDS. Turns are in radians, and the straight segments
+        are in turning radii. Words that can't connect the poses are NaN.
+    """
+    alpha, beta, d = np.broadcast_arrays(*[np.asarray(x, dtype=float) for x in (alpha, beta, d)])
+
+    sa, sb = np.sin(alpha), np.sin(beta)
+    ca, cb = np.cos(alpha), np.cos(beta)
+    c_ab = np.cos(alpha - beta)
+
+    lengths = np.full((6, 3) + d.shape, np.nan)
+
+    with np.errstate(invalid='ignore'):
+        # LSL
+        p_squared = 2 + d * d - 2 * c_ab + 2 * d * (sa - sb)
+        tmp = np.arctan2(cb - ca, d + sa - sb)
+        lengths[0] = [mod2pi(-alpha + tmp), np.sqrt(p_squared), mod2pi(beta - tmp)]
+        lengths[0, :, p_squared < 0] = np.nan
+
+        # RSR
+        p_squared = 2 + d * d - 2 * c_ab + 2 * d * (sb - sa)
+        tmp = np.arctan2(ca - cb, d - sa + sb)
+        lengths[1] = [mod2pi(alpha - tmp), np.sqrt(p_squared), mod2pi(-beta + tmp)]
+        lengths[1, :, p_squared < 0] = np.nan
+
+        # LSR
+        p_squared = -2 + d * d + 2 * c_ab + 2 * d * (sa + sb)
+        p = np.sqrt(p_squared)
+        tmp = np.arctan2(-ca - cb, d + sa + sb) - np.arctan2(-2.0, p)
+        lengths[2] = [mod2pi(-alpha + tmp), p, mod2pi(-mod2pi(beta) + tmp)]
+        lengths[2, :, p_squared < 0] = np.nan
+
+        # RSL
+        p_squared = d * d - 2 + 2 * c_ab - 2 * d * (sa + sb)
+        p = np.sqrt(p_squared)
+        tmp = np.arctan2(ca + cb, d - sa - sb) - np.arctan2(2.0, p)
+        lengths[3] = [mod2pi(alpha - tmp), p, mod2pi(beta - tmp)]
+        lengths[3, :, p_squared < 0] = np.nan
+
+        # RLR
+        tmp = (6.0 - d * d + 2.0 * c_ab + 2.0 * d * (sa - sb)) / 8.0
+        p = mod2pi(2 * np.pi - np.arccos(tmp))
+        t = mod2pi(alpha - np.arctan2(ca - cb, d - sa + sb) + mod2pi(p / 2.0))
+        lengths[4] = [t, p, mod2pi(alpha - beta - t + mod2pi(p))]
+        lengths[4, :, np.abs(tmp) > 1.0] = np.nan
+
+        # LRL
+        tmp = (6.0 - d * d + 2.0 * c_ab + 2.0 * d * (sb - sa)) / 8.0
+        p = mod2pi(2 * np.pi - np.arccos(tmp))
+        t = mod2pi(-alpha - np.arctan2(ca - cb, d + sa - sb) + p / 2.0)
+        lengths[5] = [t, p, mod2pi(mod2pi(beta) - alpha - t + mod2pi(p))]
+        lengths[5, :, np.abs(tmp) > 1.0] = np.nan
+
+    return lengths
+
+
+def shortest_paths(start, goal, curvature):
+    """ Returns the shortest Dubins path between each pair of poses
+
+    Arguments:
+        start, goal : arrays of poses, (3,) or (num_pairs, 3), that broadcast
+                      against each other
+        curvature : the maximum curvature (1/m)
+
+    Returns:
+        words : index into WORDS of the shortest word for each pair
+        segments : the normalized lengths of its segments, (..., 3)
+        lengths : the length of each path (m)
+    """
+    lengths = word_lengths(*_normalized_problem(start, goal, curvature))
+
+    # Every pair of poses can be connected by at least one of the CSC words
+    totals = np.sum(lengths, axis=1)
+    words = np.nanargmin(totals, axis=0)
+
+    segments = np.take_along_axis(lengths, words[np.newaxis, np.newaxis], axis=0)[0]
+    segments = np.moveaxis(segments, 0, -1)
+
+    return words, segments, np.sum(segments, axis=-1) / curvature
+
+
+def shortest_lengths(start, goal, curvature):
+    """ Returns only the length (m) of the shortest path between each pair """
+    lengths = word_lengths(*_normalized_problem(start, goal, curvature))
+    return np.nanmin(np.sum(lengths, axis=1), axis=0) / curvature
+
+
+def length_matrix(poses, curvature):
+    """ Returns the shortest path lengths (m) between every pair of poses
+
+    Element [i, j] is the length from poses[i] to poses[j]. Dubins paths
+    aren't symmetric, so it usually differs from element [j, i].
+    """
+    poses = np.asarray(poses, dtype=float)
+    return shortest_lengths(poses[:, np.newaxis], poses[np.newaxis], curvature)
+
+
+def _segment_end(x, y, yaw, direction, length, radius):
+    """ Returns the pose after moving length (m) along a segment """
+    turn = direction * length / radius
+    curved = direction != 0
+
+    # Straight segments would divide by zero below, so use 1 and replace them
+    sign = np.where(curved, direction, 1)
+
+    end_x = np.where(curved, x + radius * sign * (np.sin(yaw + turn) - np.sin(yaw)),
+                     x + length * np.cos(yaw))
+    end_y = np.where(curved, y + radius * sign * (np.cos(yaw) - np.cos(yaw + turn)),
+                     y + length * np.sin(yaw))
+
+    return end_x, end_y, yaw + turn
+
+
+def sample_paths(start, goal, curvature, step_size=0.1):
+    """ Returns points along the shortest path between each pair of poses
+
+    All of the points are computed together. They are returned in flat arrays,
+    with the points of path i in [offsets[i]:offsets[i + 1]].
+
+    Arguments:
+        start, goal : arrays of poses, (3,) or (num_pairs, 3)
+        curvature : the maximum curvature (1/m)
+        step_size : the distance between points along the paths, in turning
+                    radii, like the old dubins_path_planning(). The points
+                    are step_size / curvature (m) apart.
+
+    Returns:
+        x, y, yaw : the points. Each path includes both of its end points.
+        offsets : the start of each path in x, y, and yaw, plus the total
+        words : index into WORDS of the shortest word for each pair
+        lengths : the length of each path (m)
+    """
+    start, goal = np.broadcast_arrays(np.atleast_2d(np.asarray(start, dtype=float)),
+                                      np.atleast_2d(np.asarray(goal, dtype=float)))
+    radius = 1.0 / curvature
+
+    words, segments, lengths = shortest_paths(start, goal, curvature)
+    directions = SEGMENT_DIRECTIONS[words]
+    segment_lengths = segments * radius
+
+    # The pose at the start of each segment, (num_pairs, 3) each
+    segment_x = np.zeros(segments.shape)
+    segment_y = np.zeros(segments.shape)
+    segment_yaw = np.zeros(segments.shape)
+    segment_x[:, 0], segment_y[:, 0], segment_yaw[:, 0] = start.T
+
+    for index in range(2):
+        (segment_x[:, index + 1],
+         segment_y[:, index + 1],
+         segment_yaw[:, index + 1]) = _segment_end(segment_x[:, index], segment_y[:, index],
+                                                    segment_yaw[:, index], directions[:, index],
+                                                    segment_lengths[:, index], radius)
+
+    # Distance along its path of every point
+    step_size = step_size * radius
+    num_points = np.ceil(lengths / step_size).astype(int) + 1
+    offsets = np.concatenate(([0], np.cumsum(num_points)))
+    path = np.repeat(np.arange(len(lengths)), num_points)
+    distance = np.minimum((np.arange(offsets[-1]) - offsets[path]) * step_size, lengths[path])
+
+    # Which segment each point is on, and how far along it
+    boundaries = np.cumsum(segment_lengths, axis=1)
+    segment = (distance > boundaries[path, 0]).astype(int) + (distance > boundaries[path, 1])
+    along = distance - (boundaries[path, segment] - segment_lengths[path, segment])
+
+    x, y, yaw = _segment_end(segment_x[path, segment], segment_y[path, segment],
+                             segment_yaw[path, segment], directions[path, segment],
+                             along, radius)
+
+    return x, y, pi_2_pi(yaw), offsets, words, lengths
+
+
+def dubins_path(start, goal, curvature, step_size=0.1):
+    """ Returns the shortest path between two poses
+
+    Arguments:
+        start, goal : the poses, [x (m), y (m), yaw (rad)]
+        curvature : the maximum curvature (1/m)
+        step_size : the distance between points along the path, in turning
+                    radii. See sample_paths().
+
+    Returns:
+        x, y, yaw : arrays of the points along the path
+        mode : the word of the path, like 'LSL'
+        length : the length of the path (m)
+    """
+    x, y, yaw, _, words, lengths = sample_paths(start, goal, curvature, step_size)
+    return x, y, yaw, WORDS[words[0]], lengths[0]
+
+
+if __name__ == '__main__':
+    import time
+
+    rng = np.random.default_rng(0)
+    num_pairs = 10000
+    curvature = 1 / 4.99
+
+    starts = np.column_stack((rng.uniform(-20, 20, (num_pairs, 2)), rng.uniform(-np.pi, np.pi, num_pairs)))
+    goals = np.column_stack((rng.uniform(-20, 20, (num_pairs, 2)), rng.uniform(-np.pi, np.pi, num_pairs)))
+
+    start_time = time.perf_counter()
+    lengths = shortest_lengths(starts, goals, curvature)
+    print('Shortest lengths of {} pairs in {:.2f} ms'.format(num_pairs, 1e3 * (time.perf_counter() - start_time)))
+
+    start_time = time.perf_counter()
+    x, y, yaw, offsets, words, _ = sample_paths(starts, goals, curvature, step_size=0.1)
+    print('Sampled {} points in {:.2f} ms'.format(len(x), 1e3 * (time.perf_counter() - start_time)))
+
+    # Each path should end at its goal
+    end_error = np.hypot(x[offsets[1:] - 1] - goals[:, 0], y[offsets[1:] - 1] - goals[:, 1])
+    yaw_error = np.abs(pi_2_pi(yaw[offsets[1:] - 1] - goals[:, 2]))
+    print('Max. end position error: {:.2e} m, yaw error: {:.2e} rad'.format(np.max(end_error), np.max(yaw_error)))
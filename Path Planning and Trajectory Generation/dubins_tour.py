@@ -0,0 +1,348 @@
+#! /usr/bin/env python
+
+###############################################################################
+# dubins_tour.py
+#
+# Planning the order to visit a set of waypoints along Dubins paths, a
+# "Dubins traveling salesman" problem.
+#
+# The heading at each waypoint is free, so it's discretized into num_headings
+# choices. The Dubins lengths between every waypoint/heading pair are computed
+# once, using dubins_paths.py, and cached. They can also be saved to a file,
+# so a replan with the same waypoints doesn't recompute them.
+#
+# The tour is then found with heuristics that only use that table:
+#   1. A nearest-neighbor tour, from the start pose
+#   2. With the headings fixed, the order is improved by 2-opt (reversing
+#      part of the tour) and or-opt (moving 1 to 3 waypoints elsewhere). Each
+#      move is scored for all positions at once, as arrays.
+#   3. With the order fixed, the best heading at each waypoint is found
+#      exactly, by dynamic programming.
+# Steps 2 and 3 repeat until the tour stops getting shorter. Only the final
+# tour is turned into points along the path.
+#
+# Created: 10/18/26
+#
+# Modified:
+#   *
+#
+# TODO:
+#   *
+###############################################################################
+
+import logging
+import os
+
+import numpy as np
+
+from dubins_paths import shortest_lengths, sample_paths
+
+logger = logging.getLogger(__name__)
+
+
+def _two_opt_move(sequence, costs):
+    """ Returns the change in length and (i, j) of the best 2-opt move, which
+    reverses sequence[i:j + 1]. The first and last entries don't move.
+
+    The costs are not symmetric, so the reversed part is rescored using
+    running sums of the forward and backward lengths of each edge.
+    """
+    forward = costs[sequence[:-1], sequence[1:]]
+    backward = costs[sequence[1:], sequence[:-1]]
+    F = np.concatenate(([0.0], np.cumsum(forward)))
+    B = np.concatenate(([0.0], np.cumsum(backward)))
+
+    i = np.arange(1, len(sequence) - 1)[:, np.newaxis]
+    j = np.arange(1, len(sequence) - 1)[np.newaxis, :]
+
+    delta = (costs[sequence[i - 1], sequence[j]] + costs[sequence[i], sequence[j + 1]]
+             - forward[i - 1] - forward[j]
+             + (B[j] - B[i]) - (F[j] - F[i]))
+    delta = np.where(j > i, delta, np.inf)
+
+    best = np.unravel_index(np.argmin(delta), delta.shape)
+    return delta[best], (best[0] + 1, best[1] + 1)
+
+
+def _or_opt_move(sequence, costs, max_segment=3):
+    """ Returns the change in length and (i, segment length, k) of the best
+    or-opt move, which moves sequence[i:i + segment length] to between
+    sequence[k] and sequence[k + 1], without reversing it.
+    """
+    best_delta, best_move = np.inf, None
+    num = len(sequence)
+    edge_costs = costs[sequence[:-1], sequence[1:]]
+
+    for segment_length in range(1, max_segment + 1):
+        i = np.arange(1, num - segment_length)[:, np.newaxis]
+        if len(i) == 0:
+            break
+
+        first = sequence[i]
+        last = sequence[i + segment_length - 1]
+        before = sequence[i - 1]
+        after = sequence[i + segment_length]
+
+        removed = costs[before, first] + costs[last, after] - costs[before, after]
+
+        k = np.arange(num - 1)[np.newaxis, :]
+        added = costs[sequence[k], first] + costs[last, sequence[k + 1]] - edge_costs[k]
+
+        # The edges touching the segment aren't places it can go
+        delta = np.where((k < i - 1) | (k > i + segment_length - 1), added - removed, np.inf)
+
+        best = np.unravel_index(np.argmin(delta), delta.shape)
+        if delta[best] < best_delta:
+            best_delta = delta[best]
+            best_move = (best[0] + 1, segment_length, best[1])
+
+    return best_delta, best_move
+
+
+class DubinsTourPlanner(object):
+    """ Orders waypoints and chooses their headings for a short Dubins tour """
+
+    def __init__(self, waypoints, curvature, num_headings=8, cache_filename=None):
+        """ Initializing
+
+        Arguments:
+            waypoints : (num_waypoints, 2) array of x and y positions (m)
+            curvature : the maximum curvature (1/m)
+            num_headings : the number of evenly-spaced headings to consider
+                           at each waypoint
+            cache_filename : optional .npz file to save the length table to
+                             and load it from
+        """
+        self.waypoints = np.asarray(waypoints, dtype=float)
+        self.curvature = curvature
+        self.num_headings = num_headings
+        self.cache_filename = cache_filename
+
+        self.headings = np.arange(num_headings) * 2 * np.pi / num_headings
+
+        # One pose per waypoint and heading, pose i * num_headings + h
+        self.poses = np.column_stack((np.repeat(self.waypoints, num_headings, axis=0),
+                                      np.tile(self.headings, len(self.waypoints))))
+
+        self._length_table = None
+
+    @property
+    def length_table(self):
+        """ The (num_waypoints, num_headings, num_waypoints, num_headings)
+        array of Dubins lengths (m) from each waypoint and heading to each other
+        """
+        if self._length_table is None:
+            if not self._load_cache():
+                self._length_table = self._compute_length_table()
+                self._save_cache()
+
+        return self._length_table
+
+    def _compute_length_table(self, block_rows=64):
+        """ Computes the length table, a block of rows at a time to limit memory """
+        num_poses = len(self.poses)
+        table = np.empty((num_poses, num_poses))
+
+        for row in range(0, num_poses, block_rows):
+            table[row:row + block_rows] = shortest_lengths(self.poses[row:row + block_rows, np.newaxis],
+                                                           self.poses[np.newaxis], self.curvature)
+
+        shape = (len(self.waypoints), self.num_headings)
+        return table.reshape(shape + shape)
+
+    def _load_cache(self):
+        if self.cache_filename is None or not os.path.exists(self.cache_filename):
+            return False
+
+        with np.load(self.cache_filename) as cached:
+            if (cached['poses'].shape == self.poses.shape
+                    and np.array_equal(cached['poses'], self.poses)
+                    and float(cached['curvature']) == self.curvature):
+                self._length_table = cached['length_table']
+                return True
+
+        logger.info('The waypoints in %s have changed, recomputing.', self.cache_filename)
+        return False
+
+    def _save_cache(self):
+        if self.cache_filename is not None:
+            np.savez(self.cache_filename, poses=self.poses, curvature=self.curvature,
+                     length_table=self._length_table)
+
+    def _start_end_lengths(self, start, return_to_start):
+        """ Returns the lengths from the start pose to each waypoint and
+        heading, and from each of them to the end of the tour
+        """
+        shape = (len(self.waypoints), self.num_headings)
+
+        if start is None:
+            if return_to_start:
+                raise ValueError('A start pose is needed to return to it.')
+            return np.zeros(shape), np.zeros(shape)
+
+        start = np.asarray(start, dtype=float)
+        from_start = shortest_lengths(start, self.poses, self.curvature).reshape(shape)
+
+        if return_to_start:
+            to_end = shortest_lengths(self.poses, start, self.curvature).reshape(shape)
+        else:
+            to_end = np.zeros(shape)
+
+        return from_start, to_end
+
+    def _nearest_neighbor(self, from_start):
+        """ Returns the order and headings of the nearest-neighbor tour """
+        table = self.length_table
+        num_waypoints = len(self.waypoints)
+
+        order = np.zeros(num_waypoints, dtype=int)
+        headings = np.zeros(num_waypoints, dtype=int)
+        visited = np.zeros(num_waypoints, dtype=bool)
+
+        lengths = from_start
+        for index in range(num_waypoints):
+            lengths = np.where(visited[:, np.newaxis], np.inf, lengths)
+            order[index], headings[index] = np.unravel_index(np.argmin(lengths), lengths.shape)
+            visited[order[index]] = True
+            lengths = table[order[index], headings[index]]
+
+        return order, headings
+
+    def _best_headings(self, order, from_start, to_end):
+        """ Returns the best heading at each waypoint of order, and the length
+        of the tour, using dynamic programming over the headings
+        """
+        table = self.length_table
+        num_waypoints = len(order)
+
+        lengths = from_start[order[0]]
+        previous = np.zeros((num_waypoints, self.num_headings), dtype=int)
+
+        for index in range(1, num_waypoints):
+            # Element [h, k] is the length to here with heading h at the last
+            # waypoint and k at this one
+            candidates = lengths[:, np.newaxis] + table[order[index - 1], :, order[index], :]
+            previous[index] = np.argmin(candidates, axis=0)
+            lengths = np.min(candidates, axis=0)
+
+        lengths = lengths + to_end[order[-1]]
+
+        headings = np.zeros(num_waypoints, dtype=int)
+        headings[-1] = np.argmin(lengths)
+        for index in range(num_waypoints - 1, 0, -1):
+            headings[index - 1] = previous[index, headings[index]]
+
+        return headings, np.min(lengths)
+
+    def _improve_order(self, order, headings, from_start, to_end, tol=1e-9):
+        """ Returns order, improved by 2-opt and or-opt with the headings fixed """
+        num_waypoints = len(order)
+        table = self.length_table
+
+        # Costs between the waypoints, with their headings, plus a start node
+        # at num_waypoints and an end node at num_waypoints + 1
+        heading_of = np.zeros(num_waypoints, dtype=int)
+        heading_of[order] = headings
+        ids = np.arange(num_waypoints)
+
+        costs = np.zeros((num_waypoints + 2, num_waypoints + 2))
+        costs[:num_waypoints, :num_waypoints] = table[ids[:, np.newaxis], heading_of[:, np.newaxis],
+                                                      ids[np.newaxis, :], heading_of[np.newaxis, :]]
+        costs[num_waypoints, :num_waypoints] = from_start[ids, heading_of]
+        costs[:num_waypoints, num_waypoints + 1] = to_end[ids, heading_of]
+
+        sequence = np.concatenate(([num_waypoints], order, [num_waypoints + 1]))
+
+        while True:
+            two_opt_delta, (i, j) = _two_opt_move(sequence, costs)
+            or_opt_delta, or_opt = _or_opt_move(sequence, costs)
+
+            if min(two_opt_delta, or_opt_delta) > -tol:
+                break
+
+            if two_opt_delta <= or_opt_delta:
+                sequence[i:j + 1] = sequence[i:j + 1][::-1]
+            else:
+                i, segment_length, k = or_opt
+                segment = sequence[i:i + segment_length]
+                rest = np.concatenate((sequence[:i], sequence[i + segment_length:]))
+                position = k + 1 if k < i else k + 1 - segment_length
+                sequence = np.concatenate((rest[:position], segment, rest[position:]))
+
+        return sequence[1:-1]
+
+    def plan(self, start=None, return_to_start=False, max_iterations=50):
+        """ Plans the tour
+
+        Arguments:
+            start : the starting pose, [x (m), y (m), yaw (rad)]. If None,
+                    the tour starts at whichever waypoint is best.
+            return_to_start : if True, the tour ends back at the start pose
+            max_iterations : the maximum number of times to improve the order
+                             and then the headings
+
+        Returns:
+            order : the waypoints, in the order to visit them
+            headings : the heading (rad) at each waypoint, in that order
+            length : the length of the tour (m)
+        """
+        from_start, to_end = self._start_end_lengths(start, return_to_start)
+
+        order, headings = self._nearest_neighbor(from_start)
+        headings, length = self._best_headings(order, from_start, to_end)
+
+        for _ in range(max_iterations):
+            new_order = self._improve_order(order, headings, from_start, to_end)
+            new_headings, new_length = self._best_headings(new_order, from_start, to_end)
+
+            if new_length >= length - 1e-9:
+                break
+
+            order, headings, length = new_order, new_headings, new_length
+
+        return order, self.headings[headings], length
+
+    def sample_tour(self, order, headings, start=None, return_to_start=False, step_size=0.1):
+        """ Returns x, y, and yaw arrays of points along a planned tour. The
+        points are step_size turning radii apart, like in sample_paths().
+        """
+        poses = np.column_stack((self.waypoints[order], headings))
+
+        if start is not None:
+            poses = np.vstack((start, poses))
+            if return_to_start:
+                poses = np.vstack((poses, start))
+
+        x, y, yaw, offsets, _, _ = sample_paths(poses[:-1], poses[1:], self.curvature, step_size)
+
+        # Each leg includes its end points, so drop the repeated ones
+        keep = np.ones(len(x), dtype=bool)
+        keep[offsets[1:-1]] = False
+
+        return x[keep], y[keep], yaw[keep]
+
+
+if __name__ == '__main__':
+    import time
+
+    rng = np.random.default_rng(0)
+    waypoints = rng.uniform(0, 200, (200, 2))
+    start = np.array([0.0, 0.0, 0.0])
+
+    planner = DubinsTourPlanner(waypoints, curvature=1 / 4.99, num_headings=8)
+
+    start_time = time.perf_counter()
+    planner.length_table
+    print('Length table in {:.2f} s'.format(time.perf_counter() - start_time))
+
+    # For comparison, the waypoints in the order given, with the best headings
+    from_start, to_end = planner._start_end_lengths(start, True)
+    _, given_length = planner._best_headings(np.arange(len(waypoints)), from_start, to_end)
+
+    start_time = time.perf_counter()
+    order, headings, length = planner.plan(start, return_to_start=True)
+    print('Planned in {:.2f} s'.format(time.perf_counter() - start_time))
+    print('Tour length: {:.1f} m, in the given order: {:.1f} m'.format(length, given_length))
+
+    x, y, yaw = planner.sample_tour(order, headings, start, return_to_start=True)
+    print('Sampled length: {:.1f} m'.format(np.sum(np.hypot(np.diff(x), np.diff(y)))))
@@ -15,17 +15,29 @@
 #   - http://www.ucs.louisiana.edu/~jev9637
 #
 # Modified:
-#   *
+#   * 10/18/26
+#       - Command switching times are computed once, before calling odeint
+#       - accel_input() now handles shapers of any length
+#       - digseq() is vectorized and uses integer indices
+#       - See Misc Python Tools and Helpers/input_shapers.py for other shapers
+#       - The command comes from ShapedCommand, in Misc Python Tools and Helpers
 #
 ##########################################################################################
 
 
+import os
+import sys
+
 import numpy as np
 from matplotlib.pyplot import *
 
 # Import the ODE solver
 from scipy.integrate import odeint
 
+# The shaped command generator is in the Misc Python Tools and Helpers folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Misc Python Tools and Helpers'))
+from shaped_command import ShapedCommand
+
 
 def eq_of_motion(w, t, p):
     """
@@ -40,7 +52,7 @@ def eq_of_motion(w, t, p):
     x, x_dot, y, y_dot = w
     
     # Unpack the parameters
-    m, k, c, Distance, StartTime, Amax, Vmax, Shaper = p
+    m, k, c, command = p
 
     # Create sysODE = (x', x_dot', y', y_dot')
     sysODE = [x_dot,
@@ -54,20 +66,22 @@ def y_ddot(t, p):
     """
     Defines the accel input to the system.
     
-    We'll make a call to our lab function accel_input()
+    The switching times of the command are found once, when the ShapedCommand
+    is created, before the ODE solver is called. So, here we only need a binary
+    search for the current time. Evaluating all of the impulses at every solver step 
+    is unnecessary.
     
     Depending on the desired move distance, max accel, and max velocity, the input is either
     bang-bang or bang-coast-bang
     """
-    m, k, c, Distance, StartTime, Amax, Vmax, Shaper = p
+    m, k, c, command = p
     
-    y_ddot = accel_input(Amax,Vmax,Distance,StartTime,t,Shaper)
+    y_ddot = command(t)
     
     return y_ddot
 
 
 
-
 def accel_input(Amax,Vmax,Distance,StartTime,CurrTime,Shaper):
     """
     Original MATLAB/Octave premable
@@ -107,48 +121,12 @@ def accel_input(Amax,Vmax,Distance,StartTime,CurrTime,Shaper):
     #   * 3/26/14 - Joshua Vaughan - joshua.vaughan@louisiana.edu
     #       - Updated some commenting, corrected typos
     #       - Updated numpy import as np
+    #   * 10/18/26
+    #       - Shapers of any length, CurrTime can be a scalar or an array
+    #       - Built from ShapedCommand, rather than 9 hard-coded terms
     """
-
-    # These are the times for a bang-coast-bang input 
-    t1 = StartTime
-    t2 = (Vmax/Amax) + t1
-    t3 = (Distance/Vmax) + t1
-    t4 = (t2 + t3)-t1
-    end_time = t4
-
-    if len(Shaper) == 0:
-        # If no shaper is input, create an unshaped command
-        if t3 <= t2: # command should be bang-bang, not bang-coast-bang
-            t2 = np.sqrt(Distance/Amax)+t1
-            t3 = 2.0 * np.sqrt(Distance/Amax)+t1
-            end_time = t3
-        
-            accel = Amax*(CurrTime > t1) - 2*Amax*(CurrTime > t2) + Amax*(CurrTime > t3)
     
-        else: # command is bang-coast-bang
-            accel = Amax*(CurrTime > t1) - Amax*(CurrTime > t2) - Amax*(CurrTime > t3) + Amax*(CurrTime > t4)
-
-    else: # create a shaped command
-        ts = np.zeros((9,1))
-        A = np.zeros((9,1))
-        # 	Parse Shaper parameters
-        for ii in range(len(Shaper)):
-            ts[ii] = Shaper[ii,0]  # Shaper impulse times
-            A[ii] = Shaper[ii,1]  # Shaper impulse amplitudes
-
-        # Hard-coded for now
-        # TODO: be smarter about constructing the total input - JEV - 10/11/11
-        accel = (A[0]*(Amax*(CurrTime > (t1+ts[0])) - Amax*(CurrTime > (t2+ts[0])) - Amax*(CurrTime > (t3+ts[0])) + Amax*(CurrTime > (t4+ts[0])))
-        +	A[1]*(Amax*(CurrTime > (t1+ts[1])) - Amax*(CurrTime > (t2+ts[1])) - Amax*(CurrTime > (t3+ts[1])) + Amax*(CurrTime > (t4+ts[1])))
-        +   A[2]*(Amax*(CurrTime > (t1+ts[2])) - Amax*(CurrTime > (t2+ts[2])) - Amax*(CurrTime > (t3+ts[2])) + Amax*(CurrTime > (t4+ts[2])))
-        +   A[3]*(Amax*(CurrTime > (t1+ts[3])) - Amax*(CurrTime > (t2+ts[3])) - Amax*(CurrTime > (t3+ts[3])) + Amax*(CurrTime > (t4+ts[3])))
-        +   A[4]*(Amax*(CurrTime > (t1+ts[4])) - Amax*(CurrTime > (t2+ts[4])) - Amax*(CurrTime > (t3+ts[4])) + Amax*(CurrTime > (t4+ts[4])))
-        +   A[5]*(Amax*(CurrTime > (t1+ts[5])) - Amax*(CurrTime > (t2+ts[5])) - Amax*(CurrTime > (t3+ts[5])) + Amax*(CurrTime > (t4+ts[5])))
-        +   A[6]*(Amax*(CurrTime > (t1+ts[6])) - Amax*(CurrTime > (t2+ts[6])) - Amax*(CurrTime > (t3+ts[6])) + Amax*(CurrTime > (t4+ts[6])))
-        +   A[7]*(Amax*(CurrTime > (t1+ts[7])) - Amax*(CurrTime > (t2+ts[7])) - Amax*(CurrTime > (t3+ts[7])) + Amax*(CurrTime > (t4+ts[7])))
-        +   A[8]*(Amax*(CurrTime > (t1+ts[8])) - Amax*(CurrTime > (t2+ts[8])) - Amax*(CurrTime > (t3+ts[8])) + Amax*(CurrTime > (t4+ts[8]))))
-
-    return accel
+    return ShapedCommand(Amax,Vmax,Distance,StartTime,Shaper)(CurrTime)
 
 
 
@@ -216,16 +194,20 @@ def digseq(seq, step):
     Converted to Python on 2/18/13 by Joshua Vaughan (joshua.vaughan@louisiana.edu)
     """
 
-    dseq = np.zeros((round(seq[-1,0]/step)+2,1))
-
-    for nn in range(len(seq)):
-        index = np.floor(seq[nn,0]/step)
-        woof = (seq[nn,0]-index*step)/step
-        dseq[index+1] = dseq[index+1]+woof*seq[nn,1]
-        dseq[index] = dseq[index]+seq[nn,1] - woof*seq[nn,1]
+    seq = np.atleast_2d(np.asarray(seq, dtype=float))
+    
+    # Integer indices, so this also works with newer versions of NumPy. All
+    # impulses are processed at once and np.add.at accumulates any that share
+    # an index.
+    index = np.floor(seq[:,0]/step).astype(int)
+    woof = (seq[:,0]-index*step)/step
+    
+    dseq = np.zeros(int(round(seq[-1,0]/step))+2)
+    np.add.at(dseq, index+1, woof*seq[:,1])
+    np.add.at(dseq, index, seq[:,1] - woof*seq[:,1])
 
-    while dseq[len(dseq)-1] == 0:
-        dseq = dseq[0:(len(dseq)-1)]
+    # Remove any trailing zeros
+    dseq = dseq[:np.flatnonzero(dseq)[-1]+1].reshape(-1,1)
 
     return dseq
 
@@ -265,8 +247,11 @@ StartTime = 0.5                     # Time the y(t) input will begin
 # Design and define an input Shaper  
 Shaper = [] # An empty shaper means no input shaping
 
+# Find the switching times of the command once, rather than at every solver step
+command = ShapedCommand(Amax, Vmax, Distance, StartTime, Shaper)
+
 # Pack the parameters and initial conditions into arrays 
-p = [m, k, c, Distance, StartTime, Amax, Vmax, Shaper]
+p = [m, k, c, command]
 x0 = [x_init, x_dot_init, y_init, y_dot_init]
 
 # Call the ODE solver
@@ -329,8 +314,11 @@ ylabel('Payload Response',family='serif', fontsize=24, color = '#377eb8',weight=
 # Design and define an input Shaper  
 [digShaper, Shaper] = ZV(wn/(2.0*np.pi), zeta, max_step)
 
+# Find the switching times of the shaped command
+command = ShapedCommand(Amax, Vmax, Distance, StartTime, Shaper)
+
 # Pack the parameters and initial conditions into arrays 
-p = [m, k, c, Distance, StartTime, Amax, Vmax, Shaper]
+p = [m, k, c, command]
 
 # Call the ODE solver to get the shaped response
 resp_shaped = odeint(eq_of_motion, x0, t, args=(p,), atol=abserr, rtol=relerr,  hmax=max_step)
@@ -0,0 +1,187 @@
+#! /usr/bin/env python
+
+##########################################################################################
+# closed_loop_simulation.py
+#
+# Fixed-step simulation of a plant and a digital controller, stepped together
+#
+# Rather than restarting odeint for every controller sample, linear time-invariant plants
+# are discretized exactly (zero-order hold on the input) using the matrix exponential.
+# That is done once. Then, each sample is just x[k+1] = Ad x[k] + Bd u[k].
+#
+# Nonlinear plants can use a fixed-step RK4 integration, with the input held constant
+# over each sample, or an adaptive solver (solve_ivp) over each sample.
+#
+# States can also be a 2D array, with one row per simulation. The controller then
+# returns one row of inputs per simulation. This lets a gain sweep run as one simulation.
+#
+# Created: 10/18/26
+#
+# Modified:
+#   *
+#
+##########################################################################################
+
+import numpy as np
+from scipy.linalg import expm
+from scipy.integrate import solve_ivp
+
+
+def discretize(A, B, dt):
+    """
+    Exact zero-order hold discretization of the continuous system x' = Ax + Bu
+
+    Arguments:
+        A : the state matrix, n x n
+        B : the input matrix, n x m
+        dt : the sample time (s)
+
+    Returns:
+        Ad, Bd : the matrices for x[k+1] = Ad x[k] + Bd u[k]
+    """
+    A = np.atleast_2d(np.asarray(A, dtype=float))
+    B = np.asarray(B, dtype=float).reshape(A.shape[0], -1)
+    n, m = B.shape
+
+    # The exponential of the augmented matrix [[A, B], [0, 0]] contains both Ad and Bd
+    augmented = np.zeros((n + m, n + m))
+    augmented[:n, :n] = A
+    augmented[:n, n:] = B
+
+    phi = expm(augmented * dt)
+
+    return phi[:n, :n], phi[:n, n:]
+
+
+class ClosedLoopSimulator(object):
+    """ Class to step a plant and a sampled controller together at a fixed step """
+
+    def __init__(self, dt, A=None, B=None, eq_of_motion=None, method='zoh',
+                 substeps=1, **solver_kwargs):
+        """ Initializing
+
+        Arguments:
+            dt : sample time of the controller (s)
+            A, B : state and input matrices of an LTI plant, x' = Ax + Bu
+            eq_of_motion : for nonlinear plants, function f(states, t, u) returning
+                           the derivatives of the states, in the same argument order
+                           as we use for odeint
+            method : 'zoh' - exact discretization of the LTI plant (default)
+                     'rk4' - fixed-step RK4 of eq_of_motion
+                     'adaptive' - solve_ivp of eq_of_motion over each sample
+            substeps : number of RK4 steps per sample
+            solver_kwargs : passed to solve_ivp for the adaptive method
+        """
+        self.dt = dt
+        self.method = method
+        self.substeps = substeps
+        self.solver_kwargs = solver_kwargs
+
+        if method == 'zoh':
+            if A is None or B is None:
+                raise ValueError('The zoh method needs the A and B matrices of the plant.')
+
+            self.Ad, self.Bd = discretize(A, B, dt)
+
+            # Transposed so that they work on rows of states, x @ Ad^T
+            self._AdT = self.Ad.T.copy()
+            self._BdT = self.Bd.T.copy()
+
+        elif method in ('rk4', 'adaptive'):
+            if eq_of_motion is None:
+                raise ValueError('The {} method needs the eq_of_motion function.'.format(method))
+            self.eq_of_motion = eq_of_motion
+
+        else:
+            raise ValueError('Unknown method: {}'.format(method))
+
+
+    def step(self, states, t, u):
+        """ Returns the states one sample, dt, later with the input u held constant """
+        if self.method == 'zoh':
+            return np.asarray(states) @ self._AdT + np.asarray(u, dtype=float) @ self._BdT
+
+        elif self.method == 'rk4':
+            h = self.dt / self.substeps
+            f = self.eq_of_motion
+            x = np.asarray(states, dtype=float)
+
+            for ii in range(self.substeps):
+                k1 = np.asarray(f(x, t, u))
+                k2 = np.asarray(f(x + h/2 * k1, t + h/2, u))
+                k3 = np.asarray(f(x + h/2 * k2, t + h/2, u))
+                k4 = np.asarray(f(x + h * k3, t + h, u))
+                x = x + h/6 * (k1 + 2*k2 + 2*k3 + k4)
+                t = t + h
+
+            return x
+
+        else:
+            states = np.asarray(states, dtype=float)
+            sol = solve_ivp(lambda t, x: np.asarray(self.eq_of_motion(x.reshape(states.shape), t, u)).ravel(),
+                            (t, t + self.dt), states.ravel(), **self.solver_kwargs)
+            return sol.y[:, -1].reshape(states.shape)
+
+
+    def simulate(self, x0, controller, stoptime):
+        """ Simulate the closed-loop system from x0 for stoptime seconds
+
+        Arguments:
+            x0 : initial states, (n,) or (num_sims, n) for many simulations at once
+            controller : function u = controller(t, states), called once per sample.
+                         Returns the (m,) or (num_sims, m) array of inputs
+            stoptime : the length of the simulation (s)
+
+        Returns:
+            t : array of sample times
+            resp : the states at each sample time, (len(t), ...)
+            inputs : the input applied over each sample. The last is repeated
+                     so it has the same length as t.
+        """
+        x = np.array(x0, dtype=float)
+
+        num_steps = int(round(stoptime / self.dt))
+        t = np.arange(num_steps + 1) * self.dt
+
+        resp = np.zeros((num_steps + 1,) + x.shape)
+        resp[0] = x
+
+        u = np.atleast_1d(np.asarray(controller(t[0], x), dtype=float))
+        inputs = np.zeros((num_steps + 1,) + u.shape)
+
+        for ii in range(num_steps):
+            if ii > 0:
+                u = np.atleast_1d(np.asarray(controller(t[ii], x), dtype=float))
+
+            inputs[ii] = u
+            x = self.step(x, t[ii], u)
+            resp[ii + 1] = x
+
+        inputs[-1] = inputs[-2] if num_steps > 0 else u
+
+        return t, resp, inputs
+
+
+if __name__ == '__main__':
+    # Compare the exact discretization and RK4 for a PD-controlled mass
+    m = 1.0
+    kp = (2 * np.pi)**2
+    kd = 2.0
+    dt = 0.01
+
+    A = np.array([[0, 1], [0, 0]])
+    B = np.array([[0], [1 / m]])
+
+    def eq_of_motion(states, t, u):
+        x, x_dot = states
+        return np.array([x_dot, u[0] / m])
+
+    def controller(t, states):
+        x, x_dot = states
+        return [kp * (1.0 - x) - kd * x_dot]
+
+    t, resp_zoh, _ = ClosedLoopSimulator(dt, A, B).simulate([0, 0], controller, 10.0)
+    t, resp_rk4, _ = ClosedLoopSimulator(dt, eq_of_motion=eq_of_motion, method='rk4',
+                                         substeps=4).simulate([0, 0], controller, 10.0)
+
+    print('Max. difference between ZOH and RK4: {:.3e}'.format(np.max(np.abs(resp_zoh - resp_rk4))))
@@ -18,6 +18,9 @@
 #   * 12/4/13 - Joshua Vaughan - joshua.vaughan@louisiana.edu
 #       - Better commenting
 #       - Renaming functions to make their purpose more obvious
+#   * 10/18/26
+#       - Uses the fixed-step closed_loop_simulation, rather than odeint
+#       - Added a vectorized sweep of the derivative gain
 #
 ##########################################################################################
 
@@ -34,46 +37,29 @@
 
 import numpy as np
 from matplotlib.pyplot import * # Grab plotting functions
-from scipy.integrate import odeint
 
+# Fixed-step simulation of the plant and controller, from closed_loop_simulation.py
+from closed_loop_simulation import ClosedLoopSimulator
 
-def eq_of_motion(states, t, p):
-    """
-    Defines the differential equations for the coupled spring-mass system.
-
-    Arguments:
-        w :  vector of the state variables:
-        t :  time
-        p :  vector of the parameters:
-    """
-    x, x_dot = states
-    m, kp, kd, L, StartTime, Umax = p
-
-    # Create f = (x1',y1',x2',y2'):
-    sysODE = [x_dot,
-         U(t,states,p)]
-    return sysODE
-    
     
 def U(t,states,p):
     """ 
         Defines the force input to the system. Is limited by Umax
+        
+        states can be a single state vector or an array with one row per 
+        simulation. kp and kd can then be arrays with one gain per simulation.
     """
-    x, x_dot = states
-    m, kp, c, L, StartTime, Umax = p
+    states = np.asarray(states)
+    x, x_dot = states[..., 0], states[..., 1]
+    m, kp, kd, L, StartTime, Umax = p
     
     # We're using the non-derivative kick version of the PD controller
     U = kd/m*(-x_dot) + kp/m*(xd(t,L,StartTime)-x)
     
     # Limit the force to within symmetric limits defined by Umax
-    #   There are more clever/faster ways to do this, but this is most easiest 
-    #   to understand.
-    if U > Umax:
-        U = Umax
-    elif U < -Umax:
-        U = -Umax
+    U = np.clip(U, -Umax, Umax)
         
-    return U
+    return U[..., np.newaxis]
         
 
 def xd(t, L, StartTime):
@@ -112,22 +98,35 @@ StartTime = 0.5     # Time of step input
 Umax = 5.
 
 
-# ODE solver parameters
-abserr = 1.0e-8
-relerr = 1.0e-6
+# Simulation parameters
 stoptime = 10.0
-numpoints = 1001
-
-# Create the time samples for the output of the ODE solver.
-t = np.linspace(0,stoptime,numpoints)
+dt = 0.01           # sample time of the controller
 
 # Pack up the parameters and initial conditions:
 p = [m, kp, kd, L, StartTime, Umax]
 x0 = [x_init, x_dot_init]
 
+# The mass, x' = Ax + Bu, with the (limited) force per unit mass as the input.
+# The simulator discretizes this exactly once, then steps the plant and the 
+# controller together. The controller is sampled every dt.
+A = np.array([[0, 1],
+              [0, 0]])
+B = np.array([[0],
+              [1]])
+
+sim = ClosedLoopSimulator(dt, A, B)
+t, resp, force = sim.simulate(x0, lambda t, states: U(t, states, p), stoptime)
+
+
+# Sweeps of the gains run as one simulation, with one row of states per gain
+kd_sweep = np.linspace(0, 10, 101)
+p_sweep = [m, kp, kd_sweep, L, StartTime, Umax]
+x0_sweep = np.tile(x0, (len(kd_sweep), 1))
+
+_, resp_sweep, _ = sim.simulate(x0_sweep, lambda t, states: U(t, states, p_sweep), stoptime)
 
-# Call the ODE solver.
-resp = odeint(eq_of_motion, x0, t, args=(p,), atol=abserr, rtol=relerr)
+best = np.argmin(np.max(resp_sweep[:, :, 0], axis=0))
+print('Lowest peak position, {:.3f}m, is with kd = {:.2f}'.format(np.max(resp_sweep[:, best, 0]), kd_sweep[best]))
 
 
 
@@ -163,14 +162,9 @@ savefig('mass_spring_damper_RespNonlinForce.pdf',dpi=300)
 
 
 #----- Now, let's plot the force
-# first fill the arrays with zeros
-force = np.zeros(len(t))
-des_force = np.zeros(len(t))
-
-# Now, loop over the time vector and fill the desired and actual forces
-for ii in range(len(t)):
-    force[ii] = U(t[ii],resp[ii,:],p)
-    des_force[ii] = kd/m*(-resp[ii,1]) + kp/m*(xd(t[ii],L,StartTime)-resp[ii,0])
+# The simulator returns the limited force, we just need the unlimited one
+force = force[:,0]
+des_force = kd/m*(-resp[:,1]) + kp/m*(xd(t,L,StartTime)-resp[:,0])
 
 
 #   Many of these setting could also be made default by the .matplotlibrc file
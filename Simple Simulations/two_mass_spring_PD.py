@@ -15,7 +15,9 @@
 #   - http://www.ucs.louisiana.edu/~jev9637
 #
 # Modified:
-#   *
+#   * 10/18/26
+#       - Python 3 print statements
+#       - Added a closed-loop step response sweep using closed_loop_simulation
 #
 ##########################################################################################
 
@@ -23,6 +25,9 @@ import numpy as np
 import matplotlib.pyplot as plt
 import control
 
+# Fixed-step simulation of the plant and controller, from closed_loop_simulation.py
+from closed_loop_simulation import ClosedLoopSimulator
+
 m1 = 1.0
 m2 = 1.0
 kp = 10.0
@@ -46,8 +51,8 @@ D = np.array([[0, 0],[0, 0]])
 
 sys = control.ss(A,B,C,D)
 
-print '\nSystem 1'
-print control.pole(sys)
+print('\nSystem 1')
+print(control.poles(sys))
 
 
 # include input
@@ -70,6 +75,37 @@ D2 = np.array([[0], [0], [0]])
 
 sys2 = control.ss(A2,B2,C2,D2)
 
-print '\nSystem 2'
-print control.pole(sys2)
+print('\nSystem 2')
+print(control.poles(sys2))
+
+
+
+#----- Closed-loop step response ---------------------------------------------------------
+# The open-loop plant, with the PD force acting on m1. The PD controller is sampled at 
+# dt, so we simulate it with the fixed-step simulator. The plant is discretized exactly, 
+# once, and each row of the states is a different proportional gain.
+A_plant = np.array([[0, 1, 0, 0],
+                    [-k/m1, -c/m1, k/m1, c/m1],
+                    [0, 0, 0, 1],
+                    [k/m2, c/m2, -k/m2, -c/m2]])
+
+B_plant = np.array([[0], [1/m1], [0], [0]])
+
+dt = 0.01               # sample time of the controller
+stoptime = 30.0
+xd = 1.0                # desired position of m1
+
+kp_sweep = np.linspace(1, 20, 20)
+
+def PD_control(t, states):
+    """ PD control of the position of m1, one row of states per gain in kp_sweep """
+    return (kp_sweep * (xd - states[:,0]) - kd * states[:,1])[:, np.newaxis]
+
+sim = ClosedLoopSimulator(dt, A_plant, B_plant)
+t, resp, force = sim.simulate(np.zeros((len(kp_sweep), 4)), PD_control, stoptime)
 
+plt.plot(t, resp[:, ::5, 2], linewidth=2)
+plt.xlabel('Time (s)')
+plt.ylabel('Position of $m_2$ (m)')
+plt.legend(['$k_p$ = {:.0f}'.format(kp) for kp in kp_sweep[::5]], loc='lower right')
+plt.show()